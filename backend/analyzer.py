@@ -1,27 +1,167 @@
 from textblob import TextBlob
-import re
 import logging
-from langdetect import detect, LangDetectException
-from deep_translator import GoogleTranslator
+import os
+import threading
+from collections import Counter
+from cache import EmotionCache, default_cache_path
+from translation import default_translation_stage
+from lexicon import KeywordMatcher, load_lexicon
+from dedup import group_near_duplicates
+import metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global variable for the model pipeline
+# Bump whenever the analysis logic changes in a way that alters results,
+# so cached results from older versions are no longer served.
+ANALYZER_VERSION = "1"
+EMOTION_MODEL_ID = "j-hartmann/emotion-english-distilroberta-base"
+
+# Global variable for the model pipeline.
+# The model is loaded lazily (see load_model) so importing this module is cheap.
 emotion_classifier = None
 
-try:
-    from transformers import pipeline
-    # Load the model. This will download it on the first run.
-    # We use a smaller, faster model: j-hartmann/emotion-english-distilroberta-base
-    logger.info("Loading AI Emotion Model...")
-    emotion_classifier = pipeline("text-classification", model="j-hartmann/emotion-english-distilroberta-base", return_all_scores=True)
-    logger.info("AI Emotion Model Loaded Successfully!")
-except ImportError:
-    logger.warning("Transformers library not found. Falling back to keyword/sentiment analysis.")
-except Exception as e:
-    logger.error(f"Failed to load AI model: {e}. Falling back to keyword/sentiment analysis.")
+# Optional micro-batching scheduler (see scheduler.py). When set and running,
+# all inference goes through it so concurrent requests share batches.
+inference_scheduler = None
+
+# EMOTIA_FALLBACK_ONLY=1 serves keyword/TextBlob results only and never
+# imports transformers or torch.
+FALLBACK_ONLY = os.environ.get("EMOTIA_FALLBACK_ONLY", "0") == "1"
+
+# Inference backend: "torch" (transformers pipeline) or "onnx" (int8 model
+# exported with onnx_backend.py, loaded from EMOTIA_ONNX_MODEL_DIR).
+INFERENCE_BACKEND = os.environ.get("EMOTIA_BACKEND", "torch")
+ONNX_MODEL_DIR = os.environ.get("EMOTIA_ONNX_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "emotion-onnx"))
+# ONNX Runtime intra-op threads (0 = one per core)
+ONNX_THREADS = int(os.environ.get("EMOTIA_ONNX_THREADS", "0"))
+
+# unloaded -> loading -> ready | unavailable  (or disabled in fallback-only mode)
+model_state = "disabled" if FALLBACK_ONLY else "unloaded"
+model_warm = False
+_model_lock = threading.Lock()
+
+def load_model():
+    """
+    Loads the transformer pipeline once, thread-safely.
+    Returns the pipeline, or None when running on the fallbacks.
+    """
+    global emotion_classifier, model_state
+    if model_state in ("ready", "unavailable", "disabled"):
+        return emotion_classifier
+
+    with _model_lock:
+        if model_state != "unloaded":
+            return emotion_classifier
+        model_state = "loading"
+        try:
+            if INFERENCE_BACKEND == "onnx":
+                from onnx_backend import OnnxEmotionClassifier
+                logger.info(f"Loading quantized ONNX Emotion Model from {ONNX_MODEL_DIR}...")
+                emotion_classifier = OnnxEmotionClassifier(ONNX_MODEL_DIR, ONNX_THREADS)
+            else:
+                from transformers import pipeline
+                # Load the model. This will download it on the first run.
+                # We use a smaller, faster model: j-hartmann/emotion-english-distilroberta-base
+                logger.info("Loading AI Emotion Model...")
+                emotion_classifier = pipeline("text-classification", model=EMOTION_MODEL_ID, return_all_scores=True)
+            model_state = "ready"
+            logger.info("AI Emotion Model Loaded Successfully!")
+        except ImportError:
+            model_state = "unavailable"
+            logger.warning("Transformers library not found. Falling back to keyword/sentiment analysis.")
+        except Exception as e:
+            model_state = "unavailable"
+            logger.error(f"Failed to load AI model: {e}. Falling back to keyword/sentiment analysis.")
+    return emotion_classifier
+
+def warm_up(background: bool = False):
+    """
+    Loads the model and runs a dummy batch so the first real request
+    doesn't pay for lazy initialization. With background=True this
+    happens in a daemon thread and the call returns immediately.
+    """
+    if background:
+        thread = threading.Thread(target=warm_up, name="emotia-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    global model_warm
+    if load_model():
+        try:
+            classify_batch(["Warming up the emotion model.", "This is great!"], batch_size=2)
+        except Exception as e:
+            logger.warning(f"Model warm-up failed: {e}")
+    model_warm = True
+    logger.info(f"Analyzer ready (model state: {model_state})")
+
+def is_ready(warmup: bool = True):
+    """
+    True once requests can be served without waiting for the model: after
+    the warm-up, or once a lazy load finished. With warmup=False
+    (EMOTIA_WARMUP=0) the first request loads the model, so an unloaded
+    model counts as ready too; otherwise nothing would ever send that request.
+    """
+    if not warmup and model_state == "unloaded":
+        return True
+    return model_warm or model_state in ("ready", "disabled", "unavailable")
+
+def model_status():
+    return {
+        "model_id": EMOTION_MODEL_ID,
+        "backend": INFERENCE_BACKEND,
+        "state": model_state,
+        "warm": model_warm,
+        "fallback_only": FALLBACK_ONLY
+    }
+
+def active_model_id():
+    """Identifies what produces results: the transformer or the fallbacks."""
+    if model_state in ("disabled", "unavailable"):
+        return "fallback"
+    # Quantized scores differ slightly, so they get their own cache entries
+    return f"{EMOTION_MODEL_ID}:onnx-int8" if INFERENCE_BACKEND == "onnx" else EMOTION_MODEL_ID
+
+def result_model_id(cascade=None, threshold=None):
+    """Model ID that results are cached under, including the cascade settings."""
+    cascade = CASCADE_MODE if cascade is None else cascade
+    threshold = CASCADE_THRESHOLD if threshold is None else threshold
+    model_id = active_model_id()
+    return f"{model_id}+cascade@{threshold}" if cascade else model_id
+
+def result_signature():
+    """Identifies which analyzer produced a set of results (model + version)."""
+    return f"{result_model_id()}@{ANALYZER_VERSION}"
+
+def results_signature(results):
+    """
+    Signature to store finished `results` under. Taken after the analysis,
+    so a model that failed to load on the way yields the fallback
+    signature. None when some result only stands in for failed inference,
+    which must not be pinned under a model's signature.
+    """
+    if active_model_id() != "fallback":
+        for result in results:
+            if result.get("method") != "ai_transformer" and result.get("tier") in (None, "fallback"):
+                return None
+    return result_signature()
+
+# Result cache in front of analyze_emotion. Disable with EMOTIA_CACHE=0,
+# or set EMOTIA_CACHE_PATH to an empty string for a memory-only cache.
+result_cache = None
+if os.environ.get("EMOTIA_CACHE", "1") != "0":
+    result_cache = EmotionCache(
+        result_model_id,
+        ANALYZER_VERSION,
+        path=default_cache_path() or None,
+        max_entries=int(os.environ.get("EMOTIA_CACHE_SIZE", "10000")),
+        max_disk_entries=int(os.environ.get("EMOTIA_CACHE_DISK_SIZE", "100000"))
+    )
+
+# Translation stage: local language detection, English fast path, batched
+# and memoized translation. Backend selected with EMOTIA_TRANSLATOR.
+translation_stage = default_translation_stage()
 
 # Keyword Dictionaries (Fallback)
 KEYWORDS = {
@@ -52,90 +192,66 @@ def get_keyword_emotion(text: str):
     Checks for the presence of emotion keywords.
     Returns the emotion with the highest match count, or None.
     """
-    text_lower = text.lower()
-    scores = {emotion: 0 for emotion in KEYWORDS}
-    
-    for emotion, words in KEYWORDS.items():
-        for word in words:
-            if re.search(r'\b' + re.escape(word) + r'\b', text_lower):
-                scores[emotion] += 1
-                
-    best_emotion = max(scores, key=scores.get)
-    
-    if scores[best_emotion] > 0:
-        return best_emotion, 0.8 + (0.1 * min(scores[best_emotion], 2))
-    return None, 0
+    return keyword_matcher.best(text)
 
-def analyze_emotion(text: str):
-    """
-    Analyzes the sentiment of the text and maps it to a primary emotion.
-    Automatically translates non-English text to English for analysis.
-    Returns a dictionary with emotion label and intensity score.
-    """
-    original_text = text
-    processing_text = text
-    is_translated = False
+def get_keyword_emotions(texts):
+    """Batch form of get_keyword_emotion."""
+    return keyword_matcher.best_many(texts)
+
+# Map the model's labels to our palette
+LABEL_MAP = {
+    "joy": "joy",
+    "sadness": "sadness",
+    "anger": "anger",
+    "fear": "fear",
+    "disgust": "anger",
+    "surprise": "energy",
+    "neutral": "neutral"
+}
 
-    # 1. Auto-Translation
+# Keyword index compiled once from KEYWORDS. EMOTIA_LEXICON points at an
+# extra user lexicon (.json, .csv or NRC-style .tsv, see lexicon.py); its
+# emotions are mapped onto the palette like the model's labels.
+keyword_matcher = KeywordMatcher(KEYWORDS)
+if os.environ.get("EMOTIA_LEXICON"):
     try:
-        if len(text.strip()) > 2:
-            # GoogleTranslator with source='auto' handles detection better than langdetect
-            translator = GoogleTranslator(source='auto', target='en')
-            translated = translator.translate(text)
-            
-            if translated and translated.lower() != text.lower():
-                processing_text = translated
-                is_translated = True
-                logger.info(f"Translated: '{text}' -> '{processing_text}'")
-    except Exception as e:
-        logger.warning(f"Translation failed: {e}")
+        keyword_matcher.add(load_lexicon(os.environ["EMOTIA_LEXICON"], {**LABEL_MAP, "energy": "energy"}))
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to load lexicon: {e}. Using the built-in keywords only.")
 
-    # 2. Try AI Model if available
-    if emotion_classifier:
-        try:
-            # Model returns a list of lists of dicts
-            results = emotion_classifier(processing_text)[0]
-            # Sort by score descending
-            results.sort(key=lambda x: x['score'], reverse=True)
-            top_result = results[0]
-            
-            ai_emotion = top_result['label']
-            ai_score = top_result['score']
-            
-            # Map model labels to our palette
-            mapped_emotion = "neutral"
-            if ai_emotion == "joy": mapped_emotion = "joy"
-            elif ai_emotion == "sadness": mapped_emotion = "sadness"
-            elif ai_emotion == "anger": mapped_emotion = "anger"
-            elif ai_emotion == "fear": mapped_emotion = "fear"
-            elif ai_emotion == "disgust": mapped_emotion = "anger"
-            elif ai_emotion == "surprise": mapped_emotion = "energy"
-            elif ai_emotion == "neutral": mapped_emotion = "neutral"
-            
-            return {
-                "text": original_text,
-                "emotion": mapped_emotion,
-                "score": ai_score,
-                "method": "ai_transformer",
-                "is_translated": is_translated,
-                "translated_text": processing_text if is_translated else None
-            }
-        except Exception as e:
-            logger.error(f"AI Inference failed: {e}")
-            # Fall through to fallback
+# Number of snippets sent through the transformer in one padded forward pass
+DEFAULT_BATCH_SIZE = 16
+
+def _ai_result(original_text: str, processing_text: str, is_translated: bool, scores):
+    """
+    Builds the result dict from the model's per-label scores for one snippet.
+    """
+    top_result = max(scores, key=lambda x: x['score'])
+    
+    return {
+        "text": original_text,
+        "emotion": LABEL_MAP.get(top_result['label'], "neutral"),
+        "score": top_result['score'],
+        "method": "ai_transformer",
+        "is_translated": is_translated,
+        "translated_text": processing_text if is_translated else None
+    }
 
-    # 3. Fallback: Keyword Matching (on translated text)
+def _keyword_result(original_text: str, processing_text: str, detected_lang=None):
+    """Keyword tier. Returns a result dict, or None when no keyword matches."""
     keyword_emotion, keyword_score = get_keyword_emotion(processing_text)
-    if keyword_emotion:
-        return {
-            "text": original_text,
-            "emotion": keyword_emotion,
-            "score": keyword_score,
-            "method": "keyword_fallback",
-            "language": detected_lang
-        }
+    if not keyword_emotion:
+        return None
+    return {
+        "text": original_text,
+        "emotion": keyword_emotion,
+        "score": keyword_score,
+        "method": "keyword_fallback",
+        "language": detected_lang
+    }
 
-    # 4. Fallback: TextBlob Sentiment (on translated text)
+def _sentiment_result(original_text: str, processing_text: str, detected_lang=None):
+    """TextBlob tier. Always returns a result dict."""
     blob = TextBlob(processing_text)
     polarity = blob.sentiment.polarity
     subjectivity = blob.sentiment.subjectivity
@@ -168,3 +284,281 @@ def analyze_emotion(text: str):
         "method": "sentiment_fallback",
         "language": detected_lang
     }
+
+def _fallback_result(original_text: str, processing_text: str, detected_lang=None):
+    """
+    Keyword matching first, then TextBlob sentiment (both on translated text).
+    """
+    return (_keyword_result(original_text, processing_text, detected_lang)
+            or _sentiment_result(original_text, processing_text, detected_lang))
+
+# --- Cascade Mode ---
+# Runs the cheap keyword and TextBlob tiers first and only escalates to the
+# transformer when they are unsure (score below the threshold) or disagree.
+# Enable with EMOTIA_CASCADE=1, tune with EMOTIA_CASCADE_THRESHOLD.
+CASCADE_MODE = os.environ.get("EMOTIA_CASCADE", "0") == "1"
+CASCADE_THRESHOLD = float(os.environ.get("EMOTIA_CASCADE_THRESHOLD", "0.6"))
+
+_cascade_lock = threading.Lock()
+_cascade_tiers = {"keyword": 0, "sentiment": 0, "transformer": 0, "fallback": 0}
+_cascade_escalations = {"no_signal": 0, "low_confidence": 0, "disagreement": 0}
+
+def _cascade_cheap(original_text: str, processing_text: str, detected_lang, threshold: float):
+    """
+    Tries the cheap tiers. Returns (result, None) when they are confident,
+    or (None, reason) when the snippet must escalate to the transformer.
+    """
+    keyword = _keyword_result(original_text, processing_text, detected_lang)
+    sentiment = _sentiment_result(original_text, processing_text, detected_lang)
+
+    if keyword:
+        if keyword["score"] < threshold:
+            return None, "low_confidence"
+        if sentiment["emotion"] not in ("neutral", keyword["emotion"]):
+            return None, "disagreement"
+        keyword["tier"] = "keyword"
+        return keyword, None
+
+    if sentiment["emotion"] == "neutral":
+        return None, "no_signal"
+    if sentiment["score"] < threshold:
+        return None, "low_confidence"
+    sentiment["tier"] = "sentiment"
+    return sentiment, None
+
+def _record_cascade(results, escalations):
+    with _cascade_lock:
+        for result in results:
+            _cascade_tiers[result["tier"]] += 1
+        for reason in escalations:
+            _cascade_escalations[reason] += 1
+
+def cascade_report():
+    """Per-tier hit rates of cascade mode, for tuning the threshold."""
+    with _cascade_lock:
+        total = sum(_cascade_tiers.values())
+        escalated = sum(_cascade_escalations.values())
+        return {
+            "enabled": CASCADE_MODE,
+            "threshold": CASCADE_THRESHOLD,
+            "snippets": total,
+            "tiers": {
+                tier: {"count": count, "rate": count / total if total else 0}
+                for tier, count in _cascade_tiers.items()
+            },
+            "escalated": escalated,
+            "escalation_rate": escalated / total if total else 0,
+            "escalation_reasons": dict(_cascade_escalations)
+        }
+
+def reset_cascade_report():
+    with _cascade_lock:
+        for counters in (_cascade_tiers, _cascade_escalations):
+            for key in counters:
+                counters[key] = 0
+
+# --- Near-Duplicate Collapsing ---
+# Repeated bylines, cookie notices and list items are analyzed once per
+# group (see dedup.py). EMOTIA_DEDUP=0 disables it; EMOTIA_DEDUP_DISTANCE is
+# the SimHash distance in bits (0 = only identical normalized text).
+DEDUP_MODE = os.environ.get("EMOTIA_DEDUP", "1") == "1"
+DEDUP_DISTANCE = int(os.environ.get("EMOTIA_DEDUP_DISTANCE", "3"))
+
+_dedup_lock = threading.Lock()
+_dedup_counts = {"snippets": 0, "analyzed": 0}
+
+def _record_dedup(snippets: int, analyzed: int):
+    with _dedup_lock:
+        _dedup_counts["snippets"] += snippets
+        _dedup_counts["analyzed"] += analyzed
+
+def dedup_report():
+    """How much inference near-duplicate collapsing saved."""
+    with _dedup_lock:
+        snippets = _dedup_counts["snippets"]
+        collapsed = snippets - _dedup_counts["analyzed"]
+        return {
+            "enabled": DEDUP_MODE,
+            "max_distance": DEDUP_DISTANCE,
+            "snippets": snippets,
+            "analyzed": _dedup_counts["analyzed"],
+            "collapsed": collapsed,
+            "collapse_rate": collapsed / snippets if snippets else 0
+        }
+
+def reset_dedup_report():
+    with _dedup_lock:
+        for key in _dedup_counts:
+            _dedup_counts[key] = 0
+
+@metrics.registry.register_collector
+def _collect_metrics():
+    """Exports the counters the stages already keep to /metrics."""
+    translation = translation_stage.stats()
+    yield ("emotia_translation_snippets_total", "counter", "Snippets seen by the translation stage, by outcome.", [
+        ({"outcome": outcome}, translation[outcome]) for outcome in ("skipped", "memo_hits", "translated", "failures")
+    ])
+    yield ("emotia_translation_batches_total", "counter", "Batches sent to the translator.", [({}, translation["batches"])])
+    if result_cache is not None:
+        cache = result_cache.stats()
+        yield ("emotia_result_cache_lookups_total", "counter", "Result cache lookups, by outcome.", [
+            ({"outcome": outcome}, cache[outcome]) for outcome in ("memory_hits", "disk_hits", "misses")
+        ])
+    with _dedup_lock:
+        yield ("emotia_dedup_snippets_total", "counter", "Snippets before and after near-duplicate collapsing.", [
+            ({"kind": kind}, count) for kind, count in _dedup_counts.items()
+        ])
+    with _cascade_lock:
+        yield ("emotia_cascade_tier_total", "counter", "Cascade decisions by tier.", [
+            ({"tier": tier}, count) for tier, count in _cascade_tiers.items()
+        ])
+    yield ("emotia_model_ready", "gauge", "1 when the transformer is loaded.", [({}, int(model_state == "ready"))])
+    if inference_scheduler is not None:
+        yield ("emotia_scheduler_queue_depth", "gauge", "Snippets waiting for the inference scheduler.", [
+            ({}, inference_scheduler.stats()["queue_depth"])
+        ])
+
+def classify_batch(texts, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Runs the transformer directly over a list of snippets.
+    Returns one list of label/score dicts per snippet.
+    """
+    texts = list(texts)
+    for start in range(0, len(texts), batch_size):
+        metrics.BATCH_SIZE.observe(min(batch_size, len(texts) - start))
+    return load_model()(texts, batch_size=batch_size, truncation=True)
+
+def _run_classifier(texts, batch_size: int):
+    """Routes inference through the scheduler when one is running."""
+    if inference_scheduler is not None and inference_scheduler.running:
+        return inference_scheduler.classify(texts)
+    return classify_batch(texts, batch_size)
+
+def analyze_emotions(texts, batch_size: int = DEFAULT_BATCH_SIZE, cascade=None, threshold=None, dedup=None):
+    """
+    Batch version of analyze_emotion.
+    Translates every snippet, then runs the transformer over them in padded
+    batches of `batch_size` instead of one forward pass per snippet.
+    Cached snippets skip translation and inference entirely.
+    In cascade mode (default: EMOTIA_CASCADE) only snippets the cheap tiers
+    are unsure about reach the transformer, and each result gets a "tier".
+    With dedup (default: EMOTIA_DEDUP) near-duplicate snippets in the call
+    are analyzed once and every result gets a "group_size".
+    Returns a list of result dicts in the same order as `texts`.
+    """
+    texts = list(texts)
+    cascade = CASCADE_MODE if cascade is None else cascade
+    threshold = CASCADE_THRESHOLD if threshold is None else threshold
+    dedup = DEDUP_MODE if dedup is None else dedup
+    metrics.count_snippets(len(texts))
+
+    if not dedup:
+        results = _analyze_unique(texts, batch_size, cascade, threshold)
+        metrics.count_results(results)
+        return results
+
+    with metrics.stage("dedup"):
+        representatives = group_near_duplicates(texts, DEDUP_DISTANCE)
+    unique = [i for i, representative in enumerate(representatives) if representative == i]
+    analyzed = dict(zip(unique, _analyze_unique([texts[i] for i in unique], batch_size, cascade, threshold)))
+    _record_dedup(len(texts), len(unique))
+
+    group_sizes = Counter(representatives)
+    results = []
+    for i, representative in enumerate(representatives):
+        # Members share the representative's analysis but keep their own text
+        result = dict(analyzed[representative], text=texts[i])
+        result["group_size"] = group_sizes[representative]
+        results.append(result)
+    metrics.count_results(results)
+    return results
+
+def _analyze_unique(texts, batch_size: int, cascade: bool, threshold: float):
+    """The analysis pipeline itself (cache, translation, cascade, model, fallback)."""
+    results = [None] * len(texts)
+    model_id = result_model_id(cascade, threshold)
+
+    # 0. Result cache
+    if result_cache is not None:
+        with metrics.stage("cache"):
+            for i, text in enumerate(texts):
+                cached = result_cache.get(text, model_id)
+                if cached is not None:
+                    cached["text"] = text
+                    results[i] = cached
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+
+    with metrics.stage("translate"):
+        translations = translation_stage.translate([texts[i] for i in pending])
+    prepared = dict(zip(pending, translations))
+
+    # 1. Cascade: let the cheap tiers decide what they are confident about
+    to_model = pending
+    escalations = []
+    if cascade:
+        to_model = []
+        with metrics.stage("cascade"):
+            for i in pending:
+                processing_text, _, detected_lang = prepared[i]
+                decided, reason = _cascade_cheap(texts[i], processing_text, detected_lang, threshold)
+                if decided:
+                    results[i] = decided
+                else:
+                    to_model.append(i)
+                    escalations.append(reason)
+
+    # 2. Try AI Model if available
+    if to_model and load_model():
+        try:
+            # Model returns one list of label/score dicts per input
+            with metrics.stage("inference"):
+                outputs = _run_classifier([prepared[i][0] for i in to_model], batch_size)
+            for i, scores in zip(to_model, outputs):
+                processing_text, is_translated, _ = prepared[i]
+                results[i] = _ai_result(texts[i], processing_text, is_translated, scores)
+                if cascade:
+                    results[i]["tier"] = "transformer"
+        except Exception as e:
+            logger.error(f"AI Inference failed: {e}")
+            for i in to_model:
+                results[i] = None
+            # Fall through to fallback
+
+    # 3. Fallback for anything the model did not answer
+    inference_failed = False
+    with metrics.stage("fallback"):
+        for i in to_model:
+            if results[i] is None:
+                inference_failed = emotion_classifier is not None
+                processing_text, _, detected_lang = prepared[i]
+                results[i] = _fallback_result(texts[i], processing_text, detected_lang)
+                if cascade:
+                    results[i]["tier"] = "fallback"
+
+    if cascade:
+        _record_cascade([results[i] for i in pending], escalations)
+
+    # Don't pin answers that only exist because inference or translation errored.
+    # The key is taken again: the model may have failed to load meanwhile,
+    # and fallback answers must not be cached under the transformer's ID.
+    model_id = result_model_id(cascade, threshold)
+    if result_cache is not None and not inference_failed:
+        entries = []
+        for i in pending:
+            _, is_translated, detected_lang = prepared[i]
+            if detected_lang in (None, translation_stage.target) or is_translated:
+                entries.append((texts[i], results[i]))
+        result_cache.put_many(entries, model_id)
+
+    return results
+
+def analyze_emotion(text: str):
+    """
+    Analyzes the sentiment of the text and maps it to a primary emotion.
+    Automatically translates non-English text to English for analysis.
+    Returns a dictionary with emotion label and intensity score.
+    """
+    return analyze_emotions([text], batch_size=1)[0]
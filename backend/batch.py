@@ -0,0 +1,448 @@
+"""
+Offline bulk analysis for nightly jobs, without the API.
+
+    python batch.py ./reports notes.jsonl --urls urls.txt -o results.jsonl
+    python batch.py ./reports --format parquet -o results/ --workers 4
+
+Inputs are directories (PDF, .txt and .md files, recursively), single files,
+JSONL files with one {"text" | "url" | "path", "id"?} record per line, and URL
+lists (--urls, one URL per line). Documents are analyzed in a process pool
+with one model per worker, and results are written as they arrive, one row
+per snippet. A checkpoint next to the output records finished documents, so
+running the same command again resumes a killed job (--restart starts over).
+An output without a checkpoint is never replaced unless --overwrite is given.
+Failed documents are reported and retried on the next run.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+PDF_EXTENSIONS = {".pdf"}
+TEXT_EXTENSIONS = {".txt", ".md"}
+
+# Snippets handed to analyze_emotions at a time
+ANALYSIS_BATCH = 64
+
+# Parquet needs a fixed schema: one column per result field
+PARQUET_FIELDS = (
+    "doc_id", "source", "index", "text", "emotion", "score", "method", "tier",
+    "group_size", "is_translated", "translated_text", "language", "polarity", "subjectivity"
+)
+
+# --- Inputs ---
+
+def _file_document(path: str, doc_id: str = None):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PDF_EXTENSIONS:
+        kind = "pdf"
+    elif extension in TEXT_EXTENSIONS:
+        kind = "text"
+    else:
+        return None
+    return {"id": doc_id or path, "kind": kind, "source": path}
+
+def _jsonl_documents(path: str):
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            location = f"{path}:{number}"
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping {location}: {e}")
+                continue
+            doc_id = str(record.get("id", location))
+            if "text" in record:
+                yield {"id": doc_id, "kind": "record", "source": location, "text": str(record["text"])}
+            elif "url" in record:
+                yield {"id": doc_id, "kind": "url", "source": record["url"]}
+            elif "path" in record and _file_document(record["path"]):
+                yield _file_document(record["path"], doc_id)
+            else:
+                logger.warning(f"Skipping {location}: needs a text, url or path (.pdf, .txt, .md) field")
+
+def iter_documents(inputs, url_lists=()):
+    """
+    Lazily lists the documents to analyze as {"id", "kind", "source"} dicts,
+    where kind is "pdf", "text" (file), "record" (inline text) or "url".
+    """
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    document = _file_document(os.path.join(root, name))
+                    if document:
+                        yield document
+        elif path.endswith(".jsonl"):
+            yield from _jsonl_documents(path)
+        else:
+            document = _file_document(path)
+            if document:
+                yield document
+            else:
+                logger.warning(f"Skipping {path}: unsupported file type")
+
+    for path in url_lists:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                url = line.strip()
+                if url and not url.startswith("#"):
+                    yield {"id": url, "kind": "url", "source": url}
+
+# --- Workers ---
+
+def _init_worker(threads: int):
+    """
+    Loads one model per worker process, limited to `threads` CPU threads.
+    Workers keep their result cache in memory and skip the page cache: the
+    SQLite files are shared by path, and concurrent writers from several
+    processes fail with "database is locked".
+    """
+    os.environ["EMOTIA_CACHE_PATH"] = ""
+    os.environ["EMOTIA_PAGE_CACHE"] = "0"
+    if threads:
+        # Must happen before torch / onnxruntime are imported in this process
+        for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ[name] = str(threads)
+        os.environ.setdefault("EMOTIA_ONNX_THREADS", str(threads))
+    logging.basicConfig(level=logging.WARNING)
+
+    import analyzer
+    analyzer.load_model()
+    if threads:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+
+def _analyze_batches(snippets, analyze, batch_size: int):
+    items = []
+    batch = []
+    for snippet in snippets:
+        batch.append(snippet)
+        if len(batch) >= batch_size:
+            items.extend(analyze(batch))
+            batch = []
+    if batch:
+        items.extend(analyze(batch))
+    return items
+
+def analyze_document(document, batch_size: int = ANALYSIS_BATCH):
+    """
+    Analyzes one document with the same ingestion rules as the API.
+    Never raises: returns a dict with the items, or an error message.
+    """
+    from analyzer import analyze_emotions
+    from segmenter import TARGET_TOKENS, iter_snippets
+
+    start = time.perf_counter()
+    result = {"id": document["id"], "source": document["source"], "items": [], "error": None}
+    try:
+        kind = document["kind"]
+        if kind == "pdf":
+            from pdf_ingest import open_pdf, analyze_pdf
+            with open(document["source"], "rb") as f:
+                result["items"] = analyze_pdf(open_pdf(f), analyze_emotions, batch_size)
+        elif kind == "url":
+            from scraper import scrape_page
+            result["items"] = _analyze_batches(scrape_page(document["source"])["snippets"], analyze_emotions, batch_size)
+        elif kind == "text":
+            with open(document["source"], encoding="utf-8", errors="replace") as f:
+                result["items"] = _analyze_batches(iter_snippets(f, min_length=2, target_tokens=TARGET_TOKENS), analyze_emotions, batch_size)
+        else:
+            result["items"] = _analyze_batches(iter_snippets(document["text"], min_length=2, target_tokens=TARGET_TOKENS), analyze_emotions, batch_size)
+    except Exception as e:
+        result["error"] = str(e) or e.__class__.__name__
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+def _imap_unordered(executor, fn, iterable, max_pending: int):
+    """Like executor.map, but yields in completion order and keeps at most `max_pending` tasks queued."""
+    pending = set()
+    for item in iterable:
+        pending.add(executor.submit(fn, item))
+        if len(pending) >= max_pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+# --- Outputs ---
+
+class Checkpoint:
+    """
+    Append-only JSONL log of finished documents. Each line lists document IDs
+    plus the writer state after they were written (JSONL offset or Parquet part).
+    """
+
+    def __init__(self, path: str, restart: bool = False):
+        self.path = path
+        self.done = set()
+        self.entries = []
+        if restart and os.path.exists(path):
+            os.remove(path)
+
+        if os.path.exists(path):
+            with open(path, "rb+") as f:
+                data = f.read()
+                # A line cut short by a kill is dropped
+                complete = data[:data.rfind(b"\n") + 1]
+                if len(complete) != len(data):
+                    f.truncate(len(complete))
+            for line in complete.decode("utf-8").splitlines():
+                entry = json.loads(line)
+                self.entries.append(entry)
+                self.done.update(entry["docs"])
+        self.file = open(path, "a", encoding="utf-8")
+
+    @property
+    def last(self):
+        return self.entries[-1] if self.entries else {}
+
+    def record(self, docs, **state):
+        entry = {"docs": list(docs), **state}
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+        self.entries.append(entry)
+        self.done.update(entry["docs"])
+
+    def close(self):
+        self.file.close()
+
+def _rows(result):
+    for index, item in enumerate(result["items"]):
+        yield {"doc_id": result["id"], "source": result["source"], "index": index, **item}
+
+class JsonlWriter:
+    """
+    One JSON line per snippet, appended to a single file.
+    Without a checkpoint an existing, non-empty file is only replaced with
+    overwrite=True; FileExistsError otherwise.
+    """
+
+    def __init__(self, path: str, checkpoint: Checkpoint, overwrite: bool = False):
+        self.checkpoint = checkpoint
+        if not checkpoint.entries and not overwrite and os.path.exists(path) and os.path.getsize(path):
+            raise FileExistsError(f"{path} already exists and has no checkpoint (pass --overwrite to replace it)")
+        # Drop rows written after the last checkpoint (or everything, on a fresh start)
+        self.file = open(path, "ab")
+        self.file.truncate(checkpoint.last.get("offset", 0))
+        self.file.seek(0, os.SEEK_END)
+
+    def write(self, result):
+        for row in _rows(result):
+            self.file.write(json.dumps(row, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.file.flush()
+        self.checkpoint.record([result["id"]], offset=self.file.tell())
+
+    def close(self):
+        self.file.close()
+
+class ParquetWriter:
+    """
+    Parquet part files in an output directory, one per `rows_per_part` rows.
+    Parts are written to a temporary name and renamed once complete, then
+    checkpointed; documents of an unfinished part are analyzed again on resume.
+    Like JsonlWriter, refuses to replace existing parts without a checkpoint
+    unless overwrite=True. Requires the `pyarrow` package.
+    """
+
+    def __init__(self, directory: str, checkpoint: Checkpoint, rows_per_part: int = 50000, overwrite: bool = False):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("Parquet output requires the pyarrow package (pip install pyarrow).")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.directory = directory
+        self.checkpoint = checkpoint
+        self.rows_per_part = max(1, int(rows_per_part))
+        self.parts = sum(1 for entry in checkpoint.entries if "part" in entry)
+        self.rows = []
+        self.docs = []
+
+        # Remove parts that were never checkpointed
+        kept = {entry["part"] for entry in checkpoint.entries if "part" in entry}
+        stale = [name for name in os.listdir(directory) if name.startswith("part-") and name not in kept]
+        if stale and not checkpoint.entries and not overwrite:
+            raise FileExistsError(f"{directory} already has part files and no checkpoint (pass --overwrite to replace them)")
+        for name in stale:
+            os.remove(os.path.join(directory, name))
+
+    def write(self, result):
+        self.rows.extend({field: row.get(field) for field in PARQUET_FIELDS} for row in _rows(result))
+        self.docs.append(result["id"])
+        if len(self.rows) >= self.rows_per_part:
+            self.flush()
+
+    def flush(self):
+        if not self.docs:
+            return
+        name = f"part-{self.parts:05d}.parquet"
+        path = os.path.join(self.directory, name)
+        table = self.pa.Table.from_pylist(self.rows, schema=self._schema())
+        self.pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self.checkpoint.record(self.docs, part=name)
+        self.parts += 1
+        self.rows = []
+        self.docs = []
+
+    def _schema(self):
+        pa = self.pa
+        types = {"index": pa.int64(), "score": pa.float64(), "group_size": pa.int64(),
+                 "is_translated": pa.bool_(), "polarity": pa.float64(), "subjectivity": pa.float64()}
+        return pa.schema([(field, types.get(field, pa.string())) for field in PARQUET_FIELDS])
+
+    def close(self):
+        self.flush()
+
+# --- Runner ---
+
+class Progress:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.documents = 0
+        self.snippets = 0
+        self.failed = []
+
+    def add(self, result):
+        if result["error"]:
+            self.failed.append({"id": result["id"], "error": result["error"]})
+        else:
+            self.documents += 1
+            self.snippets += len(result["items"])
+
+    def report(self):
+        seconds = time.perf_counter() - self.start
+        return {
+            "documents": self.documents,
+            "failed": len(self.failed),
+            "snippets": self.snippets,
+            "seconds": round(seconds, 3),
+            "docs_per_sec": round(self.documents / seconds, 3) if seconds else 0,
+            "snippets_per_sec": round(self.snippets / seconds, 3) if seconds else 0
+        }
+
+def run(documents, writer, checkpoint: Checkpoint, workers: int = 1, threads: int = 0, progress_every: float = 10):
+    """
+    Analyzes every document not yet in the checkpoint and hands results to `writer`.
+    workers=0 runs in this process. Returns the Progress.
+    """
+    progress = Progress()
+    skipped = 0
+    queued = set()
+
+    def todo():
+        nonlocal skipped
+        for document in documents:
+            if document["id"] in checkpoint.done:
+                skipped += 1
+            elif document["id"] not in queued:
+                queued.add(document["id"])
+                yield document
+
+    executor = None
+    if workers:
+        executor = ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads,)
+        )
+        results = _imap_unordered(executor, analyze_document, todo(), workers * 2)
+    else:
+        results = map(analyze_document, todo())
+
+    last_report = time.perf_counter()
+    try:
+        for result in results:
+            progress.add(result)
+            if result["error"]:
+                logger.warning(f"{result['id']}: {result['error']}")
+            else:
+                writer.write(result)
+            if progress_every and time.perf_counter() - last_report >= progress_every:
+                last_report = time.perf_counter()
+                report = progress.report()
+                logger.info(
+                    f"{report['documents']} docs, {report['snippets']} snippets "
+                    f"({report['docs_per_sec']} docs/s, {report['snippets_per_sec']} snippets/s)"
+                )
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        writer.close()
+        checkpoint.close()
+
+    progress.skipped = skipped
+    return progress
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze PDFs, text files, JSONL records and URLs offline.")
+    parser.add_argument("inputs", nargs="*", help="Directories, .pdf/.txt/.md files or .jsonl files")
+    parser.add_argument("--urls", action="append", default=[], help="File with one URL per line (repeatable)")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file, or a directory for Parquet")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), default="jsonl")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Worker processes, each with its own model (0 = in this process)")
+    parser.add_argument("--threads-per-worker", type=int, default=0,
+                        help="CPU threads per worker (default: cores / workers)")
+    parser.add_argument("--rows-per-part", type=int, default=50000, help="Rows per Parquet part file")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="Replace an existing output that has no checkpoint (implied by --restart)")
+    parser.add_argument("--progress-every", type=float, default=10, help="Seconds between progress lines")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    if not args.inputs and not args.urls:
+        parser.error("nothing to analyze: pass input paths and/or --urls")
+
+    threads = args.threads_per_worker
+    if args.workers and not threads:
+        threads = max(1, (os.cpu_count() or 1) // args.workers)
+
+    overwrite = args.overwrite or args.restart
+    if args.format == "parquet":
+        os.makedirs(args.output, exist_ok=True)
+        checkpoint = Checkpoint(os.path.join(args.output, "_checkpoint.jsonl"), args.restart)
+    else:
+        checkpoint = Checkpoint(args.output + ".checkpoint", args.restart)
+    try:
+        if args.format == "parquet":
+            writer = ParquetWriter(args.output, checkpoint, args.rows_per_part, overwrite)
+        else:
+            writer = JsonlWriter(args.output, checkpoint, overwrite)
+    except FileExistsError as e:
+        checkpoint.close()
+        parser.error(str(e))
+
+    progress = run(iter_documents(args.inputs, args.urls), writer, checkpoint,
+                   args.workers, threads, args.progress_every)
+
+    report = progress.report()
+    report["skipped"] = progress.skipped
+    report["workers"] = args.workers
+    report["output"] = args.output
+    report["errors"] = progress.failed[:20]
+    print(json.dumps(report, indent=2))
+    if progress.failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
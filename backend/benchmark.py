@@ -0,0 +1,318 @@
+"""
+Benchmark harness for every pipeline stage, fully offline.
+
+    python benchmark.py -o bench.json
+    python benchmark.py --stages extraction,segmentation --repeat 20
+    python benchmark.py -o new.json --compare bench.json --tolerance 0.25
+
+Stages run on the saved fixtures in fixtures/ (HTML pages, a PDF and a
+text file): HTML extraction per backend, segmentation, PDF ingestion,
+translation through the stub translator, keyword and TextBlob fallbacks,
+near-duplicate grouping, transformer inference at several batch sizes, and
+end-to-end requests through the ASGI app in-process (scraping hits a local
+server that serves the fixtures). Each case reports min/median/mean seconds
+over --repeat runs after one warm-up run, plus items/sec (items are
+pages, documents, characters or snippets depending on the stage). Cases
+that cannot run are reported as skipped, cases that fail as errors; either
+way the remaining stages still run.
+
+The result and page caches and the analysis history are off and
+translation uses the stub unless the environment says otherwise, so
+repeated runs measure real work.
+With --compare, cases whose median got slower than the tolerance are
+listed and the exit code is 1.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# Must be set before analyzer / main are imported
+os.environ.setdefault("EMOTIA_CACHE", "0")
+os.environ.setdefault("EMOTIA_PAGE_CACHE", "0")
+os.environ.setdefault("EMOTIA_HISTORY", "0")
+os.environ.setdefault("EMOTIA_TRANSLATOR", "stub")
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(BACKEND_DIR, "fixtures")
+
+STAGES = ("extraction", "segmentation", "pdf", "translation", "keyword", "textblob", "dedup", "transformer", "e2e")
+BATCH_SIZES = (1, 8, 16, 32)
+
+# --- Fixtures ---
+
+def _read(path, mode="rb"):
+    with open(path, mode) as f:
+        return f.read()
+
+def load_fixtures():
+    html = {
+        os.path.splitext(os.path.basename(path))[0]: _read(path)
+        for path in sorted(glob.glob(os.path.join(FIXTURES, "html", "*.html")))
+    }
+    text = {
+        os.path.splitext(os.path.basename(path))[0]: _read(path, "r")
+        for path in sorted(glob.glob(os.path.join(FIXTURES, "text", "*.txt")))
+    }
+    pdf = {
+        os.path.splitext(os.path.basename(path))[0]: _read(path)
+        for path in sorted(glob.glob(os.path.join(FIXTURES, "pdf", "*.pdf")))
+    }
+    return {"html": html, "text": text, "pdf": pdf}
+
+def snippet_corpus(fixtures):
+    """Every snippet the ingestion paths produce from the fixtures."""
+    from extractor import extract_snippets
+    from segmenter import split_snippets
+    snippets = []
+    for page in fixtures["html"].values():
+        snippets.extend(extract_snippets(page, limit=None))
+    for text in fixtures["text"].values():
+        snippets.extend(split_snippets(text, min_length=2))
+    return snippets
+
+# --- Timing ---
+
+def measure(fn, items: int, repeat: int):
+    """Runs fn once to warm up, then `repeat` times. Returns the timing summary."""
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    median = statistics.median(times)
+    return {
+        "items": items,
+        "repeat": repeat,
+        "min": round(min(times), 6),
+        "median": round(median, 6),
+        "mean": round(statistics.mean(times), 6),
+        "items_per_sec": round(items / median, 3) if median else None
+    }
+
+# --- Stages ---
+# Each stage yields (case, fn, items) tuples, or (case, None, reason) to skip.
+# A case (or stage) that raises is recorded as an error; the others still run.
+
+def stage_extraction(fixtures, corpus):
+    from extractor import BACKENDS, extract_snippets
+    pages = list(fixtures["html"].values())
+    for backend in BACKENDS:
+        try:
+            extract_snippets(b"<p>probe</p>", backend=backend)
+        except ImportError as e:
+            yield backend, None, f"unavailable: {e}"
+            continue
+        yield backend, lambda backend=backend: [extract_snippets(page, backend=backend, limit=None) for page in pages], len(pages)
+
+def stage_segmentation(fixtures, corpus):
+    from segmenter import split_snippets
+    texts = list(fixtures["text"].values())
+    yield "text", lambda: [split_snippets(text, min_length=2) for text in texts], sum(len(text) for text in texts)
+    yield "target_tokens", lambda: [split_snippets(text, min_length=2, target_tokens=64) for text in texts], sum(len(text) for text in texts)
+
+def stage_pdf(fixtures, corpus):
+    import io
+    from pdf_ingest import open_pdf, iter_pdf_snippets
+    for name, data in fixtures["pdf"].items():
+        pages = len(open_pdf(io.BytesIO(data)).pages)
+        yield name, lambda data=data: list(iter_pdf_snippets(open_pdf(io.BytesIO(data)), 0, 0)), pages
+
+def stage_translation(fixtures, corpus):
+    from translation import StubTranslator, TranslationStage
+    # A fresh stage per run, so the memo never answers
+    yield "stub", lambda: TranslationStage(StubTranslator()).translate(corpus), len(corpus)
+
+def stage_keyword(fixtures, corpus):
+    from analyzer import get_keyword_emotions
+    yield "lexicon", lambda: get_keyword_emotions(corpus), len(corpus)
+
+def stage_textblob(fixtures, corpus):
+    from analyzer import _sentiment_result
+    yield "sentiment", lambda: [_sentiment_result(text, text) for text in corpus], len(corpus)
+
+def stage_dedup(fixtures, corpus):
+    from dedup import group_near_duplicates
+    yield "simhash", lambda: group_near_duplicates(corpus), len(corpus)
+
+def stage_transformer(fixtures, corpus):
+    import analyzer
+    if analyzer.load_model() is None:
+        yield analyzer.active_model_id(), None, f"model {analyzer.model_status()['state']}"
+        return
+    for batch_size in BATCH_SIZES:
+        yield f"batch_{batch_size}", lambda batch_size=batch_size: analyzer.classify_batch(corpus, batch_size), len(corpus)
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def stage_e2e(fixtures, corpus):
+    try:
+        from fastapi.testclient import TestClient
+        from main import app
+    except Exception as e:
+        yield "app", None, f"unavailable: {type(e).__name__}: {e}"
+        return
+
+    client = TestClient(app)
+    try:
+        client.__enter__()
+    except Exception as e:
+        yield "app", None, f"startup failed: {type(e).__name__}: {e}"
+        return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=os.path.join(FIXTURES, "html")))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    def post(path, expected_status=200, **kwargs):
+        response = client.post(path, **kwargs)
+        assert response.status_code == expected_status, f"{path}: {response.status_code} {response.text[:200]}"
+        return response
+
+    try:
+        for name, text in fixtures["text"].items():
+            yield f"analyze_text/{name}", lambda text=text: post("/analyze_text", json={"text": text}), 1
+            yield f"analyze_text_stream/{name}", lambda text=text: post("/analyze_text_stream", json={"text": text}).content, 1
+        for name, data in fixtures["pdf"].items():
+            yield f"upload_pdf/{name}", lambda name=name, data=data: post(
+                "/upload_pdf", files={"file": (f"{name}.pdf", data, "application/pdf")}
+            ), 1
+        pages = sorted(fixtures["html"])
+        yield "scrape", lambda: [post("/scrape", json={"url": f"{base}/{name}.html"}) for name in pages], len(pages)
+        yield "scrape_batch", lambda: post("/scrape_batch", json={"urls": [f"{base}/{name}.html" for name in pages]}), len(pages)
+    finally:
+        client.__exit__(None, None, None)
+        server.shutdown()
+        server.server_close()
+
+# --- Runner ---
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run(stages=STAGES, repeat: int = 5):
+    """Runs the selected stages. Returns the machine-readable report."""
+    import analyzer
+
+    fixtures = load_fixtures()
+    corpus = snippet_corpus(fixtures)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "analyzer_version": analyzer.ANALYZER_VERSION,
+            "model": analyzer.active_model_id(),
+            "backend": analyzer.INFERENCE_BACKEND,
+            "corpus_snippets": len(corpus),
+            "env": {name: value for name, value in sorted(os.environ.items()) if name.startswith("EMOTIA_")}
+        },
+        "results": {}
+    }
+
+    def record(key, result):
+        report["results"][key] = result
+        print(f"{key:<45} {_describe(result)}", file=sys.stderr)
+
+    for stage in stages:
+        cases = globals()[f"stage_{stage}"](fixtures, corpus)
+        while True:
+            try:
+                case, fn, detail = next(cases)
+            except StopIteration:
+                break
+            except Exception as e:
+                # The stage itself failed (e.g. a missing dependency); keep what was measured
+                record(f"{stage}/setup", {"error": f"{type(e).__name__}: {e}"})
+                break
+            key = f"{stage}/{case}"
+            if fn is None:
+                record(key, {"skipped": detail})
+                continue
+            try:
+                record(key, measure(fn, detail, repeat))
+            except Exception as e:
+                record(key, {"error": f"{type(e).__name__}: {e}"})
+
+    report["meta"]["model"] = analyzer.active_model_id()
+    return report
+
+def _describe(result):
+    if "skipped" in result:
+        return f"skipped ({result['skipped']})"
+    if "error" in result:
+        return f"error ({result['error']})"
+    return f"median {result['median'] * 1000:9.2f} ms   {result['items_per_sec']:>12} items/s"
+
+def compare(report, baseline, tolerance: float):
+    """Cases whose median is more than `tolerance` (a fraction) slower than the baseline."""
+    regressions = []
+    for key, result in report["results"].items():
+        old = baseline.get("results", {}).get(key)
+        if not old or "median" not in old or "median" not in result or not old["median"]:
+            continue
+        ratio = result["median"] / old["median"]
+        if ratio > 1 + tolerance:
+            regressions.append({"case": key, "baseline": old["median"], "median": result["median"], "ratio": round(ratio, 3)})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time every Emotia pipeline stage on the saved fixtures.")
+    parser.add_argument("-o", "--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated subset of: {', '.join(STAGES)}")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case, after one warm-up run")
+    parser.add_argument("--compare", help="Baseline report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown versus the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+
+    report = run(stages, max(1, args.repeat))
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        report["comparison"] = {
+            "baseline": args.compare,
+            "baseline_commit": baseline.get("meta", {}).get("commit"),
+            "tolerance": args.tolerance,
+            "regressions": regressions
+        }
+        for regression in regressions:
+            print(f"REGRESSION {regression['case']}: {regression['baseline']:.6f}s -> {regression['median']:.6f}s (x{regression['ratio']})", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if regressions:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
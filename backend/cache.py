@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text: str):
+    """Canonical form of a snippet used for cache keys."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+class EmotionCache:
+    """
+    Content-addressed cache for analysis results.
+    Keys are a hash of the normalized text plus the model ID and analyzer
+    version, so a model change never serves stale results.
+    A bounded in-memory LRU sits in front of a persistent SQLite table, so
+    the cache survives restarts. The table keeps at most `max_disk_entries`
+    rows; the oldest writes are evicted first. Pass path=None for a
+    memory-only cache.
+    `model_id` may be a callable, for a model ID that changes at run time
+    (model load, fallbacks, cascade settings).
+    """
+
+    def __init__(self, model_id, version: str, path=None, max_entries: int = 10000, max_disk_entries: int = 100000):
+        self._model_id = model_id
+        self.version = version
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.max_disk_entries = max(1, int(max_disk_entries))
+        # Upper bound of the rows on disk (replaced keys are counted twice)
+        self._disk_rows = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        # Statistics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, model TEXT, value TEXT)")
+                self._db.commit()
+                self._disk_rows = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            except sqlite3.Error as e:
+                logger.warning(f"Result cache disabled on disk ({path}): {e}")
+                self._db = None
+
+    @property
+    def model_id(self):
+        """The model ID results are currently produced under."""
+        return self._model_id() if callable(self._model_id) else self._model_id
+
+    def key(self, text: str, model_id=None):
+        model_id = model_id or self.model_id
+        payload = f"{model_id}\0{self.version}\0{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, text: str, model_id=None):
+        """Returns a copy of the cached result for `text`, or None."""
+        key = self.key(text, model_id)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return dict(self._memory[key])
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row:
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+                    self.disk_hits += 1
+                    return dict(result)
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, result: dict, model_id=None):
+        self.put_many([(text, result)], model_id)
+
+    def put_many(self, entries, model_id=None):
+        """Stores (text, result) pairs, writing them to disk in one transaction."""
+        model_id = model_id or self.model_id
+        rows = []
+        with self._lock:
+            for text, result in entries:
+                key = self.key(text, model_id)
+                self._remember(key, dict(result))
+                rows.append((key, f"{model_id}@{self.version}", json.dumps(result)))
+            if self._db is None or not rows:
+                return
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO results (key, model, value) VALUES (?, ?, ?)", rows)
+                self._disk_rows += len(rows)
+                if self._disk_rows > self.max_disk_entries:
+                    self._evict()
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._db.rollback()
+                logger.warning(f"Failed to persist {len(rows)} cached results: {e}")
+
+    def _evict(self):
+        """Deletes the oldest rows beyond max_disk_entries (REPLACE gives a row a new rowid, so rowid order is write order)."""
+        self._disk_rows = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        excess = self._disk_rows - self.max_disk_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY rowid LIMIT ?)", (excess,)
+            )
+            self._disk_rows -= excess
+            self.evicted += excess
+
+    def invalidate(self, model_id=None):
+        """
+        Drops cached results. With `model_id`, only entries produced by that
+        model are removed; otherwise everything not produced by the current
+        model ID and analyzer version is removed, and the memory tier is cleared.
+        Returns the number of rows deleted from disk.
+        """
+        current = self.model_id
+        with self._lock:
+            self._memory.clear()
+            if self._db is None:
+                return 0
+            if model_id:
+                cursor = self._db.execute("DELETE FROM results WHERE model LIKE ?", (f"{model_id}@%",))
+            else:
+                cursor = self._db.execute("DELETE FROM results WHERE model != ?", (f"{current}@{self.version}",))
+            self._db.commit()
+            self._disk_rows = max(0, self._disk_rows - cursor.rowcount)
+            return cursor.rowcount
+
+    def clear(self):
+        """Drops every cached result."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+                self._disk_rows = 0
+
+    def stats(self):
+        model_id = self.model_id
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            stats = {
+                "model_id": model_id,
+                "version": self.version,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evicted": self.evicted,
+                "hit_rate": hits / lookups if lookups else 0,
+                "path": self.path
+            }
+            if self._db is not None:
+                stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+                stats["max_disk_entries"] = self.max_disk_entries
+            return stats
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+def default_cache_path():
+    return os.environ.get(
+        "EMOTIA_CACHE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".emotia_cache.sqlite3")
+    )
@@ -0,0 +1,192 @@
+"""
+Compact columnar encoding of analysis results.
+
+Instead of one dict per item, a columnar payload holds parallel arrays:
+
+    {
+      "format": "columnar",
+      "count": 3,
+      "emotions": ["joy", "sadness", ...],      # code -> emotion
+      "methods": ["ai_transformer", ...],       # code -> method
+      "columns": {
+        "text": ["...", "...", "..."],
+        "emotion": [0, 1, 0],
+        "score": [0.9731, 0.4112, 0.88],
+        "method": [0, 2, 0],
+        "translated_text": [null, "...", null], # optional fields only when used
+        "extra": [null, {"custom": 1}, null]    # any other keys, per item
+      },
+      ...                                       # the rest of the response
+    }
+
+Scores are rounded to SCORE_DECIMALS. Serialized with orjson when it is
+installed, or as MessagePack (needs the `msgpack` package). items_from_payload
+turns a payload back into item dicts.
+
+Results travel through the pipeline as dicts; the columns are built once,
+when a response is encoded.
+"""
+import json
+from array import array
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.emotia.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.emotia.columnar+msgpack")
+
+# Stable code tables; values seen outside them are appended per response
+EMOTIONS = ("joy", "sadness", "anger", "fear", "energy", "neutral")
+METHODS = ("ai_transformer", "keyword_fallback", "sentiment_fallback")
+
+SCORE_DECIMALS = 4
+
+# Fields every item has, stored in typed arrays
+CORE_FIELDS = ("text", "emotion", "score", "method")
+# Fields only some items have, stored as lists with None for missing values
+OPTIONAL_FIELDS = (
+    "is_translated", "translated_text", "language", "tier", "group_size",
+    "source", "polarity", "subjectivity", "weight", "position",
+    # History rows and live particles
+    "id", "analysis_id", "created_at"
+)
+# Keys outside both lists go to this column as one dict per item
+EXTRA_FIELD = "extra"
+_SCHEMA_FIELDS = frozenset(CORE_FIELDS + OPTIONAL_FIELDS)
+
+class ResultColumns:
+    """
+    Array-backed storage for a list of results: scores in an array of
+    doubles, emotion and method codes in byte arrays, text in a list,
+    one list per optional field that any item actually uses, and an extra
+    list for keys outside the schema (None for items without any).
+    """
+
+    def __init__(self):
+        self.emotions = list(EMOTIONS)
+        self.methods = list(METHODS)
+        self._emotion_codes = {emotion: code for code, emotion in enumerate(self.emotions)}
+        self._method_codes = {method: code for code, method in enumerate(self.methods)}
+        self.text = []
+        self.emotion = array("B")
+        self.score = array("d")
+        self.method = array("B")
+        self.optional = {}
+        self.extra = None
+
+    def __len__(self):
+        return len(self.text)
+
+    @classmethod
+    def from_items(cls, items):
+        columns = cls()
+        for item in items:
+            columns.append(item)
+        return columns
+
+    def _code(self, table, codes, value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(table)
+            table.append(value)
+        return code
+
+    def append(self, item):
+        index = len(self.text)
+        self.text.append(item.get("text"))
+        self.emotion.append(self._code(self.emotions, self._emotion_codes, item.get("emotion")))
+        self.score.append(float(item.get("score") or 0))
+        self.method.append(self._code(self.methods, self._method_codes, item.get("method")))
+        for field in OPTIONAL_FIELDS:
+            value = item.get(field)
+            if value is not None:
+                if field not in self.optional:
+                    self.optional[field] = [None] * index
+                self.optional[field].append(value)
+        for values in self.optional.values():
+            if len(values) == index:
+                values.append(None)
+        extra = {key: value for key, value in item.items() if key not in _SCHEMA_FIELDS}
+        if extra and self.extra is None:
+            self.extra = [None] * index
+        if self.extra is not None:
+            self.extra.append(extra or None)
+
+    def to_payload(self, fields=None):
+        """The JSON-ready columns, optionally limited to `fields`."""
+        columns = {
+            "text": self.text,
+            "emotion": self.emotion.tolist(),
+            "score": [round(score, SCORE_DECIMALS) for score in self.score],
+            "method": self.method.tolist(),
+            **self.optional
+        }
+        extra = self.extra
+        if fields:
+            columns = {field: values for field, values in columns.items() if field in fields}
+            if extra is not None:
+                extra = [{key: value for key, value in values.items() if key in fields} or None if values else None
+                         for values in extra]
+        if extra is not None and any(extra):
+            columns[EXTRA_FIELD] = extra
+        return {
+            "format": "columnar",
+            "count": len(self),
+            "emotions": self.emotions,
+            "methods": self.methods,
+            "columns": columns
+        }
+
+def items_from_payload(payload: dict):
+    """Item dicts back from a columnar payload (optional fields only where set)."""
+    columns = payload["columns"]
+    items = [{} for _ in range(payload["count"])]
+    for field, values in columns.items():
+        for item, value in zip(items, values):
+            if field == "emotion":
+                item[field] = payload["emotions"][value]
+            elif field == "method":
+                item[field] = payload["methods"][value]
+            elif field == EXTRA_FIELD:
+                item.update(value or {})
+            elif value is not None or field in CORE_FIELDS:
+                item[field] = value
+    return items
+
+def wants_columnar(accept: str = None, format: str = None):
+    """
+    Negotiates the response encoding: "msgpack", "columnar" or None for the
+    default item list. The `format` query parameter wins over Accept.
+    """
+    if format:
+        return format if format in ("columnar", "msgpack") else None
+    if accept:
+        if any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES):
+            return "msgpack"
+        if COLUMNAR_MEDIA_TYPE in accept:
+            return "columnar"
+    return None
+
+def columnar_payload(response: dict, fields=None):
+    """Replaces the response's "items" list with columns, keeping every other key."""
+    payload = {key: value for key, value in response.items() if key != "items"}
+    payload.update(ResultColumns.from_items(response.get("items", [])).to_payload(fields))
+    return payload
+
+def encode_json(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def encode_msgpack(payload):
+    if msgpack is None:
+        raise RuntimeError("MessagePack responses need the msgpack package (pip install msgpack).")
+    return msgpack.packb(payload, use_bin_type=True)
@@ -0,0 +1,134 @@
+import hashlib
+import re
+import unicodedata
+
+_TOKEN = re.compile(r"[^\W_]+")
+_DIGITS = re.compile(r"\d+")
+_SENTENCE_END = re.compile(r"[.!?…:]")
+
+# Stand-ins for the parts of bylines and timestamps that vary between copies
+NAME_TOKEN = "<name>"
+TIME_UNIT_TOKEN = "<time>"
+TIME_UNITS = {
+    unit + suffix
+    for unit in ("sec", "second", "min", "minute", "hour", "hr", "day", "week", "month", "year", "yr")
+    for suffix in ("", "s")
+}
+BYLINE_VERBS = {"posted", "written", "submitted", "shared", "published", "sent", "edited", "reviewed", "answered", "asked"}
+
+SIMHASH_BITS = 64
+# The fingerprint is cut into this many bands for candidate lookup. Two
+# fingerprints within max_distance bits (max_distance < SIMHASH_BANDS) share
+# at least one identical band, so only same-band pairs need comparing.
+SIMHASH_BANDS = 4
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+# Snippets with fewer tokens are only grouped on exact normalized text
+MIN_SIMHASH_TOKENS = 4
+
+def _is_name(token: str):
+    """Capitalized but not all-caps, so emphasis ("I LOVE it") is kept."""
+    return len(token) > 1 and token[0].isupper() and not token.isupper()
+
+def _follows_byline(tokens):
+    """After "by" that starts the snippet or follows "posted", "written"..."""
+    return bool(tokens) and tokens[-1] == "by" and (len(tokens) == 1 or tokens[-2] in BYLINE_VERBS)
+
+def fingerprint_tokens(text: str):
+    """
+    Normalized tokens of a snippet: NFKC, lowercase, punctuation dropped,
+    every number replaced by 0 and time units merged, so "12 comments" and
+    "13 comments" or "3 hours ago" and "5 days ago" match. Capitalized words
+    inside a sentence (not in title-cased lines such as headlines), @handles
+    and the author of a byline become one name token, so "Posted by john"
+    and "Posted by Mary" match too.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    matches = list(_TOKEN.finditer(text))
+    gaps = [text[previous.end():match.start()] for previous, match in zip(matches, matches[1:])]
+    # Capitalized words that do not start a sentence
+    inner = [match.group() for match, gap in zip(matches[1:], gaps) if not _SENTENCE_END.search(gap)]
+    names = {token for token in inner if _is_name(token)}
+    if len(names) * 2 > len(inner):
+        names = set()
+
+    tokens = []
+    for match, gap in zip(matches, [None] + gaps):
+        token = match.group()
+        if tokens and tokens[-1] == NAME_TOKEN and gap in ("_", ".", "-"):
+            # The rest of "jane_doe" or "j.doe"
+            continue
+        if (token in names and gap is not None and not _SENTENCE_END.search(gap)) \
+                or text[match.start() - 1:match.start()] == "@" or _follows_byline(tokens):
+            tokens.append(NAME_TOKEN)
+            continue
+        token = _DIGITS.sub("0", token.lower())
+        if token in TIME_UNITS and tokens and tokens[-1] == "0":
+            token = TIME_UNIT_TOKEN
+        tokens.append(token)
+    return tokens
+
+def _feature_hash(feature: str):
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+def simhash(tokens):
+    """64-bit SimHash over word unigrams and bigrams."""
+    weights = [0] * SIMHASH_BITS
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for feature in features:
+        value = _feature_hash(feature)
+        for bit in range(SIMHASH_BITS):
+            if value >> bit & 1:
+                weights[bit] += 1
+            else:
+                weights[bit] -= 1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+def _bands(value: int):
+    return [(band, value >> (band * _BAND_BITS) & _BAND_MASK) for band in range(SIMHASH_BANDS)]
+
+def group_near_duplicates(texts, max_distance: int = 3):
+    """
+    Groups near-identical snippets.
+    Snippets with the same normalized text always share a group; longer
+    snippets also join a group when their SimHash is within `max_distance`
+    bits of the group's first member (max_distance=0 keeps normalized-text
+    grouping only).
+    Returns one index per snippet: the position of its group's
+    representative (its first occurrence), so `representatives[i] == i`
+    marks the snippets that need inference.
+    """
+    max_distance = min(max(0, int(max_distance)), SIMHASH_BANDS - 1)
+    representatives = []
+    by_text = {}
+    by_band = {}
+    hashes = {}
+
+    for i, text in enumerate(texts):
+        tokens = fingerprint_tokens(text)
+        key = " ".join(tokens) or text.strip()
+        if key in by_text:
+            representatives.append(by_text[key])
+            continue
+
+        representative = i
+        if max_distance and len(tokens) >= MIN_SIMHASH_TOKENS:
+            value = simhash(tokens)
+            bands = _bands(value)
+            for band in bands:
+                for candidate in by_band.get(band, ()):
+                    if bin(value ^ hashes[candidate]).count("1") <= max_distance:
+                        representative = candidate
+                        break
+                if representative != i:
+                    break
+            if representative == i:
+                hashes[i] = value
+                for band in bands:
+                    by_band.setdefault(band, []).append(i)
+
+        by_text[key] = representative
+        representatives.append(representative)
+
+    return representatives
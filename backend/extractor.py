@@ -0,0 +1,179 @@
+import logging
+import os
+
+from segmenter import TARGET_TOKENS, iter_snippets
+
+logger = logging.getLogger(__name__)
+
+# Non-content elements dropped before extraction
+EXCLUDED_TAGS = {"script", "style", "nav", "footer", "header", "noscript"}
+
+# Target likely content containers
+# We want meaningful chunks of text, not just menu items
+TARGET_TAGS = ("p", "h1", "h2", "h3", "blockquote", "li", "article")
+
+MIN_SNIPPET_LENGTH = 15
+SPLIT_LENGTH = 180
+# Optional cap on snippets per page (EMOTIA_MAX_SNIPPETS, 0 = no cap).
+# Large analyses are summarized and downsampled instead (see summarize.py).
+MAX_SNIPPETS = int(os.environ.get("EMOTIA_MAX_SNIPPETS", "0")) or None
+
+def _split_into_sentences(text: str):
+    """Break long text into bite-sized sentences for better visualization."""
+    return iter_snippets(text, min_length=20, target_tokens=TARGET_TOKENS)
+
+def collect_snippets(texts, limit=MAX_SNIPPETS):
+    """
+    Applies the snippet rules to the text of each target element, in
+    document order: drop short UI labels, split long paragraphs into
+    sentences, skip exact duplicates, stop after `limit` snippets.
+    """
+    text_elements = []
+    seen = set()
+
+    def add(snippet):
+        if snippet not in seen:
+            text_elements.append(snippet)
+            seen.add(snippet)
+
+    for text in texts:
+        # Filter out noise: very short strings are usually navigation or UI labels
+        if len(text) <= MIN_SNIPPET_LENGTH:
+            continue
+
+        # Split very long paragraphs into sentences to create more data points
+        if len(text) > SPLIT_LENGTH:
+            for sentence in _split_into_sentences(text):
+                add(sentence)
+        else:
+            add(text)
+
+        if limit is not None and len(text_elements) >= limit:
+            break
+
+    return text_elements if limit is None else text_elements[:limit]
+
+def charset_from_content_type(content_type):
+    """The charset parameter of a Content-Type header value, or None."""
+    for parameter in (content_type or "").split(";")[1:]:
+        name, _, value = parameter.partition("=")
+        if name.strip().lower() == "charset":
+            return value.strip().strip("\"'") or None
+    return None
+
+def detect_encoding(html: bytes, encoding: str = None):
+    """
+    Encoding of an HTML document, the way bs4 decides it: the HTTP charset
+    when known, then a BOM or <meta charset>, then UTF-8 if the bytes
+    decode as UTF-8, then a guess. libxml2 would assume latin-1 for a UTF-8
+    page without <meta charset>.
+    """
+    from bs4 import UnicodeDammit
+    dammit = UnicodeDammit(html, known_definite_encodings=[encoding] if encoding else [], is_html=True)
+    return dammit.original_encoding
+
+# --- Extraction Backends ---
+
+def bs4_target_texts(html, encoding: str = None):
+    """
+    Reference backend: BeautifulSoup with the pure-Python html.parser.
+    Yields the text of every target element in document order.
+    """
+    from bs4 import BeautifulSoup
+    if isinstance(html, bytes):
+        soup = BeautifulSoup(html, 'html.parser', from_encoding=encoding)
+    else:
+        soup = BeautifulSoup(html, 'html.parser')
+
+    # Clean up the DOM - remove non-content elements
+    for tag in soup(list(EXCLUDED_TAGS)):
+        tag.decompose()
+
+    for tag in soup.find_all(list(TARGET_TAGS)):
+        yield tag.get_text(" ", strip=True)
+
+def lxml_target_texts(html, encoding: str = None):
+    """
+    Fast backend: libxml2's HTML parser through lxml, walked once.
+    Every text node is stripped and appended to one flat list while walking
+    the tree; each target element only remembers the slice of that list it
+    spans, so nested targets never re-walk their subtree. A nested target
+    spanning exactly the same text as its enclosing target is a duplicate
+    and is skipped without building its string.
+    """
+    from lxml import etree, html as lxml_html
+
+    parser = None
+    if isinstance(html, bytes) and html:
+        parser = lxml_html.HTMLParser(encoding=detect_encoding(html, encoding))
+    try:
+        root = lxml_html.document_fromstring(html, parser=parser)
+    except (etree.ParserError, ValueError, LookupError):
+        return
+
+    pieces = []
+    spans = []
+    open_targets = []
+
+    def add(text):
+        if text:
+            text = text.strip()
+            if text:
+                pieces.append(text)
+
+    walker = etree.iterwalk(root, events=("start", "end", "comment", "pi"))
+    for event, element in walker:
+        if event in ("comment", "pi"):
+            # Comment text is not content, but the text after it is
+            add(element.tail)
+        elif event == "start":
+            if element.tag in EXCLUDED_TAGS:
+                walker.skip_subtree()
+                continue
+            if element.tag in TARGET_TAGS:
+                # [start, end, enclosing target]
+                span = [len(pieces), None, open_targets[-1] if open_targets else None]
+                spans.append(span)
+                open_targets.append(span)
+            add(element.text)
+        else:
+            if element.tag in TARGET_TAGS:
+                open_targets.pop()[1] = len(pieces)
+            add(element.tail)
+
+    for start, end, enclosing in spans:
+        if enclosing is not None and enclosing[0] == start and enclosing[1] == end:
+            continue
+        yield " ".join(pieces[start:end])
+
+BACKENDS = {
+    "bs4": bs4_target_texts,
+    "lxml": lxml_target_texts
+}
+
+def _default_backend():
+    name = os.environ.get("EMOTIA_EXTRACTOR")
+    if name:
+        if name in BACKENDS:
+            return name
+        logger.warning(f"Unknown extractor '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    try:
+        import lxml.html  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "bs4"
+
+DEFAULT_BACKEND = _default_backend()
+
+def extract_snippets(html, backend: str = None, limit=MAX_SNIPPETS, encoding: str = None):
+    """
+    Extracts meaningful text snippets from an HTML document (str or bytes).
+    `backend` is "lxml" (fast, default when installed) or "bs4" (reference).
+    `encoding` is the charset from the HTTP Content-Type header, if any.
+    Returns a list of strings.
+    """
+    return collect_snippets(BACKENDS[backend or DEFAULT_BACKEND](html, encoding), limit)
+
+def extraction_signature(backend: str = None, limit=MAX_SNIPPETS):
+    """Identifies the extraction settings, so cached snippets are only reused under the same ones."""
+    return f"{backend or DEFAULT_BACKEND}:{limit or 0}:{MIN_SNIPPET_LENGTH}:{SPLIT_LENGTH}:{TARGET_TOKENS or 0}"
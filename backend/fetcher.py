@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import time
+from functools import partial
+from urllib.parse import urlsplit
+
+import anyio
+import httpx
+
+from scraper import HEADERS, MAX_RESPONSE_BYTES
+from extractor import extract_snippets, charset_from_content_type
+import metrics
+
+logger = logging.getLogger(__name__)
+
+class AsyncFetcher:
+    """
+    Async HTTP layer for scraping many URLs at once.
+    One shared httpx.AsyncClient keeps connections alive between requests;
+    `max_connections` bounds the pool, `per_host` bounds concurrent requests
+    to a single host so we don't hammer one site, and every request has a
+    `timeout` in seconds. Bodies larger than `max_bytes` are cut off.
+    """
+
+    def __init__(self, timeout: float = 10, max_connections: int = 20, per_host: int = 4, max_bytes: int = MAX_RESPONSE_BYTES):
+        self.timeout = timeout
+        self.per_host = max(1, int(per_host))
+        self.max_bytes = max_bytes
+        self.client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        self._host_limits = {}
+
+    def _host_limit(self, url: str):
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def fetch(self, url: str):
+        """
+        Downloads one URL. Never raises: returns a dict with the status,
+        the body (or None), the Content-Type charset and an error message
+        on failure.
+        """
+        start = time.perf_counter()
+        result = {"url": url, "status": None, "content": None, "charset": None, "error": None}
+        try:
+            async with self._host_limit(url):
+                fetch_start = time.perf_counter()
+                async with self.client.stream("GET", url) as response:
+                    result["status"] = response.status_code
+                    response.raise_for_status()
+                    chunks = []
+                    size = 0
+                    async for chunk in response.aiter_bytes():
+                        chunks.append(chunk)
+                        size += len(chunk)
+                        if size >= self.max_bytes:
+                            logger.info(f"Truncated {url} at {self.max_bytes} bytes")
+                            break
+                    result["content"] = b"".join(chunks)[:self.max_bytes]
+                    result["charset"] = charset_from_content_type(response.headers.get("content-type"))
+                metrics.observe_stage("fetch", time.perf_counter() - fetch_start)
+        except Exception as e:
+            result["error"] = str(e) or e.__class__.__name__
+        result["seconds"] = round(time.perf_counter() - start, 3)
+        return result
+
+    async def scrape(self, url: str):
+        """Fetches one URL and extracts its snippets in a worker thread."""
+        result = await self.fetch(url)
+        content = result.pop("content")
+        charset = result.pop("charset")
+        result["snippets"] = []
+        if content is not None:
+            try:
+                with metrics.stage("parse"):
+                    result["snippets"] = await anyio.to_thread.run_sync(partial(extract_snippets, content, encoding=charset))
+            except Exception as e:
+                result["error"] = f"Parsing failed: {e}"
+        result["ok"] = result["error"] is None
+        return result
+
+    async def scrape_many(self, urls):
+        """Scrapes all URLs concurrently. Results keep the order of `urls`."""
+        return await asyncio.gather(*(self.scrape(url) for url in urls))
+
+    async def aclose(self):
+        await self.client.aclose()
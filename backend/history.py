@@ -0,0 +1,268 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Item fields stored in their own (indexed) columns; the rest goes to `extra`
+COLUMNS = ("text", "emotion", "score", "method", "language", "source")
+
+MAX_PAGE_SIZE = 1000
+
+class AnalysisHistory:
+    """
+    Append-only, on-disk history of every stored analysis.
+    One row per snippet in SQLite, with secondary indexes on emotion/score,
+    method, source, time and analysis ID, and an FTS5 index over the text
+    (when this SQLite build has FTS5; otherwise text search falls back to
+    LIKE). Pages are fetched newest first with a keyset cursor (the last
+    row ID), so deep pages cost the same as the first one.
+
+    Once start() has been called, record() only queues the items and a
+    writer thread inserts everything queued in one transaction, keeping
+    index maintenance off the request path.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS snippets (
+                id INTEGER PRIMARY KEY,
+                analysis_id TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                source TEXT,
+                text TEXT NOT NULL,
+                emotion TEXT,
+                score REAL,
+                method TEXT,
+                language TEXT,
+                extra TEXT
+            );
+            CREATE INDEX IF NOT EXISTS snippets_emotion_score ON snippets (emotion, score);
+            CREATE INDEX IF NOT EXISTS snippets_score ON snippets (score);
+            CREATE INDEX IF NOT EXISTS snippets_method ON snippets (method);
+            CREATE INDEX IF NOT EXISTS snippets_source ON snippets (source);
+            CREATE INDEX IF NOT EXISTS snippets_created_at ON snippets (created_at);
+            CREATE INDEX IF NOT EXISTS snippets_analysis ON snippets (analysis_id);
+        """)
+        try:
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS snippets_fts USING fts5(text, content='snippets', content_rowid='id')"
+            )
+            self.full_text = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite has no FTS5 ({e}). History text search will use LIKE.")
+            self.full_text = False
+        self._db.commit()
+        # Timestamps never go backwards, so time ranges map to row ID ranges
+        self._last_time = self._db.execute("SELECT COALESCE(MAX(created_at), 0) FROM snippets").fetchone()[0]
+
+        self._queue = queue.Queue()
+        self._thread = None
+
+        # Statistics
+        self.inserted = 0
+        self.failed = 0
+        self.queries = 0
+
+    def start(self):
+        """Starts the writer thread (no-op if already running)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer, name="emotia-history", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Writes whatever is still queued and stops the writer thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def flush(self):
+        """Blocks until everything queued so far is written."""
+        self._queue.join()
+
+    def record(self, analysis_id: str, items, source=None):
+        """
+        Appends the items of one analysis. Queued for the writer thread when
+        it runs, written right away otherwise. `source` applies to items
+        without their own.
+        """
+        rows = []
+        for item in items:
+            extra = {key: value for key, value in item.items() if key not in COLUMNS}
+            rows.append((
+                analysis_id, item.get("source") or source,
+                item.get("text") or "", item.get("emotion"), item.get("score"),
+                item.get("method"), item.get("language"),
+                json.dumps(extra) if extra else None
+            ))
+        if not rows:
+            return
+        if self._thread is not None:
+            self._queue.put(rows)
+        else:
+            self._insert(rows)
+
+    def _writer(self):
+        while True:
+            batch = self._queue.get()
+            done = 1
+            stopping = batch is None
+            rows = [] if stopping else list(batch)
+            # Everything queued meanwhile goes into the same transaction
+            while True:
+                try:
+                    more = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                done += 1
+                if more is None:
+                    stopping = True
+                else:
+                    rows.extend(more)
+            try:
+                if rows:
+                    self._insert(rows)
+            except sqlite3.Error as e:
+                self.failed += len(rows)
+                logger.error(f"Could not write {len(rows)} snippets to the history: {e}")
+            finally:
+                for _ in range(done):
+                    self._queue.task_done()
+            if stopping:
+                return
+
+    def _insert(self, rows):
+        with self._lock:
+            self._last_time = max(time.time(), self._last_time)
+            try:
+                # Take the write lock first, so no other connection can insert between reading
+                # the last ID and indexing everything after it
+                self._db.execute("BEGIN IMMEDIATE")
+                last_id = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM snippets").fetchone()[0]
+                self._db.executemany(
+                    "INSERT INTO snippets (created_at, analysis_id, source, text, emotion, score, method, language, extra) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((self._last_time,) + row for row in rows)
+                )
+                if self.full_text:
+                    self._db.execute(
+                        "INSERT INTO snippets_fts (rowid, text) SELECT id, text FROM snippets WHERE id > ?", (last_id,)
+                    )
+                self._db.commit()
+            except sqlite3.Error:
+                self._db.rollback()
+                raise
+            self.inserted += len(rows)
+
+    def query(
+        self, emotions=None, min_score=None, max_score=None, methods=None, sources=None,
+        since=None, until=None, text=None, analysis_id=None,
+        cursor=None, limit: int = 100
+    ):
+        """
+        Matching snippets, newest first. All filters are optional and
+        combined with AND; list filters match any of their values, and
+        `since`/`until` are Unix timestamps.
+        Returns (items, next_cursor); pass next_cursor back as `cursor` for
+        the next page (None when there are no more rows).
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        clauses = []
+        params = []
+
+        def any_of(column, values):
+            values = [value for value in values or () if value]
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+
+        any_of("emotion", emotions)
+        any_of("method", methods)
+        any_of("source", sources)
+        for clause, value in (
+            ("score >= ?", min_score), ("score <= ?", max_score),
+            ("analysis_id = ?", analysis_id), ("id < ?", cursor),
+            # Turned into row ID bounds, which combine with every other index
+            ("id >= (SELECT id FROM snippets WHERE created_at >= ? ORDER BY created_at LIMIT 1)", since),
+            ("id < COALESCE((SELECT id FROM snippets WHERE created_at >= ? ORDER BY created_at LIMIT 1), 1 << 62)", until)
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        if text and text.strip():
+            if self.full_text:
+                clauses.append("id IN (SELECT rowid FROM snippets_fts WHERE snippets_fts MATCH ?)")
+                params.append(_match_expression(text))
+            else:
+                clauses.append("text LIKE ? ESCAPE '\\'")
+                params.append("%" + text.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+
+        sql = "SELECT id, analysis_id, created_at, source, text, emotion, score, method, language, extra FROM snippets"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+            self.queries += 1
+
+        items = [_row_item(row) for row in rows[:limit]]
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return items, next_cursor
+
+    def stats(self):
+        with self._lock:
+            # Rows are never deleted, so the highest ID is the row count
+            snippets = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM snippets").fetchone()[0]
+        return {
+            "path": self.path,
+            "snippets": snippets,
+            "full_text": self.full_text,
+            "queued": self._queue.qsize(),
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "queries": self.queries
+        }
+
+def _match_expression(text: str):
+    """Every word as a quoted FTS5 term (all required), so user input can't be a syntax error."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+def _row_item(row):
+    row_id, analysis_id, created_at, source, text, emotion, score, method, language, extra = row
+    item = json.loads(extra) if extra else {}
+    item.update({"text": text, "emotion": emotion, "score": score, "method": method})
+    if language is not None:
+        item["language"] = language
+    if source is not None:
+        item["source"] = source
+    item.update({"id": row_id, "analysis_id": analysis_id, "created_at": created_at})
+    return item
+
+def default_history():
+    """
+    Builds the analysis history unless EMOTIA_HISTORY=0.
+    The database lives at EMOTIA_HISTORY_PATH.
+    """
+    if os.environ.get("EMOTIA_HISTORY", "1") == "0":
+        return None
+    path = os.environ.get(
+        "EMOTIA_HISTORY_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".emotia_history.sqlite3")
+    )
+    try:
+        return AnalysisHistory(path)
+    except sqlite3.Error as e:
+        logger.warning(f"Analysis history disabled ({path}): {e}")
+        return None
@@ -0,0 +1,125 @@
+import csv
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Same notion of a word as the old r'\b' + word + r'\b' patterns
+_TOKEN = re.compile(r"\w+")
+
+def tokenize(text: str):
+    return _TOKEN.findall(text.lower())
+
+class KeywordMatcher:
+    """
+    Emotion keyword index compiled once from {emotion: [terms]}.
+    A snippet is tokenized a single time and every token is looked up in a
+    hash index, so the cost depends on the snippet length, not on how many
+    terms the lexicon has. Multi-word terms are matched as token sequences.
+    Each distinct term counts once per snippet, like the original matcher.
+    """
+
+    def __init__(self, lexicon=None):
+        self.emotions = []
+        self._words = {}
+        self._phrases = {}
+        self._max_phrase = 1
+        self.term_count = 0
+        if lexicon:
+            self.add(lexicon)
+
+    def add(self, lexicon):
+        """Adds terms from an {emotion: [terms]} mapping."""
+        for emotion, terms in lexicon.items():
+            if emotion not in self.emotions:
+                self.emotions.append(emotion)
+            for term in terms:
+                tokens = tuple(tokenize(term))
+                if not tokens:
+                    continue
+                index = self._words if len(tokens) == 1 else self._phrases
+                key = tokens[0] if len(tokens) == 1 else tokens
+                if key not in index:
+                    index[key] = set()
+                    self.term_count += 1
+                index[key].add(emotion)
+                self._max_phrase = max(self._max_phrase, len(tokens))
+
+    def scores(self, text: str):
+        """Returns {emotion: number of distinct matching terms} in one pass."""
+        tokens = tokenize(text)
+        matched = set()
+        for token in tokens:
+            if token in self._words:
+                matched.add(token)
+        if self._phrases:
+            for start in range(len(tokens)):
+                for length in range(2, min(self._max_phrase, len(tokens) - start) + 1):
+                    phrase = tuple(tokens[start:start + length])
+                    if phrase in self._phrases:
+                        matched.add(phrase)
+
+        scores = {emotion: 0 for emotion in self.emotions}
+        for term in matched:
+            index = self._words if isinstance(term, str) else self._phrases
+            for emotion in index[term]:
+                scores[emotion] += 1
+        return scores
+
+    def best(self, text: str):
+        """
+        Returns the emotion with the highest match count and its score,
+        or (None, 0) when nothing matches.
+        """
+        scores = self.scores(text)
+        if not scores:
+            return None, 0
+        best_emotion = max(scores, key=scores.get)
+        if scores[best_emotion] > 0:
+            return best_emotion, 0.8 + (0.1 * min(scores[best_emotion], 2))
+        return None, 0
+
+    def best_many(self, texts):
+        """Batch form of best()."""
+        return [self.best(text) for text in texts]
+
+def load_lexicon(path: str, emotion_map=None):
+    """
+    Loads a user-supplied lexicon into an {emotion: [terms]} mapping.
+    Supported formats:
+      - .json: {"emotion": ["term", ...]}
+      - .csv / .tsv / .txt: "term,emotion" rows, or NRC EmoLex style
+        "term<TAB>emotion<TAB>0|1" rows (only rows flagged 1 are kept)
+    `emotion_map` renames emotions (e.g. disgust -> anger); emotions that
+    are not in it are dropped when it is given.
+    """
+    lexicon = {}
+
+    def add(term, emotion):
+        emotion = emotion.strip().lower()
+        if emotion_map is not None:
+            if emotion not in emotion_map:
+                return
+            emotion = emotion_map[emotion]
+        lexicon.setdefault(emotion, []).append(term.strip())
+
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            for emotion, terms in json.load(f).items():
+                for term in terms:
+                    add(term, emotion)
+    else:
+        with open(path, encoding="utf-8", newline="") as f:
+            sample = f.read(4096)
+            f.seek(0)
+            delimiter = "\t" if "\t" in sample else ","
+            for row in csv.reader(f, delimiter=delimiter):
+                if len(row) < 2 or not row[0].strip() or row[0].startswith("#"):
+                    continue
+                if len(row) >= 3 and row[2].strip() != "1":
+                    continue
+                add(row[0], row[1])
+
+    logger.info(f"Loaded lexicon {path}: {sum(len(t) for t in lexicon.values())} terms")
+    return lexicon
@@ -0,0 +1,82 @@
+import difflib
+import itertools
+import os
+
+from segmenter import TARGET_TOKENS, split_snippets
+
+# Longest text a live session accepts per revision
+LIVE_MAX_CHARS = int(os.environ.get("EMOTIA_LIVE_MAX_CHARS", "200000"))
+
+class LiveSession:
+    """
+    State of one live-editing connection: the snippets of the last revision,
+    each with a stable particle ID and its analysis result.
+    Every new revision is segmented and diffed against the previous one at
+    the snippet level; only added or edited snippets are analyzed, and the
+    changes come back as add/update/remove particle deltas.
+    """
+
+    def __init__(self, analyze, min_length: int = 2):
+        self.analyze = analyze
+        self.min_length = min_length
+        self.snippets = []
+        self.ids = []
+        self.results = {}
+        self.revisions = 0
+        self._next_id = itertools.count(1)
+
+    def revise(self, text: str):
+        """Applies a new revision of the text. Returns the delta event."""
+        if len(text) > LIVE_MAX_CHARS:
+            raise ValueError(f"Text too long for live mode (max {LIVE_MAX_CHARS} characters).")
+
+        snippets = split_snippets(text, min_length=self.min_length, target_tokens=TARGET_TOKENS)
+        matcher = difflib.SequenceMatcher(None, self.snippets, snippets, autojunk=False)
+
+        ids = []
+        removed = []
+        added = []
+        updated = []
+        for op, a_start, a_end, b_start, b_end in matcher.get_opcodes():
+            if op == "equal":
+                ids.extend(self.ids[a_start:a_end])
+                continue
+            old_ids = self.ids[a_start:a_end]
+            # An edited sentence keeps its particle; extra ones appear or vanish
+            for offset, index in enumerate(range(b_start, b_end)):
+                if offset < len(old_ids):
+                    ids.append(old_ids[offset])
+                    updated.append((old_ids[offset], index))
+                else:
+                    particle_id = next(self._next_id)
+                    ids.append(particle_id)
+                    added.append((particle_id, index))
+            removed.extend(old_ids[b_end - b_start:])
+
+        changed = added + updated
+        results = self.analyze([snippets[index] for _, index in changed]) if changed else []
+        for (particle_id, _), result in zip(changed, results):
+            self.results[particle_id] = result
+        for particle_id in removed:
+            self.results.pop(particle_id, None)
+
+        self.snippets = snippets
+        self.ids = ids
+        self.revisions += 1
+
+        def particle(particle_id):
+            return {"id": particle_id, **self.results[particle_id]}
+
+        return {
+            "type": "delta",
+            "add": [particle(particle_id) for particle_id, _ in added],
+            "update": [particle(particle_id) for particle_id, _ in updated],
+            "remove": removed,
+            "count": len(ids),
+            "analyzed": len(changed),
+            "reused": len(ids) - len(changed)
+        }
+
+    def items(self):
+        """Current results in text order."""
+        return [self.results[particle_id] for particle_id in self.ids]
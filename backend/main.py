@@ -1,14 +1,29 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Header, Query, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse, PlainTextResponse, Response
 from pydantic import BaseModel
 from typing import Optional, List
 import os
-import io
-from pypdf import PdfReader
-from scraper import scrape_url
-from analyzer import analyze_emotion
+import asyncio
+import json
+import itertools
+from datetime import datetime
+from scraper import scrape_page, page_cache
+from fetcher import AsyncFetcher
+import analyzer
+from analyzer import analyze_emotions
+from scheduler import InferenceScheduler
+from segmenter import TARGET_TOKENS, split_snippets
+from live import LiveSession
+import metrics
+from pdf_ingest import open_pdf, iter_pdf_snippets, analyze_pdf
+from store import default_store, project
+from history import default_history
+from summarize import summarize
+from streaming import stream_analysis, wants_sse, NDJSON_MEDIA_TYPE, SSE_MEDIA_TYPE
+from columnar import wants_columnar, columnar_payload, encode_json, encode_msgpack, COLUMNAR_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
 
 # Initialize the API
 app = FastAPI(title="Emotia API", description="Backend for the Emotional Gravity Map")
@@ -26,31 +41,88 @@ app.add_middleware(
 current_dir = os.path.dirname(os.path.abspath(__file__))
 frontend_dir = os.path.join(current_dir, "../frontend")
 
+# Per-stage timings: Prometheus metrics at /metrics and a Server-Timing header
+# on every response. EMOTIA_PROFILING=1 enables ?profile=1 (see metrics.py).
+app.add_middleware(metrics.MetricsMiddleware)
+
 app.mount("/static", StaticFiles(directory=frontend_dir), name="static")
 
+# --- Inference Scheduler ---
+# Collects snippets from all in-flight requests into shared micro-batches.
+# Tune with EMOTIA_MAX_BATCH_SIZE / EMOTIA_MAX_WAIT_MS, disable with EMOTIA_SCHEDULER=0.
+SCHEDULER_ENABLED = os.environ.get("EMOTIA_SCHEDULER", "1") != "0"
+MAX_BATCH_SIZE = int(os.environ.get("EMOTIA_MAX_BATCH_SIZE", "32"))
+MAX_WAIT_MS = float(os.environ.get("EMOTIA_MAX_WAIT_MS", "10"))
+
+# The model loads lazily; EMOTIA_WARMUP=0 skips the background warm-up at startup.
+WARMUP_ENABLED = os.environ.get("EMOTIA_WARMUP", "1") != "0"
+
+@app.on_event("startup")
+def start_scheduler():
+    if WARMUP_ENABLED:
+        analyzer.warm_up(background=True)
+    if SCHEDULER_ENABLED and not analyzer.FALLBACK_ONLY:
+        analyzer.inference_scheduler = InferenceScheduler(analyzer.classify_batch, MAX_BATCH_SIZE, MAX_WAIT_MS)
+        analyzer.inference_scheduler.start()
+
+@app.on_event("shutdown")
+def stop_scheduler():
+    if analyzer.inference_scheduler:
+        analyzer.inference_scheduler.stop()
+
+# --- Batch Scraping ---
+# Shared async connection pool for /scrape_batch.
+# Tune with EMOTIA_FETCH_TIMEOUT, EMOTIA_FETCH_MAX_CONNECTIONS and EMOTIA_FETCH_PER_HOST.
+MAX_BATCH_URLS = int(os.environ.get("EMOTIA_MAX_BATCH_URLS", "100"))
+fetcher = None
+
+@app.on_event("startup")
+def start_fetcher():
+    global fetcher
+    fetcher = AsyncFetcher(
+        timeout=float(os.environ.get("EMOTIA_FETCH_TIMEOUT", "10")),
+        max_connections=int(os.environ.get("EMOTIA_FETCH_MAX_CONNECTIONS", "20")),
+        per_host=int(os.environ.get("EMOTIA_FETCH_PER_HOST", "4"))
+    )
+
+@app.on_event("shutdown")
+async def stop_fetcher():
+    if fetcher:
+        await fetcher.aclose()
+
 # --- Pydantic Models ---
 
 class ScrapeRequest(BaseModel):
     url: Optional[str] = None
 
-class TextRequest(BaseModel):
-    text: str
+class ScrapeBatchRequest(BaseModel):
+    urls: List[str]
 
-class ReportItem(BaseModel):
+class TextRequest(BaseModel):
     text: str
-    emotion: str
-    score: float
-    method: Optional[str] = None
-    polarity: Optional[float] = None
-    subjectivity: Optional[float] = None
 
-class ReportRequest(BaseModel):
-    items: List[ReportItem]
-
-# --- In-Memory Storage ---
-# Simple storage for the current session. 
-# In a production environment, replace this with Redis or a database.
-items_db = []
+# --- Result Storage ---
+# Analyses are stored per analysis ID with TTL and size-based eviction.
+# Clients may send X-Session-ID to get their own "latest analysis" in /items.
+# Set EMOTIA_STORE to a redis:// URL to share results across workers.
+result_store = default_store()
+
+# --- Analysis History ---
+# Every stored analysis is also appended to an on-disk SQLite history
+# (indexed by emotion, score, method, source and time, plus full-text
+# search) that /history queries. EMOTIA_HISTORY=0 turns it off,
+# EMOTIA_HISTORY_PATH moves the database.
+history = default_history()
+
+@app.on_event("startup")
+def start_history():
+    if history:
+        history.start()
+
+@app.on_event("shutdown")
+def stop_history():
+    if history:
+        history.stop()
 
 # --- Endpoints ---
 
@@ -59,255 +131,482 @@ async def read_index():
     """Serve the main frontend application."""
     return FileResponse(os.path.join(frontend_dir, "index.html"))
 
-@app.post("/scrape")
-def scrape_endpoint(request: ScrapeRequest):
-    """
-    Scrapes the given URL, analyzes emotions, and updates the session data.
-    If no URL is provided, defaults to Hacker News for a quick demo.
-    """
-    global items_db
-    url = request.url
-    if not url:
-        url = "https://news.ycombinator.com/"
-        
-    snippets = scrape_url(url)
-    if not snippets:
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of the request and pipeline stage metrics."""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/health")
+def health():
+    """Liveness probe: the process is up, whether or not the model is loaded."""
+    return {"status": "ok"}
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once the model is warm (or fallbacks are in use), 503 before."""
+    status = analyzer.model_status()
+    if not analyzer.is_ready(WARMUP_ENABLED):
+        return JSONResponse(status_code=503, content={"status": "loading", **status})
+    return {"status": "ready", **status}
+
+# --- Snippet Extraction ---
+
+DEFAULT_SCRAPE_URL = "https://news.ycombinator.com/"
+
+def _scrape_page(url: str):
+    try:
+        page = scrape_page(url)
+    except Exception as e:
+        print(f"Scraping failed for {url}: {e}")
+        page = None
+    if not page or not page["snippets"]:
         raise HTTPException(status_code=400, detail="Could not retrieve content. The site might be blocking scrapers.")
-        
-    analyzed_items = [analyze_emotion(snippet) for snippet in snippets]
-    items_db = analyzed_items
-    
-    return {
-        "message": "Analysis complete", 
-        "count": len(items_db), 
-        "items": items_db
-    }
+    return page
 
-@app.post("/analyze_text")
-def analyze_text_endpoint(request: TextRequest):
-    """
-    Analyzes raw text input.
-    Splits text into sentences/chunks and analyzes emotions.
-    """
-    global items_db
-    text = request.text
+def _scrape_snippets(url: Optional[str]):
+    return _scrape_page(url or DEFAULT_SCRAPE_URL)["snippets"]
+
+def _text_snippets(text: str):
     if not text:
         raise HTTPException(status_code=400, detail="No text provided.")
         
-    # Simple splitting by newlines or periods.
-    # For production, consider using a robust tokenizer like NLTK or SpaCy.
-    snippets = [s.strip() for s in text.replace('.', '\n').split('\n') if len(s.strip()) > 2]
+    # One snippet per sentence or line (see segmenter.py)
+    with metrics.stage("segment"):
+        snippets = split_snippets(text, min_length=2, target_tokens=TARGET_TOKENS)
     
     if not snippets:
         if len(text) > 2:
             snippets = [text]
         else:
             raise HTTPException(status_code=400, detail="Text too short to analyze.")
+    return snippets
 
-    analyzed_items = [analyze_emotion(snippet) for snippet in snippets]
-    items_db = analyzed_items
-    
-    return {
-        "message": "Analysis complete", 
-        "count": len(items_db), 
-        "items": items_db
-    }
-
-@app.post("/upload_pdf")
-async def upload_pdf_endpoint(file: UploadFile = File(...)):
-    """
-    Parses a PDF file, extracts text, and analyzes emotions.
-    """
-    global items_db
-    
+def _check_pdf_upload(file: UploadFile):
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
-        
-    try:
-        contents = await file.read()
-        pdf_file = io.BytesIO(contents)
-        reader = PdfReader(pdf_file)
-        
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-            
-        # Split into snippets
-        snippets = [s.strip() for s in text.replace('.', '\n').split('\n') if len(s.strip()) > 20]
-        snippets = snippets[:50] # Limit to first 50 snippets for performance
-        
-        if not snippets:
-            raise HTTPException(status_code=400, detail="Could not extract text from PDF.")
 
-        analyzed_items = [analyze_emotion(snippet) for snippet in snippets]
-        items_db = analyzed_items
-        
-        return {
-            "message": "Analysis complete", 
-            "count": len(items_db), 
-            "items": items_db
-        }
-        
+def _open_pdf(file: UploadFile):
+    try:
+        return open_pdf(file.file)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process PDF: {str(e)}")
 
-@app.get("/items")
-def get_items():
-from fastapi import FastAPI, HTTPException, UploadFile, File
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, StreamingResponse
-from pydantic import BaseModel
-from typing import Optional, List
-import os
-import io
-from pypdf import PdfReader
-from scraper import scrape_url
-from analyzer import analyze_emotion
-from report_generator import generate_report_pdf
-
-# Initialize the API
-app = FastAPI(title="Emotia API", description="Backend for the Emotional Gravity Map")
+def _store_items(items, session: Optional[str] = None, source: Optional[str] = None):
+    with metrics.stage("store"):
+        analysis_id = result_store.save(items, session)
+        if history:
+            history.record(analysis_id, items, source)
+        return {"analysis_id": analysis_id}
 
-# CORS configuration - allow all for development flexibility
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Setup static file serving for the frontend
-current_dir = os.path.dirname(os.path.abspath(__file__))
-frontend_dir = os.path.join(current_dir, "../frontend")
-
-app.mount("/static", StaticFiles(directory=frontend_dir), name="static")
-
-# --- Pydantic Models ---
-
-class ScrapeRequest(BaseModel):
-    url: Optional[str] = None
-
-class TextRequest(BaseModel):
-    text: str
-
-class ReportItem(BaseModel):
-    text: str
-    emotion: str
-    score: float
-    method: Optional[str] = None
-    polarity: Optional[float] = None
-    subjectivity: Optional[float] = None
-
-class ReportRequest(BaseModel):
-    items: List[ReportItem]
-
-# --- In-Memory Storage ---
-# Simple storage for the current session. 
-# In a production environment, replace this with Redis or a database.
-items_db = []
-
-# --- Endpoints ---
+def _summarized(response: dict):
+    """
+    Adds the aggregate "stats" (histograms, timeline) to an analysis
+    response. Large analyses get weighted representative particles in
+    "items" instead of every result; the full list stays in /items.
+    """
+    stats, particles = summarize(response["items"])
+    response["stats"] = stats
+    if particles is not None:
+        response["items"] = particles
+        response["downsampled"] = True
+        response["total"] = stats["count"]
+    return response
+
+def _analysis_response(snippets, session: Optional[str] = None):
+    items = analyze_emotions(snippets)
+    stored = _store_items(items, session)
+    return {
+        "message": "Analysis complete", 
+        "count": len(items), 
+        "items": items,
+        **stored
+    }
 
-@app.get("/")
-async def read_index():
-    """Serve the main frontend application."""
-    return FileResponse(os.path.join(frontend_dir, "index.html"))
+def _encode_response(response: dict, accept: Optional[str], format: Optional[str], fields=None):
+    """
+    Returns the response as is (FastAPI's JSON item list) unless the client
+    asked for the columnar format with ?format=columnar|msgpack or Accept
+    (see columnar.py).
+    """
+    encoding = wants_columnar(accept, format)
+    if encoding is None:
+        return response
+    payload = columnar_payload(response, fields)
+    if encoding == "msgpack":
+        try:
+            return Response(encode_msgpack(payload), media_type=MSGPACK_MEDIA_TYPE)
+        except RuntimeError as e:
+            raise HTTPException(status_code=406, detail=str(e))
+    return Response(encode_json(payload), media_type=COLUMNAR_MEDIA_TYPE)
+
+def _encode_analysis(response: dict, accept: Optional[str], format: Optional[str]):
+    return _encode_response(_summarized(response), accept, format)
+
+def _streaming_response(snippets, accept: Optional[str], format: Optional[str], session: Optional[str] = None, source: Optional[str] = None):
+    sse = wants_sse(accept, format)
+    return StreamingResponse(
+        stream_analysis(snippets, sse=sse, on_complete=lambda items: _store_items(items, session, source)),
+        media_type=SSE_MEDIA_TYPE if sse else NDJSON_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.post("/scrape")
-def scrape_endpoint(request: ScrapeRequest):
+def scrape_endpoint(request: ScrapeRequest, accept: Optional[str] = Header(None), format: Optional[str] = None, session: Optional[str] = Header(None, alias="X-Session-ID")):
     """
     Scrapes the given URL, analyzes emotions, and updates the session data.
     If no URL is provided, defaults to Hacker News for a quick demo.
     """
-    global items_db
-    url = request.url
-    if not url:
-        url = "https://news.ycombinator.com/"
-        
-    snippets = scrape_url(url)
-    if not snippets:
-        raise HTTPException(status_code=400, detail="Could not retrieve content. The site might be blocking scrapers.")
-        
-    analyzed_items = [analyze_emotion(snippet) for snippet in snippets]
-    items_db = analyzed_items
-    
-    return {
+    url = request.url or DEFAULT_SCRAPE_URL
+    page = _scrape_page(url)
+
+    # An unchanged page reuses the results stored with it
+    items = page_cache.get_results(url, page["content_hash"], analyzer.result_signature()) if page_cache else None
+    if items is None:
+        items = analyze_emotions(page["snippets"])
+        signature = analyzer.results_signature(items)
+        if page_cache and signature:
+            page_cache.put_results(url, page["content_hash"], signature, items)
+
+    stored = _store_items(items, session, url)
+    return _encode_analysis({
         "message": "Analysis complete", 
-        "count": len(items_db), 
-        "items": items_db
-    }
+        "count": len(items), 
+        "items": items,
+        "page_cache": page["cache"],
+        **stored
+    }, accept, format)
 
 @app.post("/analyze_text")
-def analyze_text_endpoint(request: TextRequest):
+def analyze_text_endpoint(request: TextRequest, accept: Optional[str] = Header(None), format: Optional[str] = None, session: Optional[str] = Header(None, alias="X-Session-ID")):
     """
     Analyzes raw text input.
     Splits text into sentences/chunks and analyzes emotions.
     """
-    global items_db
-    text = request.text
-    if not text:
-        raise HTTPException(status_code=400, detail="No text provided.")
-        
-    # Simple splitting by newlines or periods.
-    # For production, consider using a robust tokenizer like NLTK or SpaCy.
-    snippets = [s.strip() for s in text.replace('.', '\n').split('\n') if len(s.strip()) > 2]
-    
-    if not snippets:
-        if len(text) > 2:
-            snippets = [text]
-        else:
-            raise HTTPException(status_code=400, detail="Text too short to analyze.")
-
-    analyzed_items = [analyze_emotion(snippet) for snippet in snippets]
-    items_db = analyzed_items
-    
-    return {
-        "message": "Analysis complete", 
-        "count": len(items_db), 
-        "items": items_db
-    }
+    return _encode_analysis(_analysis_response(_text_snippets(request.text), session), accept, format)
 
 @app.post("/upload_pdf")
-async def upload_pdf_endpoint(file: UploadFile = File(...)):
+async def upload_pdf_endpoint(file: UploadFile = File(...), accept: Optional[str] = Header(None), format: Optional[str] = None, session: Optional[str] = Header(None, alias="X-Session-ID")):
     """
     Parses a PDF file, extracts text, and analyzes emotions.
+    Pages are extracted one at a time in a worker thread and analyzed in
+    batches; EMOTIA_PDF_MAX_PAGES / EMOTIA_PDF_MAX_SNIPPETS cap the work.
     """
-    global items_db
-    
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Only PDF files are supported.")
-        
-    try:
-        contents = await file.read()
-        pdf_file = io.BytesIO(contents)
-        reader = PdfReader(pdf_file)
-        
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-            
-        # Split into snippets
-        snippets = [s.strip() for s in text.replace('.', '\n').split('\n') if len(s.strip()) > 20]
-        snippets = snippets[:50] # Limit to first 50 snippets for performance
-        
-        if not snippets:
-            raise HTTPException(status_code=400, detail="Could not extract text from PDF.")
+    _check_pdf_upload(file)
+    reader = await run_in_threadpool(_open_pdf, file)
 
-        analyzed_items = [analyze_emotion(snippet) for snippet in snippets]
-        items_db = analyzed_items
-        
-        return {
-            "message": "Analysis complete", 
-            "count": len(items_db), 
-            "items": items_db
-        }
-        
+    try:
+        items = await run_in_threadpool(analyze_pdf, reader, analyze_emotions)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process PDF: {str(e)}")
 
+    if not items:
+        raise HTTPException(status_code=400, detail="Could not extract text from PDF.")
+
+    stored = _store_items(items, session, file.filename)
+    return await run_in_threadpool(_encode_analysis, {
+        "message": "Analysis complete", 
+        "count": len(items), 
+        "items": items,
+        **stored
+    }, accept, format)
+
+@app.post("/scrape_batch")
+async def scrape_batch_endpoint(request: ScrapeBatchRequest, accept: Optional[str] = Header(None), format: Optional[str] = None, session: Optional[str] = Header(None, alias="X-Session-ID")):
+    """
+    Fetches and parses many URLs concurrently, then analyzes all their
+    snippets together. Each item carries its `source` URL, and `sources`
+    reports the status of every URL.
+    """
+    urls = list(dict.fromkeys(url.strip() for url in request.urls if url.strip()))
+    if not urls:
+        raise HTTPException(status_code=400, detail="No URLs provided.")
+    if len(urls) > MAX_BATCH_URLS:
+        raise HTTPException(status_code=400, detail=f"Too many URLs (max {MAX_BATCH_URLS}).")
+
+    results = await fetcher.scrape_many(urls)
+
+    snippets = []
+    sources = []
+    for result in results:
+        snippets.extend(result["snippets"])
+        sources.extend([result["url"]] * len(result["snippets"]))
+
+    if not snippets:
+        raise HTTPException(status_code=400, detail="Could not retrieve content from any of the URLs.")
+
+    items = await run_in_threadpool(analyze_emotions, snippets)
+    for item, source in zip(items, sources):
+        item["source"] = source
+    stored = _store_items(items, session)
+
+    return await run_in_threadpool(_encode_analysis, {
+        "message": "Analysis complete",
+        "count": len(items),
+        "items": items,
+        "sources": [
+            {
+                "url": result["url"],
+                "ok": result["ok"],
+                "status": result["status"],
+                "snippets": len(result["snippets"]),
+                "seconds": result["seconds"],
+                "error": result["error"]
+            }
+            for result in results
+        ],
+        **stored
+    }, accept, format)
+
+# --- Streaming Endpoints ---
+# Same analyses, but every batch is sent as soon as it is classified
+# (NDJSON by default, Server-Sent Events with Accept: text/event-stream
+# or ?format=sse), followed by a final "summary" event.
+
+@app.post("/scrape_stream")
+def scrape_stream_endpoint(request: ScrapeRequest, accept: Optional[str] = Header(None), format: Optional[str] = None, session: Optional[str] = Header(None, alias="X-Session-ID")):
+    """Streaming variant of /scrape."""
+    url = request.url or DEFAULT_SCRAPE_URL
+    return _streaming_response(_scrape_snippets(url), accept, format, session, url)
+
+@app.post("/analyze_text_stream")
+def analyze_text_stream_endpoint(request: TextRequest, accept: Optional[str] = Header(None), format: Optional[str] = None, session: Optional[str] = Header(None, alias="X-Session-ID")):
+    """Streaming variant of /analyze_text."""
+    return _streaming_response(_text_snippets(request.text), accept, format, session)
+
+@app.post("/upload_pdf_stream")
+async def upload_pdf_stream_endpoint(file: UploadFile = File(...), accept: Optional[str] = Header(None), format: Optional[str] = None, session: Optional[str] = Header(None, alias="X-Session-ID")):
+    """Streaming variant of /upload_pdf."""
+    _check_pdf_upload(file)
+    reader = await run_in_threadpool(_open_pdf, file)
+
+    # Pull the first snippet up front so an empty PDF is still a 400
+    snippets = iter_pdf_snippets(reader)
+    first = await run_in_threadpool(next, snippets, None)
+    if first is None:
+        raise HTTPException(status_code=400, detail="Could not extract text from PDF.")
+    return _streaming_response(itertools.chain([first], snippets), accept, format, session, file.filename)
+
+# --- Live Editing ---
+# The client sends {"type": "revision", "revision": n, "text": ...} as the
+# user types; the server answers each with a "delta" event listing the
+# particles to add, update (edited sentence) and remove. Only new or edited
+# snippets are analyzed. Revisions arriving while one is being analyzed are
+# coalesced: only the latest is processed. {"type": "save"} stores the
+# current items like the other endpoints and answers with "saved".
+
+@app.websocket("/live")
+async def live_endpoint(websocket: WebSocket):
+    await websocket.accept()
+    session = LiveSession(analyze_emotions)
+    session_id = websocket.headers.get("x-session-id") or websocket.query_params.get("session")
+    latest = None
+    pending = asyncio.Event()
+    saves = asyncio.Queue()
+
+    async def receive():
+        nonlocal latest
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON objects."})
+                continue
+            if message.get("type") == "save":
+                saves.put_nowait(message)
+            else:
+                latest = message
+            pending.set()
+
+    receiver = asyncio.create_task(receive())
+    try:
+        while True:
+            waiter = asyncio.create_task(pending.wait())
+            await asyncio.wait({receiver, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver.done():
+                waiter.cancel()
+                break
+            pending.clear()
+
+            if latest is not None:
+                message, latest = latest, None
+                try:
+                    delta = await run_in_threadpool(session.revise, str(message.get("text", "")))
+                    delta["revision"] = message.get("revision")
+                    await websocket.send_json(delta)
+                except ValueError as e:
+                    await websocket.send_json({"type": "error", "revision": message.get("revision"), "detail": str(e)})
+
+            while not saves.empty():
+                saves.get_nowait()
+                items = session.items()
+                await websocket.send_json({"type": "saved", "count": len(items), **_store_items(items, session_id)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+
+    # Surface anything other than a normal disconnect
+    if receiver.done() and not receiver.cancelled() and not isinstance(receiver.exception(), WebSocketDisconnect):
+        raise receiver.exception()
+
 @app.get("/items")
-def get_items():
-    """Retrieve the currently stored analyzed items."""
-    return {"items": items_db}
+def get_items(
+    analysis_id: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+    fields: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    format: Optional[str] = None,
+    session: Optional[str] = Header(None, alias="X-Session-ID")
+):
+    """
+    Retrieve stored analyzed items.
+    Defaults to the latest analysis of the session (X-Session-ID), or the
+    latest analysis overall. Supports paging with offset/limit and field
+    projection with a comma-separated `fields` list (e.g. fields=text,emotion).
+    format=columnar|msgpack returns parallel arrays instead of item dicts.
+    """
+    analysis_id = analysis_id or result_store.latest(session)
+    page = result_store.page(analysis_id, offset, limit) if analysis_id else None
+    if page is None:
+        if analysis_id:
+            raise HTTPException(status_code=404, detail="Analysis not found or expired.")
+        return {"analysis_id": None, "count": 0, "offset": offset, "items": []}
+
+    items, total = page
+    selected = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    if wants_columnar(accept, format):
+        response = {"analysis_id": analysis_id, "total": total, "offset": offset, "limit": limit, "items": items}
+        return _encode_response(response, accept, format, selected)
+    return {
+        "analysis_id": analysis_id,
+        "count": total,
+        "offset": offset,
+        "limit": limit,
+        "items": project(items, selected)
+    }
+
+def _timestamp(value: Optional[str], name: str):
+    """Unix seconds or an ISO 8601 date/time, as Unix seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: use Unix seconds or an ISO 8601 date.")
+    return moment.timestamp()
+
+@app.get("/history")
+def get_history(
+    emotion: Optional[List[str]] = Query(None),
+    min_score: Optional[float] = Query(None, ge=0, le=1),
+    max_score: Optional[float] = Query(None, ge=0, le=1),
+    method: Optional[List[str]] = Query(None),
+    source: Optional[List[str]] = Query(None),
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    q: Optional[str] = None,
+    analysis_id: Optional[str] = None,
+    cursor: Optional[int] = Query(None, ge=1),
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    format: Optional[str] = None
+):
+    """
+    Searches every analysis ever stored, newest first.
+    Filters: emotion, method and source (repeat for several values),
+    min_score/max_score, since/until (Unix seconds or ISO 8601), q (full
+    text, all words must match) and analysis_id. Page with the returned
+    next_cursor. Supports `fields` and format=columnar|msgpack like /items.
+    """
+    if history is None:
+        raise HTTPException(status_code=404, detail="Analysis history is disabled (EMOTIA_HISTORY=0).")
+    items, next_cursor = history.query(
+        emotions=emotion, min_score=min_score, max_score=max_score,
+        methods=method, sources=source,
+        since=_timestamp(since, "since"), until=_timestamp(until, "until"),
+        text=q, analysis_id=analysis_id, cursor=cursor, limit=limit
+    )
+    selected = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    if wants_columnar(accept, format):
+        response = {"next_cursor": next_cursor, "items": items}
+        return _encode_response(response, accept, format, selected)
+    return {"count": len(items), "next_cursor": next_cursor, "items": project(items, selected)}
+
+@app.get("/history_stats")
+def get_history_stats():
+    """Size of the analysis history and its writer's counters."""
+    if history is None:
+        return {"enabled": False}
+    return {"enabled": True, **history.stats()}
+
+@app.get("/store_stats")
+def get_store_stats():
+    """Size and eviction counters of the result store."""
+    return result_store.stats()
+
+@app.get("/inference_stats")
+def get_inference_stats():
+    """Queue depth and batch-size statistics of the inference scheduler."""
+    if not analyzer.inference_scheduler:
+        return {"running": False}
+    return analyzer.inference_scheduler.stats()
+
+@app.get("/cache_stats")
+def get_cache_stats():
+    """Hit/miss counters of the analysis result cache."""
+    if not analyzer.result_cache:
+        return {"enabled": False}
+    return analyzer.result_cache.stats()
+
+@app.delete("/cache")
+def invalidate_cache(model_id: Optional[str] = None, all: bool = False):
+    """
+    Invalidates cached results.
+    By default drops entries produced by other models or analyzer versions;
+    `model_id` drops one model's entries, `all=true` drops everything.
+    """
+    if not analyzer.result_cache:
+        return {"enabled": False}
+    if all:
+        analyzer.result_cache.clear()
+        return {"message": "Cache cleared"}
+    removed = analyzer.result_cache.invalidate(model_id)
+    return {"message": "Cache invalidated", "removed": removed}
+
+@app.get("/translation_stats")
+def get_translation_stats():
+    """Counters of the translation stage (skipped, memoized, translated)."""
+    return analyzer.translation_stage.stats()
+
+@app.get("/cascade_stats")
+def get_cascade_stats():
+    """Per-tier hit rates of cascade mode."""
+    return analyzer.cascade_report()
+
+@app.get("/dedup_stats")
+def get_dedup_stats():
+    """How many snippets near-duplicate collapsing kept away from inference."""
+    return analyzer.dedup_report()
+
+@app.get("/page_cache_stats")
+def get_page_cache_stats():
+    """Revalidation counters of the scraped page cache."""
+    if not page_cache:
+        return {"enabled": False}
+    return page_cache.stats()
+
+@app.delete("/page_cache")
+def clear_page_cache():
+    """Drops every cached page (and the results stored with it)."""
+    if not page_cache:
+        return {"enabled": False}
+    page_cache.clear()
+    return {"message": "Page cache cleared"}
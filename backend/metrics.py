@@ -0,0 +1,316 @@
+import contextvars
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+from contextlib import contextmanager
+
+import anyio
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+SNIPPET_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter with optional labels, in the Prometheus data model."""
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name + "_total", key, value
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield self.name + "_bucket", key + (_format_value(bound),), cumulative
+            yield self.name + "_count", key, cumulative
+            yield self.name + "_sum", key, total
+
+class Registry:
+    """
+    Holds the metrics and renders them in the Prometheus text format.
+    Collectors are callables run at scrape time that return
+    (name, type, help, [(labels dict, value), ...]) tuples, for numbers other
+    modules already keep (cache hits, translation counts...).
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name: str, help: str, labels=()):
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        self.collectors.append(collector)
+        return collector
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, key, value in metric.samples():
+                label_names = metric.labels + ("le",) if name.endswith("_bucket") else metric.labels
+                lines.append(f"{name}{_format_labels(label_names, key)} {_format_value(value)}")
+        for collector in self.collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector {collector.__name__} failed: {e}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram("emotia_request_seconds", "End-to-end request latency.", ("endpoint", "status"))
+STAGE_SECONDS = registry.histogram("emotia_stage_seconds", "Time spent in each pipeline stage.", ("stage",))
+SNIPPETS_PER_REQUEST = registry.histogram(
+    "emotia_snippets_per_request", "Snippets analyzed per request.", ("endpoint",), SNIPPET_BUCKETS
+)
+BATCH_SIZE = registry.histogram("emotia_inference_batch_size", "Snippets per transformer forward pass.", (), BATCH_SIZE_BUCKETS)
+RESULTS = registry.counter("emotia_results", "Analysis results by the method that answered.", ("method",))
+
+# --- Per-Request Timings ---
+
+class RequestTimings:
+    """Stage durations of one request, reported in its Server-Timing header."""
+
+    def __init__(self):
+        self.stages = {}
+        self.snippets = 0
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0) + seconds
+
+    def count_snippets(self, count: int):
+        with self._lock:
+            self.snippets += count
+
+    def server_timing(self, total: float = None):
+        with self._lock:
+            parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages.items()]
+        if total is not None:
+            parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+# Set by MetricsMiddleware. Worker threads started through run_in_threadpool
+# copy the context, so they add to the same RequestTimings object.
+_current = contextvars.ContextVar("emotia_request_timings", default=None)
+
+def current_timings():
+    return _current.get()
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+@contextmanager
+def stage(name: str):
+    """Times a block as pipeline stage `name` (histogram + Server-Timing)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+def count_snippets(count: int):
+    """Adds to the current request's snippet count."""
+    timings = _current.get()
+    if timings is not None:
+        timings.count_snippets(count)
+
+def count_results(results):
+    for method, count in _Tally(result.get("method", "unknown") for result in results).items():
+        RESULTS.inc(count, method=method)
+
+# --- Sampling Profiler ---
+# Off unless EMOTIA_PROFILING=1. Then a request with ?profile=1 or an
+# "X-Profile: 1" header is sampled every EMOTIA_PROFILE_INTERVAL_MS and the
+# folded stacks (flamegraph.pl / speedscope format) are written to
+# EMOTIA_PROFILE_DIR; the file name comes back in the X-Profile header.
+# All threads are sampled, so concurrent requests show up too.
+PROFILING_ENABLED = os.environ.get("EMOTIA_PROFILING", "0") == "1"
+PROFILE_INTERVAL = float(os.environ.get("EMOTIA_PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_DIR = os.environ.get(
+    "EMOTIA_PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+)
+
+class SamplingProfiler:
+    """Samples the stacks of every thread from a background thread."""
+
+    def __init__(self, label: str, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_") or "root"
+        self.name = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{threading.get_ident() % 10000}.folded"
+        self.stacks = _Tally()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="emotia-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                # Idle threads (waiting on locks or the selector) are noise
+                if stack and not stack[0].startswith(("wait ", "select ", "poll ")):
+                    self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def save(self):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(os.path.join(PROFILE_DIR, self.name), "w", encoding="utf-8") as f:
+            f.write(self.folded())
+
+def _wants_profile(scope):
+    if not PROFILING_ENABLED:
+        return False
+    if re.search(r"(^|&)profile=(1|true)(&|$)", scope.get("query_string", b"").decode("latin-1")):
+        return True
+    return (b"x-profile", b"1") in scope.get("headers", [])
+
+# --- Middleware ---
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that times every request, adds a Server-Timing header
+    with the stage breakdown and records the request metrics.
+    Streaming responses send their headers before the work happens, so
+    their Server-Timing only covers the time to the first byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        status = 500
+        profiler = SamplingProfiler(scope["path"]).start() if _wants_profile(scope) else None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing(time.perf_counter() - start).encode("latin-1")))
+                if profiler is not None:
+                    headers.append((b"x-profile", profiler.name.encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint, status=str(status))
+            if timings.snippets:
+                SNIPPETS_PER_REQUEST.observe(timings.snippets, endpoint=endpoint)
+            if profiler is not None:
+                # Joining the sampler thread and writing the file would block the event loop
+                await anyio.to_thread.run_sync(lambda: profiler.stop().save())
+                logger.info(f"Profile of {scope['path']} saved as {profiler.name} ({profiler.samples} samples)")
@@ -0,0 +1,211 @@
+"""
+ONNX Runtime CPU backend for the emotion model.
+
+Needs the optional packages in requirements-onnx.txt:
+    pip install -r requirements-onnx.txt
+
+Export the int8-quantized model once (needs torch, transformers and onnx):
+    python onnx_backend.py export ./models/emotion-onnx
+
+Serve it with:
+    EMOTIA_BACKEND=onnx EMOTIA_ONNX_MODEL_DIR=./models/emotion-onnx uvicorn main:app
+
+Check accuracy parity against the torch pipeline:
+    python onnx_backend.py parity ./models/emotion-onnx [--texts snippets.txt]
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = "model.int8.onnx"
+
+# Default parity corpus: short snippets covering every label of the model
+PARITY_TEXTS = [
+    "This is okay.",
+    "I like this.",
+    "This is bad.",
+    "I am somewhat annoyed.",
+    "I feel nothing.",
+    "This is absolutely amazing!",
+    "I hate this so much.",
+    "It is what it is.",
+    "I am slightly happy.",
+    "This is a bit sad.",
+    "I can't believe they won, what a surprise!",
+    "That smell is disgusting.",
+    "I'm terrified of what comes next.",
+    "The meeting is scheduled for 3pm on Tuesday.",
+    "We lost everything in the flood and I can't stop crying.",
+    "How dare you lie to me again!"
+]
+
+def export_quantized_model(output_dir: str, model_id: str = "j-hartmann/emotion-english-distilroberta-base"):
+    """
+    Exports the Hugging Face model to ONNX and quantizes its weights to int8.
+    Writes the model, tokenizer and config (with the label mapping) to `output_dir`.
+    """
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    model = AutoModelForSequenceClassification.from_pretrained(model_id)
+    model.eval()
+
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    sample = tokenizer(["Exporting the emotion model."], return_tensors="pt")
+    torch.onnx.export(
+        model,
+        (sample["input_ids"], sample["attention_mask"]),
+        fp32_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"}
+        },
+        opset_version=14
+    )
+
+    quantize_dynamic(fp32_path, os.path.join(output_dir, MODEL_FILE), weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+    logger.info(f"Exported int8 ONNX model to {output_dir}")
+
+class OnnxEmotionClassifier:
+    """
+    Drop-in replacement for the transformers text-classification pipeline
+    (with return_all_scores=True): calling it with a list of snippets returns
+    one list of {"label", "score"} dicts per snippet, using the model's own
+    id2label so the mapping to Emotia's palette is unchanged.
+    """
+
+    def __init__(self, model_dir: str, threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        with open(os.path.join(model_dir, "config.json")) as f:
+            id2label = json.load(f)["id2label"]
+        self.labels = [id2label[str(i)] for i in range(len(id2label))]
+
+    def __call__(self, texts, batch_size: int = 16, truncation: bool = True):
+        if isinstance(texts, str):
+            texts = [texts]
+        results = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            encoded = self.tokenizer(batch, padding=True, truncation=truncation, max_length=512, return_tensors="np")
+            inputs = {name: encoded[name].astype(np.int64) for name in ("input_ids", "attention_mask") if name in self.input_names}
+            logits = self.session.run(["logits"], inputs)[0]
+
+            # Softmax, as the pipeline does for single-label models
+            logits = logits - logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits)
+            probs /= probs.sum(axis=1, keepdims=True)
+
+            for row in probs:
+                results.append([{"label": label, "score": float(score)} for label, score in zip(self.labels, row)])
+        return results
+
+def compare_backends(reference, candidate, texts, batch_size: int = 16):
+    """
+    Accuracy-parity check between two classifiers with the pipeline interface.
+    Reports how often the top raw label and the mapped palette emotion agree,
+    the score drift, and the speedup.
+    """
+    from analyzer import LABEL_MAP
+
+    def top(scores):
+        best = max(scores, key=lambda x: x["score"])
+        return best["label"], best["score"]
+
+    start = time.perf_counter()
+    expected = reference(list(texts), batch_size=batch_size, truncation=True)
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = candidate(list(texts), batch_size=batch_size, truncation=True)
+    candidate_time = time.perf_counter() - start
+
+    label_matches = 0
+    emotion_matches = 0
+    score_diffs = []
+    mismatches = []
+    for text, ref_scores, cand_scores in zip(texts, expected, actual):
+        ref_label, ref_score = top(ref_scores)
+        cand_label, cand_score = top(cand_scores)
+        label_matches += ref_label == cand_label
+        emotion_matches += LABEL_MAP.get(ref_label, "neutral") == LABEL_MAP.get(cand_label, "neutral")
+        ref_by_label = {s["label"]: s["score"] for s in ref_scores}
+        score_diffs.extend(abs(ref_by_label[s["label"]] - s["score"]) for s in cand_scores)
+        if ref_label != cand_label:
+            mismatches.append({"text": text, "reference": ref_label, "candidate": cand_label})
+
+    count = len(texts)
+    return {
+        "snippets": count,
+        "label_agreement": label_matches / count if count else 0,
+        "emotion_agreement": emotion_matches / count if count else 0,
+        "mean_abs_score_diff": float(np.mean(score_diffs)) if score_diffs else 0,
+        "max_abs_score_diff": float(np.max(score_diffs)) if score_diffs else 0,
+        "reference_seconds": reference_time,
+        "candidate_seconds": candidate_time,
+        "speedup": reference_time / candidate_time if candidate_time else 0,
+        "mismatches": mismatches
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and validate the ONNX emotion backend.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Export the int8-quantized ONNX model")
+    export.add_argument("output_dir")
+
+    parity = commands.add_parser("parity", help="Compare the ONNX model against the torch pipeline")
+    parity.add_argument("model_dir")
+    parity.add_argument("--texts", help="File with one snippet per line (default: built-in corpus)")
+    parity.add_argument("--batch-size", type=int, default=16)
+    parity.add_argument("--min-agreement", type=float, default=0.95,
+                        help="Exit non-zero if palette agreement falls below this")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "export":
+        export_quantized_model(args.output_dir)
+        return
+
+    from transformers import pipeline
+    from analyzer import EMOTION_MODEL_ID
+    texts = PARITY_TEXTS
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    reference = pipeline("text-classification", model=EMOTION_MODEL_ID, return_all_scores=True)
+    report = compare_backends(reference, OnnxEmotionClassifier(args.model_dir), texts, args.batch_size)
+    print(json.dumps(report, indent=2))
+    if report["emotion_agreement"] < args.min_agreement:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
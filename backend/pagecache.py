@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class PageCache:
+    """
+    On-disk HTTP cache for scraped pages.
+    Stores the ETag, Last-Modified, a content hash and the extracted
+    snippets per URL, so re-scrapes can revalidate with If-None-Match /
+    If-Modified-Since. Snippets are tagged with the extraction settings
+    they were made with and only reused under the same ones. Analysis
+    results are stored next to the snippets, keyed by the content hash and
+    the analyzer's result signature, so an unchanged page needs neither
+    parsing nor analysis.
+    """
+
+    def __init__(self, path: str, max_pages: int = 1000):
+        self.path = path
+        self.max_pages = max(1, int(max_pages))
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                extraction TEXT,
+                snippets TEXT,
+                results_signature TEXT,
+                results TEXT,
+                fetched_at REAL
+            )
+        """)
+        # Caches created before snippets were tagged with their extraction settings
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(pages)")]
+        if "extraction" not in columns:
+            self._db.execute("ALTER TABLE pages ADD COLUMN extraction TEXT")
+        self._db.commit()
+
+        # Statistics
+        self.not_modified = 0
+        self.unchanged = 0
+        self.changed = 0
+        self.result_hits = 0
+
+    def get(self, url: str, extraction: str):
+        """Returns the cached entry for `url` as a dict, or None (also when it was extracted differently)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, content_hash, snippets FROM pages WHERE url = ? AND extraction = ?",
+                (url, extraction)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "content_hash": row[2],
+            "snippets": json.loads(row[3])
+        }
+
+    def conditional_headers(self, entry):
+        """Request headers that let the server answer 304 Not Modified."""
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url: str, etag, last_modified, content_hash: str, extraction: str, snippets):
+        """Stores a freshly parsed page. Previous analysis results are dropped."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, content_hash, extraction, snippets, results_signature, results, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, ?)",
+                (url, etag, last_modified, content_hash, extraction, json.dumps(snippets), time.time())
+            )
+            self._db.execute(
+                "DELETE FROM pages WHERE url NOT IN (SELECT url FROM pages ORDER BY fetched_at DESC LIMIT ?)",
+                (self.max_pages,)
+            )
+            self._db.commit()
+            self.changed += 1
+
+    def touch(self, url: str, etag=None, last_modified=None, not_modified: bool = False):
+        """Records a successful revalidation, keeping the stored snippets."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE pages SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), fetched_at = ? WHERE url = ?",
+                (etag, last_modified, time.time(), url)
+            )
+            self._db.commit()
+            if not_modified:
+                self.not_modified += 1
+            else:
+                self.unchanged += 1
+
+    def get_results(self, url: str, content_hash: str, signature: str):
+        """Analysis results stored for this exact page content and analyzer, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT results FROM pages WHERE url = ? AND content_hash = ? AND results_signature = ?",
+                (url, content_hash, signature)
+            ).fetchone()
+        if not row or row[0] is None:
+            return None
+        self.result_hits += 1
+        return json.loads(row[0])
+
+    def put_results(self, url: str, content_hash: str, signature: str, results):
+        with self._lock:
+            self._db.execute(
+                "UPDATE pages SET results_signature = ?, results = ? WHERE url = ? AND content_hash = ?",
+                (signature, json.dumps(results), url, content_hash)
+            )
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            pages = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return {
+            "path": self.path,
+            "pages": pages,
+            "max_pages": self.max_pages,
+            "not_modified": self.not_modified,
+            "unchanged": self.unchanged,
+            "changed": self.changed,
+            "result_hits": self.result_hits
+        }
+
+def default_page_cache():
+    """
+    Builds the page cache unless EMOTIA_PAGE_CACHE=0.
+    Location and size come from EMOTIA_PAGE_CACHE_PATH and EMOTIA_PAGE_CACHE_SIZE.
+    """
+    if os.environ.get("EMOTIA_PAGE_CACHE", "1") == "0":
+        return None
+    path = os.environ.get(
+        "EMOTIA_PAGE_CACHE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".emotia_pages.sqlite3")
+    )
+    try:
+        return PageCache(path, int(os.environ.get("EMOTIA_PAGE_CACHE_SIZE", "1000")))
+    except sqlite3.Error as e:
+        logger.warning(f"Page cache disabled ({path}): {e}")
+        return None
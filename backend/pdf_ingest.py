@@ -0,0 +1,72 @@
+import itertools
+import logging
+import os
+from pypdf import PdfReader
+
+from segmenter import TARGET_TOKENS, iter_snippets
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Optional budgets for very large documents (0 = no limit)
+PDF_MAX_PAGES = int(os.environ.get("EMOTIA_PDF_MAX_PAGES", "0"))
+PDF_MAX_SNIPPETS = int(os.environ.get("EMOTIA_PDF_MAX_SNIPPETS", "0"))
+
+# Snippets handed to analyze_emotions at a time
+PDF_ANALYSIS_BATCH = 64
+
+def open_pdf(fileobj):
+    """
+    Opens a PDF from a file object without reading it into memory.
+    Starlette spools uploads to a temporary file on disk once they pass
+    1 MB, so UploadFile.file can be handed over directly.
+    """
+    fileobj.seek(0)
+    return PdfReader(fileobj)
+
+# Snippets must be longer than this many characters
+PDF_MIN_SNIPPET_LENGTH = 20
+
+def _page_texts(pages):
+    for number, page in enumerate(pages, start=1):
+        try:
+            with metrics.stage("pdf_extract"):
+                text = page.extract_text() or ""
+        except Exception as e:
+            logger.warning(f"Skipping PDF page {number}: {e}")
+            continue
+        # Sentences may continue on the next page
+        yield text + "\n"
+
+def iter_pdf_snippets(reader: PdfReader, max_pages: int = PDF_MAX_PAGES, max_snippets: int = PDF_MAX_SNIPPETS):
+    """
+    Lazily yields snippets one page at a time, so only the current page's
+    text is held in memory. Lines wrapped by the PDF layout are joined back
+    into sentences, across page breaks too; blank lines end a paragraph.
+    Stops at the page or snippet budget (0 = none).
+    Call it from a worker thread: text extraction is CPU-bound.
+    """
+    pages = reader.pages
+    if max_pages:
+        pages = itertools.islice(pages, max_pages)
+
+    snippets = iter_snippets(_page_texts(pages), min_length=PDF_MIN_SNIPPET_LENGTH, target_tokens=TARGET_TOKENS, split_lines=False)
+    if max_snippets:
+        snippets = itertools.islice(snippets, max_snippets)
+    yield from snippets
+
+def analyze_pdf(reader: PdfReader, analyze, batch_size: int = PDF_ANALYSIS_BATCH, **budget):
+    """
+    Runs `analyze` over the document's snippets in batches as pages are
+    extracted. Returns the list of analyzed items.
+    """
+    items = []
+    batch = []
+    for snippet in iter_pdf_snippets(reader, **budget):
+        batch.append(snippet)
+        if len(batch) >= batch_size:
+            items.extend(analyze(batch))
+            batch = []
+    if batch:
+        items.extend(analyze(batch))
+    return items
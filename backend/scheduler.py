@@ -0,0 +1,154 @@
+import threading
+import queue
+import time
+import logging
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+class InferenceScheduler:
+    """
+    Dynamic micro-batching worker for the emotion model.
+    Snippets submitted by concurrent requests are queued and a single worker
+    thread drains them into batches of up to `max_batch_size`, waiting at most
+    `max_wait_ms` for a batch to fill before running it.
+    Results are handed back through concurrent.futures.Future objects.
+    """
+
+    def __init__(self, classify_fn, max_batch_size: int = 32, max_wait_ms: float = 10):
+        self.classify_fn = classify_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._running = False
+        self._lock = threading.Lock()
+
+        # Statistics
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+        self._batch_sizes = {}
+
+    def start(self):
+        """Starts the worker thread (no-op if already running)."""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._worker, name="emotia-inference", daemon=True)
+            self._thread.start()
+        logger.info(f"Inference scheduler started (max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait * 1000:.0f})")
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Stops the worker thread after the queued items have been processed.
+        Items still queued when the worker is gone (or after `timeout`) fail.
+        """
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            self._queue.put(None)
+            thread = self._thread
+        thread.join(timeout)
+
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(RuntimeError("Inference scheduler stopped"))
+        if thread.is_alive():
+            # Still busy with a batch: let it exit once that is done
+            self._queue.put(None)
+
+    @property
+    def running(self):
+        return self._running
+
+    def submit(self, text: str):
+        """Queues one snippet and returns a Future for its raw model output."""
+        future = Future()
+        # Checked and queued under the lock, so nothing lands behind stop()'s sentinel
+        with self._lock:
+            if self._running:
+                self._queue.put((text, future))
+                return future
+        future.set_exception(RuntimeError("Inference scheduler is not running"))
+        return future
+
+    def classify(self, texts):
+        """
+        Queues all snippets and blocks until every result is available.
+        Returns the raw model outputs in the same order as `texts`.
+        """
+        futures = [self.submit(text) for text in texts]
+        return [future.result() for future in futures]
+
+    def stats(self):
+        """Returns queue depth and batch-size statistics."""
+        with self._lock:
+            batches = self._batches
+            items = self._items
+            return {
+                "running": self._running,
+                "queue_depth": self._queue.qsize(),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": batches,
+                "items": items,
+                "avg_batch_size": items / batches if batches else 0,
+                "largest_batch": self._largest_batch,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items()))
+            }
+
+    def _collect_batch(self, first):
+        """Gathers queued items behind `first` until the batch is full or the wait expires."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Stop signal: run what we have, then exit
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _worker(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = self._collect_batch(first)
+            # Skip requests whose caller already gave up
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                outputs = list(self.classify_fn([text for text, _ in batch], batch_size=len(batch)))
+                if len(outputs) != len(batch):
+                    # Never leave a caller waiting on a result that will not come
+                    raise RuntimeError(f"Batched inference returned {len(outputs)} results for {len(batch)} inputs")
+                for (_, future), output in zip(batch, outputs):
+                    future.set_result(output)
+            except Exception as e:
+                logger.error(f"Batched inference failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+
+            with self._lock:
+                size = len(batch)
+                self._batches += 1
+                self._items += size
+                self._largest_batch = max(self._largest_batch, size)
+                self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
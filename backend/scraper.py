@@ -1,12 +1,68 @@
-import re
+import hashlib
+import os
 import requests
-from bs4 import BeautifulSoup
+from extractor import extract_snippets, extraction_signature, charset_from_content_type
+from pagecache import default_page_cache
+import metrics
 
-def _split_into_sentences(text: str):
-    """Break long text into bite-sized sentences for better visualization."""
-    sentences = re.split(r"(?<=[.!?])\s+", text)
-    return [sentence.strip() for sentence in sentences if len(sentence.strip()) > 20]
+# Mimic a real browser to avoid basic bot detection
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
 
+# Stop downloading after this many bytes; the rest of a huge page is rarely content
+MAX_RESPONSE_BYTES = int(os.environ.get("EMOTIA_MAX_RESPONSE_BYTES", str(5 * 1024 * 1024)))
+
+# Conditional re-fetching of pages we have seen before (see pagecache.py)
+page_cache = default_page_cache()
+
+def _read_capped(response, max_bytes: int):
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_bytes:
+            break
+    return b"".join(chunks)[:max_bytes]
+
+def scrape_page(url: str, max_bytes: int = MAX_RESPONSE_BYTES):
+    """
+    Fetches the URL, revalidating against the page cache, and extracts its snippets.
+    Returns a dict with the snippets, the content hash of the body and the
+    cache outcome: "not_modified" (server answered 304), "unchanged" (same
+    body hash), "miss" (parsed fresh) or "disabled". Snippets cached under
+    other extraction settings are never reused.
+    """
+    signature = extraction_signature()
+    entry = page_cache.get(url, signature) if page_cache else None
+    headers = dict(HEADERS)
+    if entry:
+        headers.update(page_cache.conditional_headers(entry))
+
+    with metrics.stage("fetch"), requests.get(url, headers=headers, timeout=10, stream=True) as response:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        # requests assumes latin-1 for text/* without a charset, so read the header itself
+        charset = charset_from_content_type(response.headers.get("Content-Type"))
+
+        if response.status_code == 304 and entry:
+            page_cache.touch(url, etag, last_modified, not_modified=True)
+            return {"snippets": entry["snippets"], "content_hash": entry["content_hash"], "cache": "not_modified"}
+
+        response.raise_for_status()
+        body = _read_capped(response, max_bytes)
+
+    content_hash = hashlib.sha256(body).hexdigest()
+    if entry and entry["content_hash"] == content_hash:
+        page_cache.touch(url, etag, last_modified)
+        return {"snippets": entry["snippets"], "content_hash": content_hash, "cache": "unchanged"}
+
+    with metrics.stage("parse"):
+        snippets = extract_snippets(body, encoding=charset)
+    if page_cache and snippets:
+        page_cache.put(url, etag, last_modified, content_hash, signature, snippets)
+    return {"snippets": snippets, "content_hash": content_hash, "cache": "miss" if page_cache else "disabled"}
 
 def scrape_url(url: str):
     """
@@ -14,48 +70,7 @@ def scrape_url(url: str):
     Returns a list of strings.
     """
     try:
-        # Mimic a real browser to avoid basic bot detection
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Clean up the DOM - remove non-content elements
-        for tag in soup(["script", "style", "nav", "footer", "header", "noscript"]):
-            tag.decompose()
-            
-        text_elements = []
-        seen = set()
-        
-        # Target likely content containers
-        # We want meaningful chunks of text, not just menu items
-        targets = ['p', 'h1', 'h2', 'h3', 'blockquote', 'li', 'article']
-        
-        for tag in soup.find_all(targets):
-            text = tag.get_text(" ", strip=True)
-
-            # Filter out noise: very short strings are usually navigation or UI labels
-            if len(text) <= 15:
-                continue
-
-            # Split very long paragraphs into sentences to create more data points
-            if len(text) > 180:
-                sentences = _split_into_sentences(text)
-                for sentence in sentences:
-                    if sentence not in seen:
-                        text_elements.append(sentence)
-                        seen.add(sentence)
-            else:
-                if text not in seen:
-                    text_elements.append(text)
-                    seen.add(text)
-                
-        # Return a manageable subset to keep the visualization performant
-        return text_elements[:80]
+        return scrape_page(url)["snippets"]
         
     except Exception as e:
         print(f"Scraping failed for {url}: {e}")
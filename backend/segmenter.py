@@ -0,0 +1,196 @@
+import os
+import re
+
+# Words that end in a period without ending the sentence
+ABBREVIATIONS = {
+    "e.g", "i.e", "cf", "vs", "approx", "mr", "mrs", "ms", "dr", "prof", "sr",
+    "jr", "mt", "fig", "vol", "inc", "ltd", "corp", "dept",
+    "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+    "a.m", "p.m", "u.s", "u.k"
+}
+
+# Abbreviations and initials that are also ordinary words ("I said no.",
+# "Neither did I.", "Plan A."). They only hold a sentence together when the
+# next word starts lowercase or with a digit ("No. 5", "co. ltd").
+AMBIGUOUS_ABBREVIATIONS = {"no", "co", "st", "i", "a"}
+
+# Sentence-ending punctuation (plus closing quotes/brackets) followed by whitespace
+_SENTENCE_END = r"[.!?…]+[\"'”’)\]]*(?=\s)"
+_LINE_BOUNDARY = re.compile(_SENTENCE_END + r"|\n")
+_PARAGRAPH_BOUNDARY = re.compile(_SENTENCE_END + r"|\n[^\S\n]*\n")
+_WHITESPACE = re.compile(r"\s+")
+_NEXT_WORD = re.compile(r"\s*([^\s\"'“‘(\[])")
+# Characters that may belong to a boundary not complete at the end of a chunk
+_BOUNDARY_CHARS = set(".!?…\"'”’)]")
+
+# Rough characters-per-token ratio of the model's BPE tokenizer
+CHARS_PER_TOKEN = 4
+
+# The model reads at most this many tokens; longer snippets are split
+# instead of silently truncated
+MODEL_MAX_TOKENS = 512
+
+# Ingestion paths merge consecutive short sentences up to about this many
+# tokens (EMOTIA_TARGET_TOKENS, 0 = one snippet per sentence)
+TARGET_TOKENS = int(os.environ.get("EMOTIA_TARGET_TOKENS", "0")) or None
+
+STREAM_CHUNK_SIZE = 64 * 1024
+# A streamed sentence longer than this is cut at its last space instead of
+# being carried (and rescanned) indefinitely; it is split up anyway
+MAX_CARRY = 4 * STREAM_CHUNK_SIZE
+
+def _is_abbreviation(text: str, start: int, end: int, final: bool = True):
+    """
+    True when the period at text[end - 1] belongs to an abbreviation or an
+    initial. None when that depends on a next word not in `text` yet
+    (only with final=False).
+    """
+    if text[end - 1] != ".":
+        return False
+    # Look back only as far as the previous whitespace
+    word_start = max(text.rfind(" ", start, end), text.rfind("\n", start, end)) + 1
+    word = text[word_start:end - 1].lower().lstrip("(\"'“")
+    if word not in AMBIGUOUS_ABBREVIATIONS:
+        return word in ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+    match = _NEXT_WORD.match(text, end)
+    if not match:
+        return False if final else None
+    return match.group(1).islower() or match.group(1).isdigit()
+
+def _spans(text: str, boundaries, final: bool, scan_from: int = 0):
+    """
+    Yields (start, end) spans of sentences in `text` without copying it,
+    looking for boundaries from `scan_from` on.
+    With final=False the trailing, possibly incomplete sentence is not
+    yielded; StopIteration returns (its start offset, the offset to resume
+    scanning from once more text is appended).
+    """
+    start = 0
+    resume = None
+    for match in boundaries.finditer(text, scan_from):
+        end = match.end()
+        if match.group().strip():
+            abbreviation = _is_abbreviation(text, start, end, final)
+            if abbreviation is None:
+                # Decided by the next chunk
+                resume = match.start()
+                break
+            if abbreviation:
+                continue
+        yield start, end
+        start = end
+    if final:
+        yield start, len(text)
+    if resume is None:
+        # Punctuation or whitespace at the very end may still become a boundary
+        resume = len(text)
+        while resume > start and (text[resume - 1] in _BOUNDARY_CHARS or text[resume - 1].isspace()):
+            resume -= 1
+    return start, resume
+
+def _iter_sentences(source, split_lines: bool):
+    """Yields raw sentences from a string, a text stream or an iterable of strings."""
+    boundaries = _LINE_BOUNDARY if split_lines else _PARAGRAPH_BOUNDARY
+
+    if isinstance(source, str):
+        for start, end in _spans(source, boundaries, final=True):
+            yield source[start:end]
+        return
+
+    if hasattr(source, "read"):
+        chunks = iter(lambda: source.read(STREAM_CHUNK_SIZE), "")
+    else:
+        chunks = source
+
+    carry = ""
+    # Where the carry still needs scanning: never rescan text without a boundary
+    scan_from = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer = carry + chunk
+        spans = _spans(buffer, boundaries, final=False, scan_from=scan_from)
+        while True:
+            try:
+                start, end = next(spans)
+            except StopIteration as stop:
+                start, resume = stop.value
+                carry = buffer[start:]
+                scan_from = resume - start
+                break
+            yield buffer[start:end]
+        if len(carry) > MAX_CARRY:
+            cut = max(carry.rfind(" ", 0, scan_from), carry.rfind("\n", 0, scan_from)) + 1 or scan_from
+            if cut:
+                yield carry[:cut]
+                carry = carry[cut:]
+                scan_from -= cut
+    if carry:
+        yield carry
+
+def _split_long(sentence: str, max_length: int):
+    """Splits a sentence longer than max_length at the last space before the limit."""
+    while len(sentence) > max_length:
+        cut = sentence.rfind(" ", 0, max_length + 1)
+        if cut <= 0:
+            cut = max_length
+        yield sentence[:cut].rstrip()
+        sentence = sentence[cut:].lstrip()
+    if sentence:
+        yield sentence
+
+def _merge_short(sentences, max_length: int):
+    """Joins consecutive sentences while they fit in max_length."""
+    pending = ""
+    for sentence in sentences:
+        if not pending:
+            pending = sentence
+        elif len(pending) + 1 + len(sentence) <= max_length:
+            pending = f"{pending} {sentence}"
+        else:
+            yield pending
+            pending = sentence
+    if pending:
+        yield pending
+
+def iter_snippets(source, min_length: int = 2, max_length: int = None, target_tokens: int = None, split_lines: bool = True):
+    """
+    Shared sentence segmenter for every ingestion path.
+    `source` is a string, a text stream (anything with .read) or an
+    iterable of text chunks such as PDF pages; snippets are yielded as soon
+    as they are complete, without materializing the whole text.
+
+    Sentences end at . ! ? or ... followed by whitespace, except after
+    common abbreviations (e.g., Dr., etc.) and initials, so decimals and
+    "e.g." no longer break snippets. Abbreviations that are also words
+    (No., St., I., A.) only continue the sentence before a lowercase word
+    or a digit. With split_lines=True every newline is
+    a boundary too; otherwise only blank lines are, and wrapped lines are
+    joined (PDFs).
+
+    Snippets are whitespace-normalized and kept only if longer than
+    `min_length` characters. Longer than `max_length` ones are split at
+    word boundaries. With `target_tokens`, consecutive short sentences are
+    merged up to roughly that many model tokens (and max_length defaults
+    to the same size, otherwise to the model's MODEL_MAX_TOKENS).
+    """
+    target_length = target_tokens * CHARS_PER_TOKEN if target_tokens else None
+    max_length = max_length or target_length or MODEL_MAX_TOKENS * CHARS_PER_TOKEN
+
+    sentences = (
+        _WHITESPACE.sub(" ", sentence).strip()
+        for sentence in _iter_sentences(source, split_lines)
+    )
+    sentences = (sentence for sentence in sentences if sentence)
+    if target_length:
+        sentences = _merge_short(sentences, target_length)
+
+    for sentence in sentences:
+        pieces = _split_long(sentence, max_length) if max_length else (sentence,)
+        for piece in pieces:
+            if len(piece) > min_length:
+                yield piece
+
+def split_snippets(source, **options):
+    """List form of iter_snippets."""
+    return list(iter_snippets(source, **options))
@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+def new_analysis_id():
+    return uuid.uuid4().hex
+
+def project(items, fields=None):
+    """Keeps only the requested keys of each item."""
+    if not fields:
+        return items
+    return [{key: item[key] for key in fields if key in item} for item in items]
+
+class ResultStore:
+    """
+    Interface for analysis result stores.
+    Every analysis gets its own ID; a session (any client-chosen string)
+    remembers its latest analysis so /items can find it.
+    """
+    name = "base"
+
+    def save(self, items, session=None):
+        """Stores a finished analysis and returns its ID."""
+        raise NotImplementedError
+
+    def page(self, analysis_id: str, offset: int = 0, limit=None):
+        """Returns (items, total) for a slice of an analysis, or None if it is gone."""
+        raise NotImplementedError
+
+    def latest(self, session=None):
+        """ID of the latest analysis of `session` (or of anyone, without one)."""
+        raise NotImplementedError
+
+    def delete(self, analysis_id: str):
+        raise NotImplementedError
+
+    def stats(self):
+        return {"backend": self.name}
+
+class MemoryStore(ResultStore):
+    """
+    In-process store with a TTL and size-based eviction.
+    Analyses expire `ttl` seconds after they were stored; beyond
+    `max_analyses` analyses or `max_items` stored items in total, the least
+    recently used analyses are evicted first.
+    """
+    name = "memory"
+
+    def __init__(self, ttl: float = 3600, max_analyses: int = 100, max_items: int = 100000):
+        self.ttl = ttl
+        self.max_analyses = max(1, int(max_analyses))
+        self.max_items = max(1, int(max_items))
+        self._analyses = OrderedDict()
+        self._sessions = {}
+        self._latest = None
+        self._item_count = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def save(self, items, session=None):
+        analysis_id = new_analysis_id()
+        items = list(items)
+        with self._lock:
+            self._analyses[analysis_id] = (time.monotonic() + self.ttl, items)
+            self._item_count += len(items)
+            self._latest = analysis_id
+            if session:
+                self._sessions[session] = analysis_id
+            self._evict()
+        return analysis_id
+
+    def page(self, analysis_id: str, offset: int = 0, limit=None):
+        with self._lock:
+            self._expire()
+            entry = self._analyses.get(analysis_id)
+            if entry is None:
+                return None
+            self._analyses.move_to_end(analysis_id)
+            items = entry[1]
+            end = len(items) if limit is None else offset + limit
+            return items[offset:end], len(items)
+
+    def latest(self, session=None):
+        with self._lock:
+            analysis_id = self._sessions.get(session) if session else self._latest
+            return analysis_id if analysis_id in self._analyses else None
+
+    def delete(self, analysis_id: str):
+        with self._lock:
+            self._drop(analysis_id)
+
+    def stats(self):
+        with self._lock:
+            self._expire()
+            return {
+                "backend": self.name,
+                "analyses": len(self._analyses),
+                "items": self._item_count,
+                "sessions": len(self._sessions),
+                "max_analyses": self.max_analyses,
+                "max_items": self.max_items,
+                "ttl_seconds": self.ttl,
+                "evictions": self.evictions
+            }
+
+    def _drop(self, analysis_id):
+        entry = self._analyses.pop(analysis_id, None)
+        if entry is not None:
+            self._item_count -= len(entry[1])
+        for session in [s for s, a in self._sessions.items() if a == analysis_id]:
+            del self._sessions[session]
+
+    def _expire(self):
+        now = time.monotonic()
+        for analysis_id in [a for a, (expires, _) in self._analyses.items() if expires <= now]:
+            self._drop(analysis_id)
+            self.evictions += 1
+
+    def _evict(self):
+        self._expire()
+        # Never evict the analysis that was just stored
+        while len(self._analyses) > 1 and (
+            len(self._analyses) > self.max_analyses or self._item_count > self.max_items
+        ):
+            oldest = next(iter(self._analyses))
+            self._drop(oldest)
+            self.evictions += 1
+
+class RedisStore(ResultStore):
+    """
+    Store backed by Redis or any Redis-compatible server (Valkey, KeyDB...),
+    so every uvicorn worker sees the same analyses. Items are kept in a
+    Redis list per analysis, so pages are fetched with LRANGE and expiry is
+    left to Redis (EXPIRE). A length key next to the list marks the
+    analysis as stored, since Redis has no empty lists.
+    Requires the `redis` package (requirements-redis.txt) unless a client
+    is passed in.
+    """
+    name = "redis"
+
+    def __init__(self, url: str = None, ttl: float = 3600, prefix: str = "emotia", client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    def _key(self, *parts):
+        return ":".join((self.prefix,) + parts)
+
+    def save(self, items, session=None):
+        analysis_id = new_analysis_id()
+        key = self._key("analysis", analysis_id)
+        pipe = self.client.pipeline()
+        encoded = [json.dumps(item) for item in items]
+        # Large analyses are pushed in chunks to keep single commands small
+        for start in range(0, len(encoded), 1000):
+            pipe.rpush(key, *encoded[start:start + 1000])
+        pipe.expire(key, self.ttl)
+        pipe.set(self._key("length", analysis_id), len(encoded), ex=self.ttl)
+        pipe.set(self._key("latest"), analysis_id, ex=self.ttl)
+        if session:
+            pipe.set(self._key("session", session), analysis_id, ex=self.ttl)
+        pipe.execute()
+        return analysis_id
+
+    def page(self, analysis_id: str, offset: int = 0, limit=None):
+        pipe = self.client.pipeline()
+        pipe.get(self._key("length", analysis_id))
+        pipe.lrange(self._key("analysis", analysis_id), offset, -1 if limit is None else offset + limit - 1)
+        total, rows = pipe.execute()
+        if total is None:
+            return None
+        return [json.loads(row) for row in rows], int(total)
+
+    def latest(self, session=None):
+        key = self._key("session", session) if session else self._key("latest")
+        analysis_id = self.client.get(key)
+        return analysis_id.decode() if analysis_id else None
+
+    def delete(self, analysis_id: str):
+        self.client.delete(self._key("analysis", analysis_id), self._key("length", analysis_id))
+
+    def stats(self):
+        return {"backend": self.name, "ttl_seconds": self.ttl}
+
+def default_store():
+    """
+    Builds the store selected by EMOTIA_STORE: "memory" (default) or a
+    redis:// URL. Limits come from EMOTIA_STORE_TTL, EMOTIA_STORE_MAX_ANALYSES
+    and EMOTIA_STORE_MAX_ITEMS.
+    """
+    backend = os.environ.get("EMOTIA_STORE", "memory")
+    ttl = float(os.environ.get("EMOTIA_STORE_TTL", "3600"))
+    if backend.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            return RedisStore(backend, ttl)
+        except ImportError:
+            logger.error("EMOTIA_STORE points at Redis but the redis package is not installed. Using the in-memory store.")
+    return MemoryStore(
+        ttl,
+        int(os.environ.get("EMOTIA_STORE_MAX_ANALYSES", "100")),
+        int(os.environ.get("EMOTIA_STORE_MAX_ITEMS", "100000"))
+    )
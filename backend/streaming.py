@@ -0,0 +1,88 @@
+import json
+import logging
+import time
+from analyzer import analyze_emotions
+from summarize import AnalysisSummary, MAX_PARTICLES
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# The first batch is small so the first particles show up quickly,
+# later batches grow up to STREAM_MAX_BATCH for throughput.
+STREAM_FIRST_BATCH = 4
+STREAM_MAX_BATCH = 32
+
+def wants_sse(accept: str = None, format: str = None):
+    """Server-Sent Events when asked for explicitly, NDJSON otherwise."""
+    if format:
+        return format == "sse"
+    return bool(accept) and SSE_MEDIA_TYPE in accept
+
+def encode_event(event: dict, sse: bool = False):
+    payload = json.dumps(event)
+    if sse:
+        return f"event: {event['type']}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+def batched(snippets, first: int = STREAM_FIRST_BATCH, largest: int = STREAM_MAX_BATCH):
+    """Yields lists of snippets in batches that double in size up to `largest`."""
+    size = first
+    batch = []
+    for snippet in snippets:
+        batch.append(snippet)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+            size = min(size * 2, largest)
+    if batch:
+        yield batch
+
+def stream_analysis(snippets, sse: bool = False, on_complete=None, analyze=analyze_emotions, max_particles: int = MAX_PARTICLES):
+    """
+    Analyzes snippets batch by batch and yields one "items" event per batch,
+    then a final "summary" event with the aggregate "stats" (see
+    summarize.py). `snippets` may be any iterable, including a lazy
+    generator. `on_complete` receives the full list of analyzed items and
+    may return a dict of extra summary fields.
+    Once `max_particles` items were sent, later batches only send a
+    "progress" event, and the summary carries weighted representative
+    "particles" for the whole analysis instead.
+    Errors after the stream started are reported as an "error" event.
+    """
+    start = time.perf_counter()
+    items = []
+    summary = AnalysisSummary()
+    try:
+        for batch in batched(snippets):
+            analyzed = analyze(batch)
+            summary.add(analyzed)
+            offset = len(items)
+            items.extend(analyzed)
+            if not max_particles or offset < max_particles:
+                yield encode_event({"type": "items", "offset": offset, "items": analyzed}, sse)
+            else:
+                yield encode_event({"type": "progress", "count": len(items)}, sse)
+    except Exception as e:
+        logger.error(f"Streaming analysis failed: {e}")
+        yield encode_event({"type": "error", "detail": str(e), "count": len(items)}, sse)
+        return
+
+    stats = summary.to_dict()
+    event = {
+        "type": "summary",
+        "message": "Analysis complete",
+        "count": len(items),
+        "emotions": stats["emotions"],
+        "stats": stats,
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+    if max_particles and len(items) > max_particles:
+        event["particles"] = summary.particles(max_particles)
+        event["downsampled"] = True
+    if on_complete:
+        # Whatever on_complete returns (e.g. the analysis ID) joins the summary
+        event.update(on_complete(items) or {})
+
+    yield encode_event(event, sse)
@@ -0,0 +1,185 @@
+"""
+Server-side aggregation of analysis results.
+
+AnalysisSummary is fed the results batch by batch (in document order) and
+keeps, in NumPy arrays:
+
+  * a score histogram per emotion (SCORE_BINS bins over 0..1), which also
+    gives the emotion counts and mean scores,
+  * a timeline over document position: per-bucket emotion counts and score
+    sums. Buckets start one snippet wide and double in width whenever there
+    are more than 2 * TIMELINE_BUCKETS of them, so memory stays bounded
+    without knowing the length up front,
+  * evenly spaced samples of every (emotion, score bin) cell, kept the same
+    way (every stride-th item, stride doubling when the cell's sample is full).
+
+particles() turns the samples into at most about MAX_PARTICLES
+representative items, allocated to cells in proportion to their size. Each
+carries a `weight` (how many snippets it stands for; the weights of a cell
+add up to its count) and its `position` in the document, so big analyses
+can be drawn without sending every item to the browser.
+"""
+import os
+
+import numpy as np
+
+from columnar import EMOTIONS
+
+SCORE_BINS = 10
+TIMELINE_BUCKETS = 50
+
+# Analyses with more items than this are downsampled to weighted particles.
+# 0 disables downsampling.
+MAX_PARTICLES = int(os.environ.get("EMOTIA_MAX_PARTICLES", "300"))
+
+class AnalysisSummary:
+    """Histograms, timeline and per-cell samples of one analysis, built batch by batch."""
+
+    def __init__(self, timeline_buckets: int = TIMELINE_BUCKETS, samples_per_cell: int = None):
+        self.emotions = list(EMOTIONS)
+        self._codes = {emotion: code for code, emotion in enumerate(self.emotions)}
+        self.count = 0
+        self.timeline_buckets = max(1, int(timeline_buckets))
+        self.bucket_width = 1
+        self.samples_per_cell = max(1, int(samples_per_cell or MAX_PARTICLES or 1))
+
+        emotions = len(self.emotions)
+        self.score_hist = np.zeros((emotions, SCORE_BINS), dtype=np.int64)
+        self.score_sum = np.zeros(emotions)
+        self.timeline_counts = np.zeros((0, emotions), dtype=np.int64)
+        self.timeline_scores = np.zeros(0)
+        self._cell_seen = np.zeros(emotions * SCORE_BINS, dtype=np.int64)
+        self._cell_stride = np.ones(emotions * SCORE_BINS, dtype=np.int64)
+        self._samples = {}
+
+    def _code(self, emotion):
+        code = self._codes.get(emotion)
+        if code is None:
+            code = self._codes[emotion] = len(self.emotions)
+            self.emotions.append(emotion)
+        return code
+
+    def _grow(self):
+        """Makes room for emotions that are not in the default table."""
+        extra = len(self.emotions) - self.score_hist.shape[0]
+        if extra <= 0:
+            return
+        self.score_hist = np.pad(self.score_hist, ((0, extra), (0, 0)))
+        self.score_sum = np.pad(self.score_sum, (0, extra))
+        self.timeline_counts = np.pad(self.timeline_counts, ((0, 0), (0, extra)))
+        self._cell_seen = np.pad(self._cell_seen, (0, extra * SCORE_BINS))
+        self._cell_stride = np.pad(self._cell_stride, (0, extra * SCORE_BINS), constant_values=1)
+
+    def _coarsen(self):
+        """Merges neighbouring timeline buckets, doubling their width."""
+        rows = self.timeline_counts.shape[0]
+        if rows % 2:
+            self.timeline_counts = np.pad(self.timeline_counts, ((0, 1), (0, 0)))
+            self.timeline_scores = np.pad(self.timeline_scores, (0, 1))
+        self.timeline_counts = self.timeline_counts.reshape(-1, 2, self.timeline_counts.shape[1]).sum(axis=1)
+        self.timeline_scores = self.timeline_scores.reshape(-1, 2).sum(axis=1)
+        self.bucket_width *= 2
+
+    def add(self, items):
+        """Adds the next results in document order."""
+        n = len(items)
+        if not n:
+            return
+        codes = np.fromiter((self._code(item.get("emotion") or "neutral") for item in items), dtype=np.int64, count=n)
+        self._grow()
+        scores = np.clip(np.fromiter((float(item.get("score") or 0) for item in items), dtype=np.float64, count=n), 0, 1)
+        bins = np.minimum((scores * SCORE_BINS).astype(np.int64), SCORE_BINS - 1)
+        positions = np.arange(self.count, self.count + n)
+
+        np.add.at(self.score_hist, (codes, bins), 1)
+        self.score_sum += np.bincount(codes, weights=scores, minlength=len(self.emotions))
+
+        # Timeline
+        while (self.count + n - 1) // self.bucket_width + 1 > 2 * self.timeline_buckets:
+            self._coarsen()
+        buckets = positions // self.bucket_width
+        rows = int(buckets[-1]) + 1
+        if rows > self.timeline_counts.shape[0]:
+            grow = rows - self.timeline_counts.shape[0]
+            self.timeline_counts = np.pad(self.timeline_counts, ((0, grow), (0, 0)))
+            self.timeline_scores = np.pad(self.timeline_scores, (0, grow))
+        np.add.at(self.timeline_counts, (buckets, codes), 1)
+        self.timeline_scores += np.bincount(buckets, weights=scores, minlength=self.timeline_scores.shape[0])
+
+        # Index of each item within its cell, counting earlier batches
+        cells = codes * SCORE_BINS + bins
+        order = np.argsort(cells, kind="stable")
+        sorted_cells = cells[order]
+        starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+        rank = np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+        local = np.empty(n, dtype=np.int64)
+        local[order] = self._cell_seen[sorted_cells] + rank
+        np.add.at(self._cell_seen, cells, 1)
+
+        for index in np.flatnonzero(local % self._cell_stride[cells] == 0):
+            cell = int(cells[index])
+            # The stride may have doubled earlier in this batch
+            if local[index] % self._cell_stride[cell]:
+                continue
+            samples = self._samples.setdefault(cell, [])
+            samples.append((int(positions[index]), items[index]))
+            if len(samples) >= 2 * self.samples_per_cell:
+                del samples[1::2]
+                self._cell_stride[cell] *= 2
+
+        self.count += n
+
+    def to_dict(self):
+        """Histograms, counts, mean scores and the timeline, JSON-ready."""
+        counts = self.score_hist.sum(axis=1)
+        present = [code for code in range(len(self.emotions)) if counts[code]]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            bucket_sizes = self.timeline_counts.sum(axis=1)
+            timeline_means = np.where(bucket_sizes > 0, self.timeline_scores / np.maximum(bucket_sizes, 1), 0)
+        return {
+            "count": self.count,
+            "emotions": {self.emotions[code]: int(counts[code]) for code in present},
+            "mean_score": {self.emotions[code]: round(float(self.score_sum[code] / counts[code]), 4) for code in present},
+            "overall_mean_score": round(float(self.score_sum.sum() / self.count), 4) if self.count else None,
+            "score_histogram": {
+                "edges": np.round(np.linspace(0, 1, SCORE_BINS + 1), 2).tolist(),
+                "counts": {self.emotions[code]: self.score_hist[code].tolist() for code in present}
+            },
+            "timeline": {
+                "bucket_size": self.bucket_width,
+                "counts": {self.emotions[code]: self.timeline_counts[:, code].tolist() for code in present},
+                "mean_score": np.round(timeline_means, 4).tolist()
+            }
+        }
+
+    def particles(self, budget: int = MAX_PARTICLES):
+        """
+        About `budget` representative items (one or more per non-empty
+        cell), each with `weight` and `position`, in document order.
+        """
+        cell_counts = self.score_hist.ravel()
+        particles = []
+        for cell, samples in self._samples.items():
+            total = int(cell_counts[cell])
+            share = max(1, min(len(samples), int(budget * total / self.count)))
+            picks = np.unique(np.linspace(0, len(samples) - 1, share).round().astype(np.int64))
+            # Split the cell's count as evenly as possible over its picks
+            weights = np.full(len(picks), total // len(picks))
+            weights[:total % len(picks)] += 1
+            for pick, weight in zip(picks, weights):
+                position, item = samples[pick]
+                particles.append({**item, "weight": int(weight), "position": position})
+        particles.sort(key=lambda particle: particle["position"])
+        return particles
+
+def summarize(items, max_particles: int = MAX_PARTICLES):
+    """
+    Summary of a finished analysis. Returns (stats, particles); particles
+    is None when there are no more than `max_particles` items (or
+    downsampling is off), meaning the items can be sent as they are.
+    """
+    summary = AnalysisSummary()
+    summary.add(items)
+    if not max_particles or summary.count <= max_particles:
+        return summary.to_dict(), None
+    return summary.to_dict(), summary.particles(max_particles)
@@ -0,0 +1,133 @@
+from contextlib import contextmanager
+from unittest import mock
+
+import analyzer
+from cache import EmotionCache
+from translation import StubTranslator, TranslationStage
+
+class FakeClassifier:
+    """Pipeline stand-in: joy for texts mentioning "happy", sadness otherwise. Records every call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, batch_size=None, truncation=None):
+        self.calls.append((list(texts), batch_size))
+        return [
+            [{"label": "joy", "score": 0.9}, {"label": "sadness", "score": 0.1}] if "happy" in text
+            else [{"label": "joy", "score": 0.2}, {"label": "sadness", "score": 0.8}]
+            for text in texts
+        ]
+
+@contextmanager
+def loaded_model(classifier):
+    """Runs the analyzer on `classifier`, without the result cache or a real translator."""
+    state = analyzer.model_state
+    analyzer.model_state = "ready"
+    try:
+        with mock.patch.object(analyzer, "load_model", lambda: classifier), \
+                mock.patch.object(analyzer, "result_cache", None), \
+                mock.patch.object(analyzer, "inference_scheduler", None), \
+                mock.patch.object(analyzer, "translation_stage", TranslationStage(StubTranslator())):
+            yield
+    finally:
+        analyzer.model_state = state
+
+def test_batched_analysis_keeps_order_in_one_pass():
+    classifier = FakeClassifier()
+    texts = [f"Snippet {i} is {'happy' if i % 3 else 'gloomy'} today." for i in range(10)]
+    with loaded_model(classifier):
+        results = analyzer.analyze_emotions(texts, batch_size=4, cascade=False, dedup=False)
+
+    assert [result["text"] for result in results] == texts
+    assert [result["emotion"] for result in results] == ["joy" if i % 3 else "sadness" for i in range(10)]
+    assert all(result["method"] == "ai_transformer" for result in results)
+    # One padded, batched call for every snippet instead of one call per snippet
+    assert classifier.calls == [(texts, 4)]
+
+def test_cascade_escalates_below_the_threshold():
+    strong = "I am so happy and glad, what a wonderful great day!"  # keyword score 1.0
+    weak = "This is happy."  # keyword score 0.9
+    neutral = "The meeting is at noon."  # no keyword, neutral sentiment
+
+    classifier = FakeClassifier()
+    with loaded_model(classifier):
+        results = analyzer.analyze_emotions([strong, weak, neutral], cascade=True, threshold=0.95, dedup=False)
+    assert [result["tier"] for result in results] == ["keyword", "transformer", "transformer"]
+    assert [texts for texts, _ in classifier.calls] == [[weak, neutral]]
+
+    classifier = FakeClassifier()
+    with loaded_model(classifier):
+        results = analyzer.analyze_emotions([strong, weak, neutral], cascade=True, threshold=0.5, dedup=False)
+    assert [result["tier"] for result in results] == ["keyword", "keyword", "transformer"]
+    assert [texts for texts, _ in classifier.calls] == [[neutral]]
+
+def test_lazy_load_counts_as_ready():
+    state, warm = analyzer.model_state, analyzer.model_warm
+    try:
+        analyzer.model_warm = False
+        analyzer.model_state = "loading"
+        assert not analyzer.is_ready()
+        # EMOTIA_WARMUP=0: the first request loaded the model, no warm-up ran
+        analyzer.model_state = "ready"
+        assert analyzer.is_ready()
+    finally:
+        analyzer.model_state, analyzer.model_warm = state, warm
+
+def test_unloaded_model_is_ready_without_warmup():
+    state, warm = analyzer.model_state, analyzer.model_warm
+    try:
+        analyzer.model_warm = False
+        analyzer.model_state = "unloaded"
+        assert not analyzer.is_ready()
+        # Nothing loads the model until the first request, so /ready must let it through
+        assert analyzer.is_ready(warmup=False)
+    finally:
+        analyzer.model_state, analyzer.model_warm = state, warm
+
+def test_failed_load_caches_fallbacks_under_the_fallback_id():
+    state = analyzer.model_state
+
+    def failing_load():
+        analyzer.model_state = "unavailable"
+        return None
+
+    cache = EmotionCache(analyzer.result_model_id, analyzer.ANALYZER_VERSION)
+    try:
+        analyzer.model_state = "unloaded"
+        transformer_id = analyzer.result_model_id(False, 0.6)
+        with mock.patch.object(analyzer, "result_cache", cache), \
+                mock.patch.object(analyzer, "translation_stage", TranslationStage(StubTranslator())), \
+                mock.patch.object(analyzer, "load_model", failing_load):
+            [result] = analyzer.analyze_emotions(["What a wonderful happy day!"], cascade=False, dedup=False)
+
+        assert result["method"] != "ai_transformer"
+        assert cache.get("What a wonderful happy day!", transformer_id) is None
+        assert cache.get("What a wonderful happy day!", "fallback") is not None
+    finally:
+        analyzer.model_state = state
+
+def test_results_signature_skips_failed_inference():
+    state = analyzer.model_state
+    try:
+        analyzer.model_state = "ready"
+        fallback = {"text": "x", "emotion": "joy", "score": 0.5, "method": "keyword_fallback"}
+        assert analyzer.results_signature([fallback]) is None
+        assert analyzer.results_signature([dict(fallback, tier="keyword")]) == analyzer.result_signature()
+
+        analyzer.model_state = "unavailable"
+        assert analyzer.results_signature([fallback]) == f"fallback@{analyzer.ANALYZER_VERSION}"
+    finally:
+        analyzer.model_state = state
+
+def test_near_duplicates_share_one_analysis():
+    classifier = FakeClassifier()
+    texts = ["Posted by john 3 hours ago", "So happy with this!", "Posted by mary 5 hours ago", "Posted by Ann 1 day ago"]
+    with loaded_model(classifier):
+        results = analyzer.analyze_emotions(texts, cascade=False, dedup=True)
+
+    assert [texts for texts, _ in classifier.calls] == [[texts[0], texts[1]]]
+    # Every member keeps its own text and carries its group's size
+    assert [result["text"] for result in results] == texts
+    assert [result["group_size"] for result in results] == [3, 1, 3, 3]
+    assert results[2]["emotion"] == results[0]["emotion"]
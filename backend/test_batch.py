@@ -0,0 +1,54 @@
+import json
+from unittest import mock
+
+import pytest
+
+import analyzer
+import batch
+
+def fake_analyze(texts, *args, **kwargs):
+    return [{"text": text, "emotion": "joy", "score": 0.5, "method": "keyword_fallback"} for text in texts]
+
+@pytest.fixture
+def corpus(tmp_path):
+    inputs = tmp_path / "docs"
+    inputs.mkdir()
+    for i in range(4):
+        (inputs / f"doc{i}.txt").write_text(f"Document {i} starts here. It has a second sentence.\n", encoding="utf-8")
+    return inputs
+
+def run_cli(*argv):
+    with mock.patch.object(analyzer, "analyze_emotions", fake_analyze):
+        batch.main([*map(str, argv), "--workers", "0", "--progress-every", "0"])
+
+def read_rows(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+def test_resume_from_checkpoint(tmp_path, corpus, capsys):
+    output = tmp_path / "results.jsonl"
+    run_cli(corpus, "-o", output)
+    full = read_rows(output)
+    assert len(full) == 8
+
+    # A job killed after the second document: two checkpoint lines, and rows
+    # of a third document that were written but never checkpointed
+    checkpoint = tmp_path / "results.jsonl.checkpoint"
+    entries = checkpoint.read_text(encoding="utf-8").splitlines()
+    checkpoint.write_text("\n".join(entries[:2]) + "\n" + entries[2][:10], encoding="utf-8")
+    capsys.readouterr()
+
+    run_cli(corpus, "-o", output)
+    report = json.loads(capsys.readouterr().out)
+    assert report["skipped"] == 2
+    assert report["documents"] == 2
+    assert read_rows(output) == full
+
+def test_existing_output_is_not_overwritten(tmp_path, corpus):
+    output = tmp_path / "results.jsonl"
+    output.write_text("precious\n", encoding="utf-8")
+    with pytest.raises(SystemExit):
+        run_cli(corpus, "-o", output)
+    assert output.read_text(encoding="utf-8") == "precious\n"
+
+    run_cli(corpus, "-o", output, "--overwrite")
+    assert len(read_rows(output)) == 8
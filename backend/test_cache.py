@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+from cache import EmotionCache
+
+RESULT = {"text": "Happy day.", "emotion": "joy", "score": 0.9, "method": "ai_transformer"}
+
+def test_invalidate_keeps_the_current_model():
+    current = {"model_id": "model+cascade@0.8"}
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmotionCache(lambda: current["model_id"], "1", path=os.path.join(tmp, "cache.sqlite3"))
+        cache.put("Happy day.", RESULT, "old-model")
+        cache.put("Happy day.", RESULT, "model+cascade@0.8")
+
+        assert cache.stats()["model_id"] == "model+cascade@0.8"
+        assert cache.invalidate() == 1
+        assert cache.get("Happy day.", "model+cascade@0.8") == RESULT
+        assert cache.get("Happy day.", "old-model") is None
+
+        # The model ID is read at call time, e.g. after falling back
+        current["model_id"] = "fallback"
+        assert cache.stats()["model_id"] == "fallback"
+        assert cache.invalidate() == 1
+        assert cache.get("Happy day.", "model+cascade@0.8") is None
+
+def test_fixed_model_id():
+    cache = EmotionCache("model", "1")
+    cache.put("Sad day.", RESULT)
+    assert cache.get("  Sad   day. ") == RESULT
+    assert cache.stats()["model_id"] == "model"
+
+def test_put_many_and_disk_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        cache = EmotionCache("model", "1", path=path, max_entries=1, max_disk_entries=5)
+        cache.put_many([(f"snippet {i}", dict(RESULT, text=f"snippet {i}")) for i in range(8)])
+        assert cache.stats()["disk_entries"] == 5
+        assert cache.stats()["evicted"] == 3
+
+        # A fresh instance only has the disk tier: the oldest writes are gone
+        reopened = EmotionCache("model", "1", path=path)
+        assert reopened.get("snippet 0") is None
+        assert reopened.get("snippet 2") is None
+        assert reopened.get("snippet 3")["text"] == "snippet 3"
+        assert reopened.get("snippet 7")["text"] == "snippet 7"
+
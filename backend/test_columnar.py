@@ -0,0 +1,26 @@
+from columnar import ResultColumns, columnar_payload, items_from_payload
+
+ITEMS = [
+    {"text": "So happy today.", "emotion": "joy", "score": 0.9731, "method": "ai_transformer", "group_size": 2},
+    {"text": "Il pleut.", "emotion": "sadness", "score": 0.4112, "method": "sentiment_fallback",
+     "translated_text": "It is raining.", "custom": {"rank": 1}},
+    {"text": "Calm.", "emotion": "serenity", "score": 0.5, "method": "lexicon_v2", "flag": None}
+]
+
+def test_round_trip_keeps_unknown_keys():
+    payload = columnar_payload({"analysis_id": "abc", "items": ITEMS})
+    assert payload["analysis_id"] == "abc"
+    # Values outside the code tables are appended to them
+    assert payload["emotions"][-1] == "serenity"
+    assert payload["columns"]["extra"] == [None, {"custom": {"rank": 1}}, {"flag": None}]
+    assert items_from_payload(payload) == ITEMS
+
+def test_optional_columns_only_when_used():
+    columns = ResultColumns.from_items(ITEMS[:1]).to_payload()["columns"]
+    assert set(columns) == {"text", "emotion", "score", "method", "group_size"}
+
+def test_fields_project_extra_keys_too():
+    payload = ResultColumns.from_items(ITEMS).to_payload(fields=["text", "custom"])
+    assert set(payload["columns"]) == {"text", "extra"}
+    assert payload["columns"]["extra"] == [None, {"custom": {"rank": 1}}, None]
+    assert ResultColumns.from_items(ITEMS).to_payload(fields=["text"])["columns"] == {"text": [item["text"] for item in ITEMS]}
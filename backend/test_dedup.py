@@ -0,0 +1,38 @@
+from dedup import fingerprint_tokens, group_near_duplicates
+
+def test_bylines_and_counters_collapse():
+    texts = [
+        "Posted by john 3 hours ago",
+        "Posted by Mary 5 days ago",
+        "By jane_doe, 1 year ago",
+        "By bob, 2 weeks ago",
+        "12 comments",
+        "13 comments",
+        "Great service, said Anna from Berlin.",
+        "Great service, said Tom from Paris."
+    ]
+    assert group_near_duplicates(texts) == [0, 0, 2, 2, 4, 4, 6, 6]
+
+def test_sentiment_flipped_pairs_stay_separate():
+    pairs = [
+        ("I really love this phone, the battery lasts all day.", "I really hate this phone, the battery lasts all day."),
+        ("This product is absolutely wonderful and I would recommend it to everyone.",
+         "This product is absolutely terrible and I would recommend it to everyone."),
+        # Title-cased headlines keep their words
+        ("Apple Releases Terrible Update", "Apple Releases Wonderful Update"),
+        # All-caps emphasis is not a name
+        ("I LOVE it, said Anna", "I HATE it, said Anna"),
+        ("Loved by everyone", "Hated by everyone")
+    ]
+    for pair in pairs:
+        assert group_near_duplicates(list(pair)) == [0, 1], pair
+
+def test_names_only_inside_sentences():
+    assert fingerprint_tokens("Mary said hi to John.") == ["mary", "said", "hi", "to", "<name>"]
+    assert fingerprint_tokens("@john_doe thanks for 3 days") == ["<name>", "thanks", "for", "0", "<time>"]
+    # "day" without a number is an ordinary word
+    assert fingerprint_tokens("what a day") == ["what", "a", "day"]
+
+def test_distance_zero_keeps_exact_grouping_only():
+    texts = ["Posted by john 3 hours ago", "Posted by mary 5 hours ago", "Something else entirely here"]
+    assert group_near_duplicates(texts, max_distance=0) == [0, 0, 2]
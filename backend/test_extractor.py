@@ -0,0 +1,62 @@
+import glob
+import os
+
+from extractor import charset_from_content_type, extract_snippets
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+
+def fixture_pages():
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        with open(path, "rb") as f:
+            yield os.path.basename(path), f.read()
+
+def test_lxml_matches_reference_on_saved_pages():
+    for name, html in fixture_pages():
+        expected = extract_snippets(html, backend="bs4", limit=None)
+        assert expected, name
+        assert extract_snippets(html, backend="lxml", limit=None) == expected, name
+
+def test_lxml_matches_reference_with_cap():
+    items = b"".join(b"<li><p>List item number %d with some text.</p></li>" % i for i in range(120))
+    html = b"<html><body><article><ul>" + items + b"</ul></article></body></html>"
+    snippets = extract_snippets(html, backend="lxml", limit=80)
+    assert len(snippets) == 80
+    assert snippets == extract_snippets(html, backend="bs4", limit=80)
+
+def test_no_cap_by_default():
+    items = b"".join(b"<li><p>List item number %d with some text.</p></li>" % i for i in range(120))
+    html = b"<html><body><article><ul>" + items + b"</ul></article></body></html>"
+    assert len(extract_snippets(html, backend="lxml")) == 120
+
+def test_nested_duplicates_are_skipped():
+    html = b"<ul><li><p>One nested paragraph inside a list item.</p></li></ul>"
+    assert extract_snippets(html, backend="lxml") == ["One nested paragraph inside a list item."]
+
+def test_excluded_tags_keep_following_text():
+    html = b"<p>Before the script tag<script>var x = 1;</script> and after it, still content.</p>"
+    expected = ["Before the script tag and after it, still content."]
+    assert extract_snippets(html, backend="bs4") == expected
+    assert extract_snippets(html, backend="lxml") == expected
+
+def test_empty_document():
+    assert extract_snippets(b"", backend="lxml") == []
+
+def test_utf8_without_meta_charset():
+    with open(os.path.join(FIXTURES, "utf8_no_meta.html"), "rb") as f:
+        html = f.read()
+    assert b"charset" not in html
+    snippets = extract_snippets(html, backend="lxml", limit=None)
+    assert "café" in snippets[0]
+    assert "Мы были очень счастливы снова увидеть старых друзей в этом городе." in snippets
+
+def test_http_charset_is_used():
+    html = "<p>Ein schöner Tag in München, alle sind fröhlich.</p>".encode("latin-1")
+    expected = ["Ein schöner Tag in München, alle sind fröhlich."]
+    assert extract_snippets(html, backend="lxml", encoding="iso-8859-1") == expected
+    assert extract_snippets(html, backend="bs4", encoding="iso-8859-1") == expected
+
+def test_charset_from_content_type():
+    assert charset_from_content_type("text/html; charset=UTF-8") == "UTF-8"
+    assert charset_from_content_type('text/html; Charset="iso-8859-1"') == "iso-8859-1"
+    assert charset_from_content_type("text/html") is None
+    assert charset_from_content_type(None) is None
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fetcher import AsyncFetcher
+
+PAGES = {
+    "/happy": b"<html><body><p>I am so happy about this wonderful news today.</p></body></html>",
+    "/sad": b"<html><body><article><p>This is a sad and lonely day for everyone.</p></article></body></html>",
+    "/big": b"<html><body>" + b"<p>Filler paragraph that goes on and on.</p>" * 2000 + b"</body></html>"
+}
+
+class StubHandler(BaseHTTPRequestHandler):
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        busy = path == "/busy"
+        if busy:
+            # Track how many /busy requests are served at the same time
+            with StubHandler.lock:
+                StubHandler.active += 1
+                StubHandler.peak = max(StubHandler.peak, StubHandler.active)
+        try:
+            if path == "/slow":
+                time.sleep(2)
+            if busy:
+                time.sleep(0.2)
+            body = PAGES.get(path, PAGES["/happy"] if path in ("/slow", "/busy") else None)
+            if body is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client stopped reading (body cap)
+                pass
+        finally:
+            if busy:
+                with StubHandler.lock:
+                    StubHandler.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def run(coroutine_fn, **fetcher_options):
+    async def main():
+        fetcher = AsyncFetcher(**fetcher_options)
+        try:
+            return await coroutine_fn(fetcher)
+        finally:
+            await fetcher.aclose()
+    return asyncio.run(main())
+
+def test_scrape_many_reports_per_url_status():
+    server, base = start_server()
+    try:
+        urls = [base + "/happy", base + "/missing", base + "/sad"]
+        results = run(lambda f: f.scrape_many(urls))
+    finally:
+        server.shutdown()
+
+    assert [r["url"] for r in results] == urls
+    assert results[0]["ok"] and results[0]["snippets"] == ["I am so happy about this wonderful news today."]
+    assert not results[1]["ok"] and results[1]["status"] == 404 and results[1]["snippets"] == []
+    assert results[2]["ok"] and results[2]["snippets"] == ["This is a sad and lonely day for everyone."]
+
+def test_timeout_is_reported():
+    server, base = start_server()
+    try:
+        results = run(lambda f: f.scrape_many([base + "/slow"]), timeout=0.5)
+    finally:
+        server.shutdown()
+
+    assert not results[0]["ok"]
+    assert results[0]["error"]
+
+def test_per_host_limit():
+    server, base = start_server()
+    StubHandler.peak = 0
+    try:
+        run(lambda f: f.scrape_many([f"{base}/busy?{i}" for i in range(6)]), per_host=2)
+    finally:
+        server.shutdown()
+
+    assert StubHandler.peak == 2
+
+def test_body_is_capped():
+    server, base = start_server()
+    try:
+        result = run(lambda f: f.fetch(base + "/big"), max_bytes=1000)
+    finally:
+        server.shutdown()
+
+    assert len(result["content"]) == 1000
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from history import AnalysisHistory
+
+def item(text, emotion="joy", score=0.9):
+    return {"text": text, "emotion": emotion, "score": score, "method": "keyword_fallback"}
+
+def with_history(test):
+    with tempfile.TemporaryDirectory() as tmp:
+        test(os.path.join(tmp, "history.sqlite3"))
+
+def test_text_search():
+    def check(path):
+        history = AnalysisHistory(path)
+        history.record("a1", [item("What a wonderful sunny day"), item("Rain again, how gloomy", "sadness", 0.6)])
+        history.record("a2", [item("Another wonderful evening")])
+
+        found, _ = history.query(text="wonderful")
+        assert [entry["text"] for entry in found] == ["Another wonderful evening", "What a wonderful sunny day"]
+        found, _ = history.query(text="wonderful", analysis_id="a1")
+        assert [entry["text"] for entry in found] == ["What a wonderful sunny day"]
+        found, _ = history.query(text="gloomy", emotions=["joy"])
+        assert found == []
+        # Quotes and operators are searched as words, not parsed
+        found, _ = history.query(text='"wonderful OR')
+        assert found == []
+    with_history(check)
+
+def test_cursor_pages_through_everything_once():
+    def check(path):
+        history = AnalysisHistory(path)
+        for batch in range(5):
+            history.record(f"a{batch}", [item(f"snippet {batch}-{index}") for index in range(5)])
+
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = history.query(cursor=cursor, limit=10)
+            seen.extend(entry["id"] for entry in page)
+            if cursor is None:
+                break
+        assert seen == list(range(25, 0, -1))
+        assert history.stats()["snippets"] == 25
+    with_history(check)
+
+def test_since_and_until():
+    def check(path):
+        history = AnalysisHistory(path)
+        for batch, created_at in (("a", 100.0), ("b", 200.0), ("c", 300.0)):
+            with mock.patch("history.time.time", return_value=created_at):
+                history.record(batch, [item(f"{batch}1"), item(f"{batch}2")])
+
+        def analyses(**bounds):
+            found, _ = history.query(**bounds)
+            return sorted({entry["analysis_id"] for entry in found})
+
+        assert analyses(since=200) == ["b", "c"]
+        assert analyses(until=300) == ["a", "b"]
+        assert analyses(since=150, until=250) == ["b"]
+        assert analyses(since=400) == []
+        assert analyses(until=50) == []
+    with_history(check)
+
+def test_concurrent_writers_keep_the_text_index_complete():
+    def check(path):
+        writers = [AnalysisHistory(path) for _ in range(2)]
+
+        def write(history, name):
+            for batch in range(20):
+                history.record(name, [item(f"{name} entry {batch} {index}") for index in range(5)])
+
+        threads = [threading.Thread(target=write, args=(history, f"writer{number}")) for number, history in enumerate(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+
+        for number in range(2):
+            found, _ = writers[0].query(text=f"writer{number}", limit=1000)
+            assert len(found) == 100
+    with_history(check)
@@ -0,0 +1,76 @@
+import json
+import os
+import random
+import re
+import tempfile
+
+from analyzer import KEYWORDS
+from lexicon import KeywordMatcher, load_lexicon
+
+def reference_keyword_emotion(text: str):
+    """The per-keyword regex matcher KeywordMatcher replaced."""
+    text_lower = text.lower()
+    scores = {emotion: 0 for emotion in KEYWORDS}
+    for emotion, words in KEYWORDS.items():
+        for word in words:
+            if re.search(r'\b' + re.escape(word) + r'\b', text_lower):
+                scores[emotion] += 1
+    best_emotion = max(scores, key=scores.get)
+    if scores[best_emotion] > 0:
+        return best_emotion, 0.8 + (0.1 * min(scores[best_emotion], 2))
+    return None, 0
+
+FILLER = ["the", "market", "today", "we", "were", "very", "news", "city", "2024", "and", "not", "x"]
+PUNCTUATION = ["", "", ".", ",", "!", "?", ";", "'s", "-"]
+
+def random_snippet(rng, terms):
+    words = []
+    for _ in range(rng.randint(1, 14)):
+        word = rng.choice(terms) if rng.random() < 0.3 else rng.choice(FILLER)
+        if rng.random() < 0.2:
+            word = word.upper() if rng.random() < 0.5 else word.capitalize()
+        if rng.random() < 0.1:
+            # Keyword glued into a longer word must not match
+            word = word + rng.choice(["ness", "ly", "s", "ed"])
+        words.append(word + rng.choice(PUNCTUATION))
+    return " ".join(words)
+
+def test_parity_with_regex_matcher():
+    rng = random.Random(8)
+    terms = [term for words in KEYWORDS.values() for term in words]
+    matcher = KeywordMatcher(KEYWORDS)
+    for _ in range(20000):
+        text = random_snippet(rng, terms)
+        assert matcher.best(text) == reference_keyword_emotion(text), text
+
+def test_multi_word_terms():
+    matcher = KeywordMatcher({"joy": ["over the moon"], "sadness": ["moon"]})
+    assert matcher.scores("I am Over the Moon!") == {"joy": 1, "sadness": 1}
+    assert matcher.scores("over the") == {"joy": 0, "sadness": 0}
+
+def _write(directory, name, content):
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+def test_load_lexicon_json():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write(tmp, "lexicon.json", json.dumps({"Joy": ["elated"], "disgust": ["gross"]}))
+        assert load_lexicon(path) == {"joy": ["elated"], "disgust": ["gross"]}
+        assert load_lexicon(path, {"joy": "joy", "disgust": "anger"}) == {"joy": ["elated"], "anger": ["gross"]}
+
+def test_load_lexicon_csv():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write(tmp, "lexicon.csv", "# term,emotion\nelated,joy\n gloomy , sadness\n,joy\nbroken\n")
+        assert load_lexicon(path) == {"joy": ["elated"], "sadness": ["gloomy"]}
+
+def test_load_lexicon_nrc_tsv():
+    rows = [
+        "abandon\tfear\t1", "abandon\tjoy\t0", "abandon\tsadness\t1",
+        "abhor\tdisgust\t1", "abhor\tpositive\t0", "cheer\tjoy\t1", "cheer\tpositive\t1"
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write(tmp, "NRC-Emotion-Lexicon.txt", "\n".join(rows) + "\n")
+        lexicon = load_lexicon(path, {"joy": "joy", "sadness": "sadness", "fear": "fear", "disgust": "anger"})
+    assert lexicon == {"fear": ["abandon"], "sadness": ["abandon"], "anger": ["abhor"], "joy": ["cheer"]}
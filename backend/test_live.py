@@ -0,0 +1,55 @@
+import pytest
+
+import live
+from live import LiveSession
+
+class RecordingAnalyzer:
+    """Tags every result with the call it came from, and records the texts analyzed."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [{"text": text, "emotion": "joy", "score": 0.5, "call": len(self.calls)} for text in texts]
+
+def test_first_revision_adds_everything():
+    analyze = RecordingAnalyzer()
+    session = LiveSession(analyze)
+    delta = session.revise("It rained. We stayed in. The tea was warm.")
+    assert [particle["id"] for particle in delta["add"]] == [1, 2, 3]
+    assert delta["update"] == [] and delta["remove"] == []
+    assert (delta["count"], delta["analyzed"], delta["reused"]) == (3, 3, 0)
+
+def test_edits_update_in_place_and_reuse_the_rest():
+    analyze = RecordingAnalyzer()
+    session = LiveSession(analyze)
+    session.revise("It rained. We stayed in. The tea was warm.")
+
+    delta = session.revise("It rained. We went out. The tea was warm.")
+    # The edited sentence keeps its particle; only it is analyzed again
+    assert [(particle["id"], particle["text"]) for particle in delta["update"]] == [(2, "We went out.")]
+    assert delta["add"] == [] and delta["remove"] == []
+    assert (delta["analyzed"], delta["reused"]) == (1, 2)
+    assert analyze.calls[-1] == ["We went out."]
+
+def test_insertions_and_removals():
+    analyze = RecordingAnalyzer()
+    session = LiveSession(analyze)
+    session.revise("It rained. We stayed in. The tea was warm.")
+
+    delta = session.revise("It rained. Then it snowed. We stayed in. The tea was warm. Bed.")
+    assert [(particle["id"], particle["text"]) for particle in delta["add"]] == [(4, "Then it snowed."), (5, "Bed.")]
+    assert delta["update"] == [] and delta["remove"] == []
+
+    delta = session.revise("Then it snowed. Bed.")
+    assert sorted(delta["remove"]) == [1, 2, 3]
+    assert delta["add"] == [] and delta["update"] == [] and delta["analyzed"] == 0
+    assert [item["text"] for item in session.items()] == ["Then it snowed.", "Bed."]
+
+def test_too_long_text_is_rejected(monkeypatch):
+    monkeypatch.setattr(live, "LIVE_MAX_CHARS", 10)
+    session = LiveSession(RecordingAnalyzer())
+    with pytest.raises(ValueError):
+        session.revise("x" * 11)
+    assert session.revisions == 0
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+
+# Offline, throwaway state when main is imported first (as benchmark.py does)
+os.environ.setdefault("EMOTIA_CACHE", "0")
+os.environ.setdefault("EMOTIA_PAGE_CACHE", "0")
+os.environ.setdefault("EMOTIA_HISTORY", "0")
+os.environ.setdefault("EMOTIA_TRANSLATOR", "stub")
+os.environ.setdefault("EMOTIA_WARMUP", "0")
+
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+import analyzer
+import main
+import metrics
+from columnar import items_from_payload
+from history import AnalysisHistory
+from pdf_ingest import analyze_pdf, iter_pdf_snippets, open_pdf
+from translation import StubTranslator, TranslationStage
+
+client = TestClient(main.app)
+
+@pytest.fixture(autouse=True)
+def offline_analyzer():
+    """Fallback tiers only, no result cache, stub translator, whatever was imported before."""
+    with mock.patch.object(analyzer, "load_model", lambda: None), \
+            mock.patch.object(analyzer, "result_cache", None), \
+            mock.patch.object(analyzer, "translation_stage", TranslationStage(StubTranslator())):
+        yield
+
+TEXT = "I am so happy today.\nThis is a sad and lonely day.\nThe meeting is at noon."
+
+def test_analyze_text_stream_ndjson():
+    response = client.post("/analyze_text_stream", json={"text": TEXT})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["type"] for event in events] == ["items", "summary"]
+    assert [item["text"] for item in events[0]["items"]] == TEXT.split("\n")
+    assert events[-1]["count"] == 3
+    assert "analysis_id" in events[-1]
+
+def test_analyze_text_stream_sse():
+    response = client.post("/analyze_text_stream?format=sse", json={"text": TEXT})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    blocks = response.text.split("\n\n")
+    assert blocks[-1] == ""
+    assert blocks[-2].startswith("event: summary\ndata: ")
+
+PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pdf", "journal.pdf")
+
+def pdf_upload():
+    with open(PDF, "rb") as f:
+        return {"file": ("journal.pdf", f.read(), "application/pdf")}
+
+def test_upload_pdf_has_no_snippet_cap():
+    with open(PDF, "rb") as f:
+        expected = list(iter_pdf_snippets(open_pdf(f), 0, 0))
+    # The old endpoint stopped at 50 snippets
+    assert len(expected) > 50
+
+    response = client.post("/upload_pdf", files=pdf_upload())
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == len(expected)
+    assert [item["text"] for item in body["items"]] == expected
+
+def test_upload_pdf_stream_has_no_snippet_cap():
+    response = client.post("/upload_pdf_stream", files=pdf_upload())
+    events = [json.loads(line) for line in response.text.splitlines()]
+    streamed = [item for event in events if event["type"] == "items" for item in event["items"]]
+    assert len(streamed) > 50
+    assert events[-1]["type"] == "summary"
+    assert events[-1]["count"] == len(streamed)
+
+def test_analyze_pdf_batches_across_pages():
+    batches = []
+
+    def analyze(batch):
+        batches.append(len(batch))
+        return [{"text": text} for text in batch]
+
+    with open(PDF, "rb") as f:
+        items = analyze_pdf(open_pdf(f), analyze, batch_size=16, max_pages=0, max_snippets=0)
+    assert sum(batches) == len(items) > 50
+    assert all(size == 16 for size in batches[:-1])
+
+def test_server_timing_header():
+    response = client.post("/analyze_text", json={"text": TEXT})
+    assert response.status_code == 200
+    entries = dict(part.split(";dur=") for part in response.headers["server-timing"].split(", "))
+    assert {"segment", "store", "total"} <= set(entries)
+    assert all(float(value) >= 0 for value in entries.values())
+
+def test_metrics_exposition():
+    client.post("/analyze_text", json={"text": TEXT})
+    response = client.get("/metrics")
+    assert response.headers["content-type"] == metrics.PROMETHEUS_CONTENT_TYPE
+    lines = response.text.splitlines()
+    assert "# TYPE emotia_request_seconds histogram" in lines
+    # Labelled by route template and status, with the +Inf bucket matching the count
+    inf = next(line for line in lines if line.startswith('emotia_request_seconds_bucket{endpoint="/analyze_text",status="200",le="+Inf"}'))
+    count = next(line for line in lines if line.startswith('emotia_request_seconds_count{endpoint="/analyze_text",status="200"}'))
+    assert inf.split()[-1] == count.split()[-1] != "0"
+    assert any(line.startswith('emotia_stage_seconds_count{stage="segment"}') for line in lines)
+    assert any(line.startswith('emotia_results_total{method="') for line in lines)
+
+def test_profile_is_saved_off_the_event_loop(tmp_path):
+    saved = []
+
+    def save(profiler):
+        try:
+            asyncio.get_running_loop()
+            saved.append("event loop")
+        except RuntimeError:
+            saved.append(profiler.name)
+
+    with mock.patch.object(metrics, "PROFILING_ENABLED", True), \
+            mock.patch.object(metrics.SamplingProfiler, "save", save):
+        response = client.post("/analyze_text?profile=1", json={"text": TEXT})
+    assert saved == [response.headers["x-profile"]]
+
+def test_history_page_round_trips_through_columnar(tmp_path):
+    history = AnalysisHistory(str(tmp_path / "history.sqlite3"))
+    history.record("a1", [{"text": f"snippet {i}", "emotion": "joy", "score": 0.5, "method": "keyword_fallback"} for i in range(5)])
+    with mock.patch.object(main, "history", history):
+        plain = client.get("/history?limit=3").json()
+        response = client.get("/history?limit=3&format=columnar")
+    assert response.headers["content-type"] == "application/vnd.emotia.columnar+json"
+    payload = response.json()
+    assert payload["next_cursor"] == plain["next_cursor"]
+    assert {"id", "analysis_id", "created_at"} <= set(payload["columns"])
+    items = items_from_payload(payload)
+    assert items == plain["items"]
+    assert [item["id"] for item in items] == [5, 4, 3]
+    assert {item["analysis_id"] for item in items} == {"a1"}
+    assert all(item["created_at"] for item in items)
+
+def test_live_sends_diff_ops():
+    with client.websocket_connect("/live") as websocket:
+        websocket.send_json({"text": "I am so happy today. The meeting is at noon.", "revision": 1})
+        delta = websocket.receive_json()
+        assert (delta["type"], delta["revision"]) == ("delta", 1)
+        assert [particle["id"] for particle in delta["add"]] == [1, 2]
+
+        websocket.send_json({"text": "I am so sad today. The meeting is at noon.", "revision": 2})
+        delta = websocket.receive_json()
+        assert delta["revision"] == 2
+        assert [(particle["id"], particle["text"]) for particle in delta["update"]] == [(1, "I am so sad today.")]
+        assert (delta["add"], delta["remove"], delta["reused"]) == ([], [], 1)
+
+        websocket.send_json({"type": "save"})
+        saved = websocket.receive_json()
+        assert saved["type"] == "saved" and saved["count"] == 2
+        assert main.result_store.page(saved["analysis_id"])[1] == 2
+
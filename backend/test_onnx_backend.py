@@ -0,0 +1,45 @@
+from onnx_backend import compare_backends
+
+TEXTS = ["I love this.", "This is awful.", "What a surprise!"]
+
+def stub_backend(table):
+    """A classifier with the pipeline interface that answers from a {text: {label: score}} table."""
+    def classify(texts, batch_size=None, truncation=None):
+        return [[{"label": label, "score": score} for label, score in table[text].items()] for text in texts]
+    return classify
+
+REFERENCE = stub_backend({
+    "I love this.": {"joy": 0.9, "anger": 0.05, "disgust": 0.05},
+    "This is awful.": {"joy": 0.1, "anger": 0.6, "disgust": 0.3},
+    "What a surprise!": {"joy": 0.2, "surprise": 0.7, "neutral": 0.1}
+})
+
+def test_identical_backends_agree():
+    report = compare_backends(REFERENCE, REFERENCE, TEXTS)
+    assert report["snippets"] == 3
+    assert report["label_agreement"] == 1
+    assert report["emotion_agreement"] == 1
+    assert report["max_abs_score_diff"] == 0
+    assert report["mismatches"] == []
+
+def test_drift_and_mismatches_are_reported():
+    candidate = stub_backend({
+        "I love this.": {"joy": 0.85, "anger": 0.1, "disgust": 0.05},
+        # anger -> disgust: a different label, but the same palette emotion
+        "This is awful.": {"joy": 0.1, "anger": 0.3, "disgust": 0.6},
+        "What a surprise!": {"joy": 0.6, "surprise": 0.3, "neutral": 0.1}
+    })
+    report = compare_backends(REFERENCE, candidate, TEXTS)
+
+    assert report["label_agreement"] == 1 / 3
+    assert report["emotion_agreement"] == 2 / 3
+    assert abs(report["max_abs_score_diff"] - 0.4) < 1e-9
+    assert report["mismatches"] == [
+        {"text": "This is awful.", "reference": "anger", "candidate": "disgust"},
+        {"text": "What a surprise!", "reference": "surprise", "candidate": "joy"}
+    ]
+
+def test_empty_corpus():
+    report = compare_backends(REFERENCE, REFERENCE, [])
+    assert report["snippets"] == 0
+    assert report["label_agreement"] == 0
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import scraper
+from pagecache import PageCache
+
+BODY = b"<html><body><p>I am so happy about this wonderful news today.</p></body></html>"
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Conditional headers seen per request, in order
+    seen = []
+
+    def do_GET(self):
+        StubHandler.seen.append(self.headers.get("If-None-Match"))
+        if self.path == "/etag" and self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(BODY)))
+        if self.path == "/etag":
+            self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+def with_cache(test):
+    """Runs `test(base_url, cache)` against a stub server and a throwaway page cache."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    previous = scraper.page_cache
+    StubHandler.seen = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            scraper.page_cache = PageCache(os.path.join(tmp, "pages.sqlite3"))
+            test(f"http://127.0.0.1:{server.server_address[1]}", scraper.page_cache)
+    finally:
+        scraper.page_cache = previous
+        server.shutdown()
+        server.server_close()
+
+def test_miss_then_not_modified():
+    def check(base, cache):
+        first = scraper.scrape_page(base + "/etag")
+        assert first["cache"] == "miss"
+        assert first["snippets"] == ["I am so happy about this wonderful news today."]
+
+        second = scraper.scrape_page(base + "/etag")
+        assert second["cache"] == "not_modified"
+        assert second["snippets"] == first["snippets"]
+        assert StubHandler.seen == [None, '"v1"']
+        assert cache.stats()["not_modified"] == 1
+    with_cache(check)
+
+def test_unchanged_body():
+    def check(base, cache):
+        first = scraper.scrape_page(base + "/plain")
+        second = scraper.scrape_page(base + "/plain")
+        assert (first["cache"], second["cache"]) == ("miss", "unchanged")
+        assert second["content_hash"] == first["content_hash"]
+        assert second["snippets"] == first["snippets"]
+    with_cache(check)
+
+def test_other_extraction_settings_miss():
+    def check(base, cache):
+        scraper.scrape_page(base + "/etag")
+        entry = cache.get(base + "/etag", scraper.extraction_signature())
+        assert entry is not None
+        assert cache.get(base + "/etag", scraper.extraction_signature(limit=5)) is None
+
+        # Cached under other settings: fetched and parsed again, without revalidating
+        cache.put(base + "/etag", '"v1"', None, entry["content_hash"], "other", ["stale"])
+        again = scraper.scrape_page(base + "/etag")
+        assert again["cache"] == "miss"
+        assert again["snippets"] == entry["snippets"]
+        assert StubHandler.seen == [None, None]
+    with_cache(check)
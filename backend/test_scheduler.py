@@ -0,0 +1,64 @@
+import threading
+import time
+
+from scheduler import InferenceScheduler
+
+def echo(texts, batch_size=None):
+    return [text.upper() for text in texts]
+
+def test_batches_concurrent_requests():
+    scheduler = InferenceScheduler(echo, max_batch_size=8, max_wait_ms=50)
+    scheduler.start()
+    try:
+        results = {}
+        threads = [
+            threading.Thread(target=lambda i=i: results.__setitem__(i, scheduler.classify([f"t{i}"])))
+            for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+    finally:
+        scheduler.stop()
+
+    assert results == {i: [f"T{i}"] for i in range(8)}
+    assert scheduler.stats()["largest_batch"] > 1
+
+def test_submit_after_stop_fails():
+    scheduler = InferenceScheduler(echo)
+    scheduler.start()
+    scheduler.stop()
+
+    future = scheduler.submit("late")
+    assert isinstance(future.exception(timeout=1), RuntimeError)
+
+def test_stop_fails_items_left_in_the_queue():
+    release = threading.Event()
+
+    def blocked(texts, batch_size=None):
+        release.wait(5)
+        return echo(texts)
+
+    scheduler = InferenceScheduler(blocked, max_batch_size=1, max_wait_ms=0)
+    scheduler.start()
+    running = scheduler.submit("first")
+    time.sleep(0.1)
+    queued = scheduler.submit("second")
+
+    # The worker is stuck on "first", so "second" is still queued after the timeout
+    scheduler.stop(timeout=0.2)
+    assert isinstance(queued.exception(timeout=1), RuntimeError)
+
+    release.set()
+    assert running.result(timeout=5) == "FIRST"
+
+def test_short_output_fails_every_item():
+    scheduler = InferenceScheduler(lambda texts, batch_size=None: echo(texts)[:-1], max_batch_size=4, max_wait_ms=50)
+    scheduler.start()
+    try:
+        futures = [scheduler.submit(f"t{i}") for i in range(4)]
+        for future in futures:
+            assert isinstance(future.exception(timeout=5), RuntimeError)
+    finally:
+        scheduler.stop()
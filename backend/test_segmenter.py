@@ -0,0 +1,56 @@
+import io
+from unittest import mock
+
+import segmenter
+from segmenter import split_snippets
+
+def test_ordinary_words_end_sentences():
+    assert split_snippets("Neither did I. Then we left.") == ["Neither did I.", "Then we left."]
+    assert split_snippets("I said no. Then it rained.") == ["I said no.", "Then it rained."]
+    assert split_snippets("We chose plan A. It worked.") == ["We chose plan A.", "It worked."]
+
+def test_abbreviations_keep_sentences_together():
+    assert split_snippets("Dr. Smith arrived, e.g. at noon. He smiled.") == ["Dr. Smith arrived, e.g. at noon.", "He smiled."]
+    assert split_snippets("J. R. R. Tolkien wrote it.") == ["J. R. R. Tolkien wrote it."]
+    assert split_snippets("See No. 5 on the list. It costs 3.5 dollars.") == ["See No. 5 on the list.", "It costs 3.5 dollars."]
+    assert split_snippets("The co. ltd is here. Yes.") == ["The co. ltd is here.", "Yes."]
+
+def test_streams_match_strings():
+    text = "I said no. Then it rained. And no. 5 was it. Dr. Who? Yes!\nNew line here."
+    expected = split_snippets(text)
+    # Every split point, including right after an ambiguous abbreviation
+    for cut in range(1, len(text)):
+        assert split_snippets(iter([text[:cut], text[cut:]])) == expected, cut
+    assert split_snippets(io.StringIO(text)) == expected
+
+def test_paragraph_mode_joins_wrapped_lines():
+    text = "This line is\nwrapped. Next one.\n\nNew paragraph"
+    assert split_snippets(text, split_lines=False) == ["This line is wrapped.", "Next one.", "New paragraph"]
+
+def test_streams_match_strings_across_three_chunks():
+    text = "Wait... what? Mr. Smith said \"no.\" No. 7 won.\nEnd"
+    expected = split_snippets(text)
+    for first in range(1, len(text) - 1):
+        for second in range(first + 1, len(text)):
+            chunks = [text[:first], text[first:second], text[second:]]
+            assert split_snippets(iter(chunks)) == expected, (first, second)
+
+def test_unpunctuated_stream_carry_is_capped():
+    words = " ".join(f"word{i}" for i in range(2000))
+    with mock.patch.object(segmenter, "MAX_CARRY", 500):
+        pieces = list(segmenter._iter_sentences(iter(words[i:i + 100] for i in range(0, len(words), 100)), True))
+    assert "".join(pieces) == words
+    assert max(len(piece) for piece in pieces) <= 600
+    # Cut at word boundaries only
+    assert all(piece.endswith(" ") for piece in pieces[:-1])
+
+def test_long_sentences_are_split_to_the_model_limit():
+    text = " ".join(["word"] * 1000) + "."
+    limit = segmenter.MODEL_MAX_TOKENS * segmenter.CHARS_PER_TOKEN
+    snippets = split_snippets(text)
+    assert len(snippets) > 1
+    assert all(len(snippet) <= limit for snippet in snippets)
+
+def test_target_tokens_merge_short_sentences():
+    text = "It rained. We stayed in. The tea was warm. Then the sun came out."
+    assert split_snippets(text, target_tokens=8) == ["It rained. We stayed in.", "The tea was warm.", "Then the sun came out."]
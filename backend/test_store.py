@@ -0,0 +1,137 @@
+from unittest import mock
+
+from store import MemoryStore, RedisStore
+
+def items(count, prefix="snippet"):
+    return [{"text": f"{prefix} {i}", "emotion": "joy", "score": 0.5} for i in range(count)]
+
+class StubRedis:
+    """The Redis commands RedisStore uses, with key expiry on a settable clock."""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.now = 0.0
+
+    def _live(self, key):
+        if key in self.expires and self.expires[key] <= self.now:
+            self.data.pop(key, None)
+            self.expires.pop(key)
+        return self.data.get(key)
+
+    def pipeline(self):
+        return StubPipeline(self)
+
+    def rpush(self, key, *values):
+        self.data.setdefault(key, []).extend(value.encode() for value in values)
+
+    def expire(self, key, seconds):
+        if key in self.data:
+            self.expires[key] = self.now + seconds
+
+    def set(self, key, value, ex=None):
+        self.data[key] = str(value).encode()
+        if ex:
+            self.expires[key] = self.now + ex
+
+    def get(self, key):
+        return self._live(key)
+
+    def lrange(self, key, start, end):
+        values = self._live(key) or []
+        return values[start:None if end == -1 else end + 1]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+
+class StubPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, command):
+        return lambda *args, **kwargs: self.calls.append((command, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.client, command)(*args, **kwargs) for command, args, kwargs in self.calls]
+
+def test_memory_ttl_expiry():
+    with mock.patch("store.time.monotonic", return_value=1000.0) as clock:
+        store = MemoryStore(ttl=60)
+        analysis_id = store.save(items(3))
+        assert store.page(analysis_id)[1] == 3
+
+        clock.return_value = 1061.0
+        assert store.page(analysis_id) is None
+        assert store.latest() is None
+        assert store.stats()["evictions"] == 1
+
+def test_memory_evicts_least_recently_used():
+    store = MemoryStore(max_analyses=2, max_items=100)
+    first = store.save(items(1))
+    second = store.save(items(1))
+    # Reading the first one makes the second the least recently used
+    store.page(first)
+    third = store.save(items(1))
+    assert store.page(second) is None
+    assert store.page(first) is not None and store.page(third) is not None
+
+    # The item budget evicts too, but never the analysis just stored
+    big = store.save(items(150))
+    assert store.page(first) is None and store.page(third) is None
+    assert store.page(big)[1] == 150
+
+def test_memory_sessions_are_isolated():
+    store = MemoryStore()
+    alice = store.save(items(2, "alice"), session="alice")
+    bob = store.save(items(3, "bob"), session="bob")
+    assert store.latest("alice") == alice
+    assert store.latest("bob") == bob
+    assert store.latest() == bob
+    assert store.latest("carol") is None
+
+    store.delete(bob)
+    assert store.latest("bob") is None
+    assert store.latest("alice") == alice
+
+def test_memory_paging():
+    store = MemoryStore()
+    analysis_id = store.save(items(10))
+    page, total = store.page(analysis_id, offset=4, limit=3)
+    assert total == 10
+    assert [item["text"] for item in page] == ["snippet 4", "snippet 5", "snippet 6"]
+
+def test_redis_paging_and_sessions():
+    store = RedisStore(client=StubRedis())
+    alice = store.save(items(2500, "alice"), session="alice")
+    bob = store.save(items(3, "bob"), session="bob")
+
+    page, total = store.page(alice, offset=999, limit=3)
+    assert total == 2500
+    assert [item["text"] for item in page] == ["alice 999", "alice 1000", "alice 1001"]
+    assert store.latest("alice") == alice
+    assert store.latest("bob") == bob
+    assert store.latest() == bob
+    assert store.latest("carol") is None
+
+    store.delete(bob)
+    assert store.page(bob) is None
+
+def test_redis_empty_analysis_exists():
+    store = RedisStore(client=StubRedis())
+    analysis_id = store.save([])
+    assert store.page(analysis_id) == ([], 0)
+    assert store.page("unknown") is None
+
+def test_redis_ttl_expiry():
+    client = StubRedis()
+    store = RedisStore(client=client, ttl=60)
+    analysis_id = store.save(items(3), session="alice")
+
+    client.now = 59
+    assert store.page(analysis_id)[1] == 3
+    client.now = 60
+    assert store.page(analysis_id) is None
+    assert store.latest("alice") is None
@@ -0,0 +1,76 @@
+import json
+
+from streaming import encode_event, stream_analysis, wants_sse
+
+def fake_analyze(batch):
+    return [{"text": text, "emotion": "joy", "score": 0.5, "method": "keyword_fallback"} for text in batch]
+
+def parse_ndjson(chunks):
+    body = "".join(chunks)
+    assert body.endswith("\n")
+    return [json.loads(line) for line in body.splitlines()]
+
+def parse_sse(chunks):
+    body = "".join(chunks)
+    events = []
+    for block in body.split("\n\n")[:-1]:
+        event_line, data_line = block.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        event = json.loads(data_line[len("data: "):])
+        assert event["type"] == event_line[len("event: "):]
+        events.append(event)
+    assert body.endswith("\n\n")
+    return events
+
+def test_ndjson_items_then_summary():
+    snippets = [f"snippet {i}" for i in range(20)]
+    events = parse_ndjson(stream_analysis(iter(snippets), analyze=fake_analyze, max_particles=0))
+
+    assert [event["type"] for event in events[:-1]] == ["items"] * (len(events) - 1)
+    # Batches grow 4, 8, 16... and the offsets line up
+    assert [len(event["items"]) for event in events[:-1]] == [4, 8, 8]
+    assert [event["offset"] for event in events[:-1]] == [0, 4, 12]
+    assert [item["text"] for event in events[:-1] for item in event["items"]] == snippets
+
+    summary = events[-1]
+    assert summary["type"] == "summary"
+    assert summary["count"] == 20
+    assert summary["emotions"] == {"joy": 20}
+
+def test_sse_framing():
+    events = parse_sse(stream_analysis(["a snippet", "another one"], sse=True, analyze=fake_analyze))
+    assert [event["type"] for event in events] == ["items", "summary"]
+
+def test_summary_carries_on_complete_fields():
+    stored = []
+
+    def on_complete(items):
+        stored.extend(items)
+        return {"analysis_id": "abc"}
+
+    events = parse_ndjson(stream_analysis(["one", "two"], analyze=fake_analyze, on_complete=on_complete))
+    assert events[-1]["analysis_id"] == "abc"
+    assert len(stored) == 2
+
+def test_progress_after_the_particle_budget():
+    events = parse_ndjson(stream_analysis([f"s{i}" for i in range(40)], analyze=fake_analyze, max_particles=10))
+    assert [event["type"] for event in events] == ["items", "items", "progress", "progress", "summary"]
+    assert events[-1]["downsampled"] is True
+    assert sum(particle["weight"] for particle in events[-1]["particles"]) == 40
+
+def test_error_is_the_terminal_event():
+    def failing(batch):
+        if batch[0] != "s0":
+            raise RuntimeError("model went away")
+        return fake_analyze(batch)
+
+    events = parse_ndjson(stream_analysis([f"s{i}" for i in range(10)], analyze=failing))
+    assert [event["type"] for event in events] == ["items", "error"]
+    assert events[-1] == {"type": "error", "detail": "model went away", "count": 4}
+
+def test_negotiation():
+    assert wants_sse("text/event-stream")
+    assert not wants_sse("application/x-ndjson")
+    assert wants_sse("application/json", format="sse")
+    assert not wants_sse("text/event-stream", format="ndjson")
+    assert encode_event({"type": "items"}) == '{"type": "items"}\n'
@@ -0,0 +1,78 @@
+import random
+from collections import Counter
+
+from summarize import SCORE_BINS, TIMELINE_BUCKETS, AnalysisSummary, summarize
+
+EMOTIONS = ("joy", "sadness", "anger", "fear", "energy", "neutral")
+
+def make_items(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {"text": f"snippet {index}", "emotion": rng.choice(EMOTIONS), "score": rng.random(), "method": "keyword_fallback"}
+        for index in range(count)
+    ]
+
+def cell(item):
+    return item["emotion"], min(int(item["score"] * SCORE_BINS), SCORE_BINS - 1)
+
+def test_particle_weights_add_up_to_each_cell():
+    items = make_items(5000)
+    summary = AnalysisSummary(samples_per_cell=50)
+    # Uneven batches, as the streaming path sends them
+    for start in range(0, len(items), 777):
+        summary.add(items[start:start + 777])
+
+    particles = summary.particles(300)
+    weights = Counter()
+    for particle in particles:
+        weights[cell(particle)] += particle["weight"]
+        assert items[particle["position"]]["text"] == particle["text"]
+    assert weights == Counter(cell(item) for item in items)
+    assert [particle["position"] for particle in particles] == sorted(particle["position"] for particle in particles)
+    assert len(particles) <= 300 + len(weights)
+
+def test_timeline_coarsens():
+    summary = AnalysisSummary(timeline_buckets=10)
+    summary.add(make_items(20))
+    assert summary.to_dict()["timeline"]["bucket_size"] == 1
+
+    summary.add(make_items(1))
+    timeline = summary.to_dict()["timeline"]
+    assert timeline["bucket_size"] == 2
+    assert sum(map(sum, timeline["counts"].values())) == 21
+
+    summary.add(make_items(1000))
+    timeline = summary.to_dict()["timeline"]
+    assert timeline["bucket_size"] == 64
+    assert len(timeline["mean_score"]) <= 2 * 10
+    assert sum(map(sum, timeline["counts"].values())) == 1021
+
+def test_incremental_matches_one_shot():
+    items = make_items(3000)
+    one_shot = AnalysisSummary()
+    one_shot.add(items)
+    incremental = AnalysisSummary()
+    for start in range(0, len(items), 101):
+        incremental.add(items[start:start + 101])
+    assert incremental.to_dict() == one_shot.to_dict()
+    assert len(one_shot.to_dict()["timeline"]["mean_score"]) <= 2 * TIMELINE_BUCKETS
+
+def test_summarize_empty():
+    stats, particles = summarize([])
+    assert particles is None
+    assert stats["count"] == 0
+    assert stats["emotions"] == {}
+    assert stats["overall_mean_score"] is None
+    assert stats["timeline"]["mean_score"] == []
+
+def test_summarize_threshold():
+    items = make_items(101)
+    stats, particles = summarize(items[:100], max_particles=100)
+    assert stats["count"] == 100 and particles is None
+
+    stats, particles = summarize(items, max_particles=100)
+    assert stats["count"] == 101
+    assert sum(particle["weight"] for particle in particles) == 101
+
+    # 0 turns downsampling off
+    assert summarize(items, max_particles=0)[1] is None
@@ -0,0 +1,47 @@
+import threading
+
+from translation import StubTranslator, TranslationStage, detect_language
+
+def test_short_english_snippets_stay_english():
+    for text in ("Happy day.", "Sad day.", "e.g. 3.5 percent rise.", "Stock markets rallied strongly."):
+        assert detect_language(text) == "en", text
+
+def test_longer_foreign_snippets_are_detected():
+    assert detect_language("Je suis très heureux aujourd'hui.") == "fr"
+    assert detect_language("Hoy es un día triste y gris.") == "es"
+    assert detect_language("Ich bin heute sehr glücklich.") == "de"
+
+def test_stage_only_translates_foreign_snippets():
+    translator = StubTranslator({"Hoy es un día triste y gris.": "Today is a sad and grey day."})
+    stage = TranslationStage(translator)
+    results = stage.translate(["Happy day.", "Sad day.", "Hoy es un día triste y gris."])
+
+    assert results[0] == ("Happy day.", False, "en")
+    assert results[1] == ("Sad day.", False, "en")
+    assert results[2] == ("Today is a sad and grey day.", True, "es")
+    assert translator.calls == 1
+    assert stage.stats()["skipped"] == 2
+
+def test_translations_are_memoized():
+    translator = StubTranslator({"Hoy es un día triste y gris.": "Today is a sad and grey day."})
+    stage = TranslationStage(translator)
+    stage.translate(["Hoy es un día triste y gris."])
+    stage.translate(["Hoy es un día triste y gris."])
+
+    assert translator.calls == 1
+    assert stage.stats()["memo_hits"] == 1
+
+def test_stats_are_exact_under_concurrency():
+    stage = TranslationStage(StubTranslator())
+    texts = [f"Je suis très heureux aujourd'hui, jour {i}" for i in range(50)] + ["This is a plain English sentence"] * 50
+
+    threads = [threading.Thread(target=stage.translate, args=(texts,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    stats = stage.stats()
+    assert stats["skipped"] == 8 * 50
+    assert stats["memo_hits"] + stats["translated"] == 8 * 50
+
@@ -0,0 +1,254 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from langdetect import DetectorFactory, detect_langs, LangDetectException
+
+logger = logging.getLogger(__name__)
+
+# langdetect is randomized unless seeded
+DetectorFactory.seed = 0
+
+# Frequent English function words. When enough of a snippet is made of these
+# we call it English without asking langdetect, which is slow and unreliable
+# on short snippets.
+ENGLISH_STOPWORDS = {
+    "the", "a", "an", "and", "or", "but", "of", "to", "in", "on", "at", "for",
+    "with", "is", "are", "was", "were", "be", "been", "am", "i", "you", "he",
+    "she", "it", "we", "they", "this", "that", "these", "those", "my", "your",
+    "our", "their", "not", "no", "so", "do", "does", "did", "have", "has",
+    "had", "will", "would", "can", "could", "what", "how", "why", "from", "by"
+}
+
+_WORD = re.compile(r"[^\W\d_]+")
+
+# langdetect guesses wildly on a few words ("Happy day." -> tl, "Sad day."
+# -> so), often with a probability close to 1. Snippets with fewer words
+# (of two letters or more) than this, or whose best guess is below the
+# probability floor, are taken as English.
+MIN_DETECT_WORDS = 3
+MIN_DETECT_PROBABILITY = 0.9
+
+def looks_english(text: str):
+    words = _WORD.findall(text.lower())
+    if len(words) < 2:
+        return False
+    hits = sum(1 for word in words if word in ENGLISH_STOPWORDS)
+    return hits / len(words) >= 0.3
+
+def detect_language(text: str):
+    """
+    Local language detection. Returns an ISO code or None when undetectable.
+    Short snippets and uncertain guesses count as English.
+    """
+    if looks_english(text):
+        return "en"
+    if sum(1 for word in _WORD.findall(text) if len(word) > 1) < MIN_DETECT_WORDS:
+        return "en"
+    try:
+        candidates = detect_langs(text)
+    except LangDetectException:
+        return None
+    if not candidates or candidates[0].prob < MIN_DETECT_PROBABILITY:
+        return "en"
+    return candidates[0].lang
+
+# --- Translator Backends ---
+
+class Translator:
+    """
+    Interface for translation backends.
+    translate_batch receives snippets that share a source language and
+    returns their translations in the same order.
+    """
+    name = "base"
+
+    def translate_batch(self, texts, source: str, target: str = "en"):
+        raise NotImplementedError
+
+class GoogleTranslatorBackend(Translator):
+    """
+    Google Translate via deep_translator.
+    Snippets are joined with newlines into requests of up to `max_chars`
+    characters, so a group costs one round trip instead of one per snippet.
+    """
+    name = "google"
+
+    def __init__(self, max_chars: int = 4500):
+        self.max_chars = max_chars
+
+    def translate_batch(self, texts, source: str, target: str = "en"):
+        from deep_translator import GoogleTranslator
+        # langdetect codes don't always match Google's, so let Google detect
+        translator = GoogleTranslator(source="auto", target=target)
+
+        results = []
+        for chunk in self._chunks(texts):
+            joined = "\n".join(text.replace("\n", " ") for text in chunk)
+            translated = translator.translate(joined) if len(chunk) > 1 else None
+            lines = translated.split("\n") if translated else []
+            if len(lines) == len(chunk):
+                results.extend(lines)
+            else:
+                # Line structure was not preserved: translate one by one
+                results.extend(translator.translate(text) for text in chunk)
+        return results
+
+    def _chunks(self, texts):
+        chunk = []
+        size = 0
+        for text in texts:
+            if chunk and size + len(text) + 1 > self.max_chars:
+                yield chunk
+                chunk = []
+                size = 0
+            chunk.append(text)
+            size += len(text) + 1
+        if chunk:
+            yield chunk
+
+class StubTranslator(Translator):
+    """
+    Offline backend for tests and benchmarks.
+    Looks snippets up in `phrasebook` and returns anything unknown unchanged.
+    `delay_ms` simulates the network round trip of one batch.
+    """
+    name = "stub"
+
+    def __init__(self, phrasebook=None, delay_ms: float = 0):
+        self.phrasebook = phrasebook or {}
+        self.delay = delay_ms / 1000.0
+        self.calls = 0
+
+    def translate_batch(self, texts, source: str, target: str = "en"):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return [self.phrasebook.get(text, text) for text in texts]
+
+class NullTranslator(Translator):
+    """Never translates."""
+    name = "none"
+
+    def translate_batch(self, texts, source: str, target: str = "en"):
+        return list(texts)
+
+TRANSLATORS = {
+    "google": GoogleTranslatorBackend,
+    "stub": StubTranslator,
+    "none": NullTranslator
+}
+
+def get_translator(name: str):
+    if name not in TRANSLATORS:
+        raise ValueError(f"Unknown translator '{name}'. Choose one of: {', '.join(TRANSLATORS)}")
+    return TRANSLATORS[name]()
+
+# --- Translation Stage ---
+
+class TranslationStage:
+    """
+    Translation as its own pipeline stage.
+    Detects each snippet's language locally, skips English, groups the
+    rest by source language and sends each group to the translator in one
+    batch. Translations are memoized in a bounded LRU.
+    """
+
+    def __init__(self, translator: Translator, target: str = "en", cache_size: int = 10000):
+        self.translator = translator
+        self.target = target
+        self.cache_size = max(1, int(cache_size))
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.skipped = 0
+        self.memo_hits = 0
+        self.translated = 0
+        self.batches = 0
+        self.failures = 0
+
+    def translate(self, texts):
+        """
+        Returns one (processing_text, is_translated, language) tuple per snippet.
+        """
+        texts = list(texts)
+        results = [None] * len(texts)
+        groups = {}
+        skipped = 0
+
+        for i, text in enumerate(texts):
+            language = detect_language(text) if len(text.strip()) > 2 else None
+            if language is None or language == self.target:
+                skipped += 1
+                results[i] = (text, False, language)
+                continue
+
+            with self._lock:
+                memo = self._memo.get((language, text))
+                if memo is not None:
+                    self._memo.move_to_end((language, text))
+                    self.memo_hits += 1
+            if memo is not None:
+                results[i] = self._result(text, memo, language)
+            else:
+                groups.setdefault(language, []).append(i)
+
+        for language, indices in groups.items():
+            # Deduplicate within the group before hitting the backend
+            unique = list(dict.fromkeys(texts[i] for i in indices))
+            try:
+                translations = self.translator.translate_batch(unique, language, self.target)
+            except Exception as e:
+                logger.warning(f"Translation failed ({language}): {e}")
+                with self._lock:
+                    self.failures += 1
+                for i in indices:
+                    results[i] = (texts[i], False, language)
+                continue
+
+            translated = dict(zip(unique, translations))
+            with self._lock:
+                for text, translation in translated.items():
+                    self._memo[(language, text)] = translation or text
+                    self._memo.move_to_end((language, text))
+                while len(self._memo) > self.cache_size:
+                    self._memo.popitem(last=False)
+                self.batches += 1
+                self.translated += len(unique)
+
+            for i in indices:
+                results[i] = self._result(texts[i], translated.get(texts[i]) or texts[i], language)
+
+        with self._lock:
+            self.skipped += skipped
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {
+                "translator": self.translator.name,
+                "skipped": self.skipped,
+                "memo_hits": self.memo_hits,
+                "translated": self.translated,
+                "batches": self.batches,
+                "failures": self.failures,
+                "memo_entries": len(self._memo)
+            }
+
+    def _result(self, text, translation, language):
+        if translation.lower() != text.lower():
+            return (translation, True, language)
+        return (text, False, language)
+
+def default_translation_stage():
+    """Builds the stage selected by EMOTIA_TRANSLATOR (google, stub or none)."""
+    name = os.environ.get("EMOTIA_TRANSLATOR", "google")
+    try:
+        translator = get_translator(name)
+    except ValueError as e:
+        logger.warning(f"{e}. Using 'google'.")
+        translator = GoogleTranslatorBackend()
+    return TranslationStage(translator, cache_size=int(os.environ.get("EMOTIA_TRANSLATION_CACHE_SIZE", "10000")))
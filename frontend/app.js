@@ -1,4 +1,4 @@
-import { initCanvas, addDataPoint, clearCanvas, spawnDemoParticles } from './canvas.js';
+import { initCanvas, addDataPoint, clearCanvas, spawnDemoParticles, applyDelta } from './canvas.js';
 
 /**
  * Main Application Logic
@@ -17,6 +17,7 @@ window.addEventListener('load', () => {
     const inputs = {
         url: document.getElementById('urlInput'),
         text: document.getElementById('textInput'),
+        live: document.getElementById('liveInput'),
         file: document.getElementById('fileInputContainer')
     };
     let activeType = 'url';
@@ -41,6 +42,9 @@ window.addEventListener('load', () => {
                 });
                 inputs[activeType].classList.remove('hidden');
                 hideTooltip();
+
+                if (activeType === 'live') startLive();
+                else stopLive();
             }
         });
     }
@@ -71,6 +75,7 @@ window.addEventListener('load', () => {
     if (inputs.url) inputs.url.addEventListener('input', hideTooltip);
     if (inputs.text) inputs.text.addEventListener('focus', hideTooltip);
     if (inputs.text) inputs.text.addEventListener('input', hideTooltip);
+    if (inputs.live) inputs.live.addEventListener('focus', hideTooltip);
 
     // --- Toast Notification System ---
     function showToast(message, type = 'info') {
@@ -126,11 +131,14 @@ window.addEventListener('load', () => {
             }
 
             // 1. Calculate Statistics
-            const total = currentAnalysisItems.length;
+            // Downsampled analyses send representatives that carry a weight
+            let total = 0;
             const counts = {};
             currentAnalysisItems.forEach(item => {
                 const emotion = item.emotion || 'neutral';
-                counts[emotion] = (counts[emotion] || 0) + 1;
+                const weight = item.weight || 1;
+                counts[emotion] = (counts[emotion] || 0) + weight;
+                total += weight;
             });
 
             // 2. Render Stats
@@ -176,9 +184,107 @@ window.addEventListener('load', () => {
         });
     }
 
+    // --- Streaming Helpers ---
+    /**
+     * Reads an NDJSON response line by line and calls onEvent for each parsed event.
+     */
+    async function readEventStream(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (value) buffer += decoder.decode(value, { stream: !done });
+
+            let newline;
+            while ((newline = buffer.indexOf('\n')) >= 0) {
+                const line = buffer.slice(0, newline).trim();
+                buffer = buffer.slice(newline + 1);
+                if (line) onEvent(JSON.parse(line));
+            }
+
+            if (done) break;
+        }
+
+        if (buffer.trim()) onEvent(JSON.parse(buffer));
+    }
+
+    // --- Live Mode ---
+    // Sends each revision of the text to the /live WebSocket while typing.
+    // The server only analyzes sentences that are new or edited and answers
+    // with add/update/remove deltas, which the canvas applies in place.
+    let liveSocket = null;
+    let liveRevision = 0;
+    let liveTimer = null;
+    let liveItems = new Map();
+
+    function startLive() {
+        if (liveSocket) return;
+        const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const socket = new WebSocket(`${protocol}://${window.location.host}/live`);
+        liveSocket = socket;
+
+        clearCanvas();
+        liveItems = new Map();
+        currentAnalysisItems = [];
+        if (viewReportBtn) viewReportBtn.classList.add('hidden');
+
+        socket.addEventListener('open', sendRevision);
+        socket.addEventListener('message', (e) => {
+            const event = JSON.parse(e.data);
+            if (event.type === 'delta') {
+                // Deltas build on each other, so every one is applied in order
+                if (!uiLayer.classList.contains('analyzed')) {
+                    uiLayer.classList.add('analyzed');
+                }
+                applyDelta(event);
+                event.remove.forEach(id => liveItems.delete(id));
+                event.update.forEach(item => liveItems.set(item.id, item));
+                event.add.forEach(item => liveItems.set(item.id, item));
+                currentAnalysisItems = [...liveItems.values()];
+                if (viewReportBtn) viewReportBtn.classList.toggle('hidden', currentAnalysisItems.length === 0);
+            } else if (event.type === 'error') {
+                showToast(event.detail, 'error');
+            }
+        });
+        socket.addEventListener('close', () => {
+            if (liveSocket === socket) liveSocket = null;
+        });
+    }
+
+    function stopLive() {
+        clearTimeout(liveTimer);
+        if (liveSocket) {
+            liveSocket.close();
+            liveSocket = null;
+        }
+    }
+
+    function sendRevision() {
+        if (!liveSocket || liveSocket.readyState !== WebSocket.OPEN) return;
+        liveRevision += 1;
+        liveSocket.send(JSON.stringify({ type: 'revision', revision: liveRevision, text: inputs.live.value }));
+    }
+
+    if (inputs.live) {
+        inputs.live.addEventListener('input', () => {
+            // Wait for a short pause in typing before sending
+            clearTimeout(liveTimer);
+            liveTimer = setTimeout(sendRevision, 250);
+        });
+    }
+
     // --- Analysis Logic ---
     if (scrapeBtn) {
         scrapeBtn.addEventListener('click', async () => {
+            // Live mode analyzes while typing; the button just sends right away
+            if (activeType === 'live') {
+                clearTimeout(liveTimer);
+                sendRevision();
+                return;
+            }
+
             // UI Feedback
             scrapeBtn.innerHTML = '<span class="spinner"></span> Analyzing...';
             scrapeBtn.disabled = true;
@@ -193,12 +299,14 @@ window.addEventListener('load', () => {
             try {
                 let response;
 
-                // Handle different input types
+                // Handle different input types.
+                // The *_stream endpoints send NDJSON: one "items" event per analyzed
+                // batch, then a "summary" event, so particles appear progressively.
                 if (activeType === 'url') {
                     const url = inputs.url.value;
                     if (!url) throw new Error("Please enter a URL.");
 
-                    response = await fetch('/scrape', {
+                    response = await fetch('/scrape_stream', {
                         method: 'POST',
                         headers: { 'Content-Type': 'application/json' },
                         body: JSON.stringify({ url })
@@ -207,7 +315,7 @@ window.addEventListener('load', () => {
                     const text = inputs.text.value;
                     if (!text) throw new Error("Please enter some text.");
 
-                    response = await fetch('/analyze_text', {
+                    response = await fetch('/analyze_text_stream', {
                         method: 'POST',
                         headers: { 'Content-Type': 'application/json' },
                         body: JSON.stringify({ text })
@@ -219,7 +327,7 @@ window.addEventListener('load', () => {
                     const formData = new FormData();
                     formData.append('file', file);
 
-                    response = await fetch('/upload_pdf', {
+                    response = await fetch('/upload_pdf_stream', {
                         method: 'POST',
                         body: formData
                     });
@@ -230,24 +338,39 @@ window.addEventListener('load', () => {
                     throw new Error(errData.detail || "Analysis failed");
                 }
 
-                const data = await response.json();
-                currentAnalysisItems = data.items; // Store for report
-
-                // Reset and populate the canvas
+                // Reset the canvas and spawn particles as batches arrive
                 clearCanvas();
+                currentAnalysisItems = []; // Store for report
+                let analyzedCount = 0;
+
+                await readEventStream(response, (event) => {
+                    if (event.type === 'items') {
+                        event.items.forEach(item => addDataPoint(item));
+                        currentAnalysisItems.push(...event.items);
+                        analyzedCount = currentAnalysisItems.length;
+                    } else if (event.type === 'progress') {
+                        // Large analysis: only counts arrive until the summary
+                        analyzedCount = event.count;
+                        scrapeBtn.innerHTML = `<span class="spinner"></span> Analyzing... ${analyzedCount}`;
+                    } else if (event.type === 'summary' && event.particles) {
+                        // Swap the first particles for weighted representatives of everything
+                        clearCanvas();
+                        event.particles.forEach(item => addDataPoint(item));
+                        currentAnalysisItems = event.particles;
+                        analyzedCount = event.count;
+                    } else if (event.type === 'error') {
+                        throw new Error(event.detail || "Analysis failed");
+                    }
+                });
 
-                if (data.items.length === 0) {
+                if (currentAnalysisItems.length === 0) {
                     showToast("No analyzable content found.", "info");
                     if (viewReportBtn) viewReportBtn.classList.add('hidden');
                 } else {
-                    showToast(`Analysis complete! Found ${data.items.length} emotional points.`, "success");
+                    showToast(`Analysis complete! Found ${analyzedCount} emotional points.`, "success");
                     if (viewReportBtn) viewReportBtn.classList.remove('hidden');
                 }
 
-                data.items.forEach(item => {
-                    addDataPoint(item);
-                });
-
             } catch (error) {
                 console.error("Analysis error:", error);
                 showToast(error.message, "error");
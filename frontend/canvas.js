@@ -19,6 +19,9 @@ const EMOTIONS = {
 
 let selectedParticleRef = null;
 
+// Particles of the live-editing session, by the server's particle ID
+const particlesById = new Map();
+
 /**
  * Initializes the canvas and event listeners.
  */
@@ -85,7 +88,8 @@ export function initCanvas() {
                 selectedParticleRef = clicked;
 
                 // Update Content
-                cardEmotion.textContent = clicked.data.emotion;
+                const weight = clicked.data.weight || 1;
+                cardEmotion.textContent = weight > 1 ? `${clicked.data.emotion} ×${weight}` : clicked.data.emotion;
                 cardEmotion.style.color = clicked.color;
                 cardText.textContent = clicked.data.text;
 
@@ -120,6 +124,35 @@ export function addDataPoint(data) {
 
 export function clearCanvas() {
     particles = [];
+    particlesById.clear();
+}
+
+/**
+ * Applies a live-editing delta from the /live WebSocket in place:
+ * new particles spawn, edited ones keep their position and velocity but
+ * take the new text/emotion, and removed ones disappear.
+ */
+export function applyDelta(delta) {
+    delta.remove.forEach(id => {
+        const p = particlesById.get(id);
+        if (!p) return;
+        particlesById.delete(id);
+        if (selectedParticleRef === p) selectedParticleRef = null;
+    });
+    if (delta.remove.length) {
+        particles = particles.filter(p => p.data.id === undefined || particlesById.has(p.data.id));
+    }
+
+    delta.update.forEach(data => {
+        const p = particlesById.get(data.id);
+        if (p) p.setData(data);
+    });
+
+    delta.add.forEach(data => {
+        const p = new Particle(data);
+        particles.push(p);
+        particlesById.set(data.id, p);
+    });
 }
 
 export function spawnDemoParticles() {
@@ -145,18 +178,23 @@ export function spawnDemoParticles() {
 
 class Particle {
     constructor(data) {
-        this.data = data;
         this.x = width / 2 + (Math.random() - 0.5) * 200;
         this.y = height / 2 + (Math.random() - 0.5) * 200;
         this.vx = (Math.random() - 0.5) * 2;
         this.vy = (Math.random() - 0.5) * 2;
+        this.isHovered = false;
+        this.setData(data);
+    }
 
+    setData(data) {
+        this.data = data;
         const config = EMOTIONS[data.emotion] || EMOTIONS.neutral;
         this.config = config;
         this.color = config.color;
-        this.baseRadius = (6 + data.score * 10) * config.radiusMult;
+        // Representative particles of large analyses stand for `weight` snippets
+        const weightMult = Math.min(3, 1 + Math.log10(data.weight || 1));
+        this.baseRadius = (6 + data.score * 10) * config.radiusMult * weightMult;
         this.radius = this.baseRadius;
-        this.isHovered = false;
     }
 
     update() {